@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Replicate HTTP API, for offline benchmarks.
+
+Implements the endpoints the scripts use: file uploads, prediction create
+(including `Prefer: wait` and webhooks), prediction status and cancel, and
+output downloads (with Range support). Predictions go through `starting` and
+`processing` on a configurable schedule, report created/started/completed
+timestamps and `metrics.predict_time`, and return canned outputs: a PNG for
+image models, a WAV for speech models and an MP4 for video models.
+
+Failures can be injected: failed predictions, 429 responses with
+Retry-After, and 503 responses.
+
+Usage:
+    python benchmarks/fake_replicate.py --port 8765 --latency 2 --throttle-rate 0.1
+    export REPLICATE_API_BASE=http://127.0.0.1:8765/v1 REPLICATE_API_TOKEN=r8_fake
+    python scripts/animate_pfp.py photo.png out.mp4
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import random
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+import wave
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+DEFAULT_QUEUE = 0.2
+DEFAULT_LATENCY = 1.0
+# Longest a `Prefer: wait` request is held open (seconds)
+MAX_SYNC_WAIT = 60
+
+
+def png_bytes(width: int, height: int, color: tuple) -> bytes:
+    """Encode a solid-color RGB PNG without third-party libraries."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + bytes(color) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+def wav_bytes(seconds: float, sample_rate: int = 16000) -> bytes:
+    """A silent mono 16-bit WAV of the given length."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def mp4_bytes(seconds: float = 2.0) -> bytes:
+    """A small test-pattern MP4 made with ffmpeg, or placeholder bytes without it."""
+    if shutil.which("ffmpeg"):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clip.mp4")
+            result = subprocess.run([
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"testsrc=size=320x320:rate=24:duration={seconds}",
+                "-f", "lavfi", "-i", f"sine=duration={seconds}",
+                "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path,
+            ])
+            if result.returncode == 0:
+                with open(path, "rb") as f:
+                    return f.read()
+    return b"\x00\x00\x00\x18ftypisom" + b"\x00" * 4096
+
+
+def iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Config:
+    """Timing, failure injection and canned outputs for the fake server."""
+
+    def __init__(
+        self,
+        queue: float = DEFAULT_QUEUE,
+        latency: float = DEFAULT_LATENCY,
+        jitter: float = 0.2,
+        fail_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        bandwidth_mbps: float = 0.0,
+        video_path: str = None,
+        audio_seconds: float = 3.0,
+        seed: int = None,
+    ):
+        self.queue = queue
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.bandwidth_mbps = bandwidth_mbps
+        self.random = random.Random(seed)
+        self.audio = wav_bytes(audio_seconds)
+        if video_path:
+            with open(video_path, "rb") as f:
+                self.video = f.read()
+        else:
+            self.video = mp4_bytes()
+
+    def vary(self, seconds: float) -> float:
+        return max(0.0, seconds * (1 + self.random.uniform(-self.jitter, self.jitter)))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def fake(self) -> "FakeReplicate":
+        return self.server.fake
+
+    def send_json(self, status: int, data, headers: dict = None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def injected_failure(self) -> bool:
+        """Answer with an injected 429/503 instead of handling the request."""
+        config = self.fake.config
+        roll = config.random.random()
+        if roll < config.throttle_rate:
+            self.fake.count("throttled")
+            self.send_json(429, {"detail": "Request was throttled."}, {"Retry-After": f"{config.retry_after:g}"})
+            return True
+        if roll < config.throttle_rate + config.error_rate:
+            self.fake.count("errors")
+            self.send_json(503, {"detail": "Service unavailable"})
+            return True
+        return False
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0]
+        self.fake.count("requests")
+        if self.injected_failure():
+            return
+
+        if path == "/v1/files":
+            self.fake.count("uploads")
+            self.fake.count("upload_bytes", len(body))
+            file_id = self.fake.new_id()
+            base = self.fake.base_url
+            return self.send_json(201, {
+                "id": file_id,
+                "size": len(body),
+                "urls": {"get": f"{base}/files/{file_id}"},
+                "expires_at": iso(time.time() + 86400),
+            })
+
+        match = re.fullmatch(r"/v1/predictions/(\w+)/cancel", path)
+        if match:
+            prediction = self.fake.predictions.get(match.group(1))
+            if prediction is None:
+                return self.send_json(404, {"detail": "Not found"})
+            self.fake.count("cancels")
+            prediction.setdefault("canceled", time.time())
+            return self.send_json(200, self.fake.state(prediction))
+
+        match = re.fullmatch(r"/v1/(?:models/([^/]+/[^/]+)/)?predictions", path)
+        if not match:
+            return self.send_json(404, {"detail": "Not found"})
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return self.send_json(400, {"detail": "Invalid JSON"})
+
+        prediction = self.fake.create(match.group(1) or f"version:{payload.get('version', '')}", payload)
+        if "wait" in self.headers.get("Prefer", ""):
+            deadline = time.time() + MAX_SYNC_WAIT
+            while time.time() < min(deadline, prediction["completed"]):
+                time.sleep(min(0.05, max(0.0, prediction["completed"] - time.time())))
+        self.send_json(201, self.fake.state(prediction))
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/_stats":
+            return self.send_json(200, self.fake.stats())
+
+        match = re.fullmatch(r"/v1/predictions/(\w+)", path)
+        if match:
+            self.fake.count("requests")
+            self.fake.count("polls")
+            if self.injected_failure():
+                return
+            prediction = self.fake.predictions.get(match.group(1))
+            if prediction is None:
+                return self.send_json(404, {"detail": "Not found"})
+            return self.send_json(200, self.fake.state(prediction))
+
+        match = re.fullmatch(r"/outputs/(\w+)\.\w+", path)
+        if match and match.group(1) in self.fake.predictions:
+            return self.send_output(self.fake.output(self.fake.predictions[match.group(1)]))
+        if re.fullmatch(r"/files/\w+", path):
+            return self.send_output(b"")
+        self.send_json(404, {"detail": "Not found"})
+
+    def send_output(self, data: bytes):
+        """Send bytes, honoring a single Range and the bandwidth cap."""
+        self.fake.count("downloads")
+        start, end = 0, len(data) - 1
+        status = 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and data:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else end, len(data) - 1)
+            status = 206
+        chunk = data[start:end + 1]
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(chunk)))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+
+        rate = self.fake.config.bandwidth_mbps * 1e6
+        step = 64 * 1024
+        for offset in range(0, len(chunk), step):
+            piece = chunk[offset:offset + step]
+            self.wfile.write(piece)
+            if rate:
+                time.sleep(len(piece) / rate)
+        self.fake.count("download_bytes", len(chunk))
+
+
+class FakeReplicate:
+    """A fake Replicate API served from a background thread."""
+
+    def __init__(self, config: Config = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or Config()
+        self.predictions = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.base_url}/v1"
+
+    def start(self) -> "FakeReplicate":
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-replicate", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {**self.counters, "predictions": len(self.predictions)}
+
+    def new_id(self) -> str:
+        return f"fake{next(self.ids):06d}"
+
+    def create(self, model: str, payload: dict) -> dict:
+        config = self.config
+        now = time.time()
+        started = now + config.vary(config.queue)
+        prediction = {
+            "id": self.new_id(),
+            "model": model,
+            "input": payload.get("input", {}),
+            "created": now,
+            "started": started,
+            "completed": started + config.vary(config.latency),
+            "fails": config.random.random() < config.fail_rate,
+        }
+        with self.lock:
+            self.predictions[prediction["id"]] = prediction
+        self.count("creates")
+        if payload.get("webhook"):
+            delay = prediction["completed"] - now
+            threading.Timer(delay, self.send_webhook, (prediction, payload["webhook"])).start()
+        return prediction
+
+    def kind(self, prediction: dict) -> str:
+        model = prediction["model"].lower()
+        if "speech" in model or "tts" in model:
+            return "audio"
+        if model.startswith("version:") or "expression" in model:
+            return "image"
+        return "video"
+
+    def output(self, prediction: dict) -> bytes:
+        kind = self.kind(prediction)
+        if kind == "audio":
+            return self.config.audio
+        if kind == "image":
+            # Vary the color with the input so frames differ
+            digest = zlib.crc32(json.dumps(prediction["input"], sort_keys=True).encode("utf-8"))
+            return png_bytes(256, 256, (digest & 0xFF, (digest >> 8) & 0xFF, (digest >> 16) & 0xFF))
+        return self.config.video
+
+    def state(self, prediction: dict) -> dict:
+        now = time.time()
+        extension = {"audio": "wav", "image": "png", "video": "mp4"}[self.kind(prediction)]
+        base = self.base_url
+        result = {
+            "id": prediction["id"],
+            "model": prediction["model"],
+            "input": prediction["input"],
+            "status": "starting",
+            "output": None,
+            "error": None,
+            "created_at": iso(prediction["created"]),
+            "urls": {
+                "get": f"{base}/v1/predictions/{prediction['id']}",
+                "cancel": f"{base}/v1/predictions/{prediction['id']}/cancel",
+            },
+        }
+        canceled = prediction.get("canceled")
+        if canceled is not None and canceled < prediction["completed"]:
+            return {**result, "status": "canceled", "completed_at": iso(canceled)}
+        if now >= prediction["started"]:
+            result.update(status="processing", started_at=iso(prediction["started"]))
+        if now >= prediction["completed"]:
+            result.update(
+                completed_at=iso(prediction["completed"]),
+                metrics={"predict_time": round(prediction["completed"] - prediction["started"], 3)},
+            )
+            if prediction["fails"]:
+                result.update(status="failed", error="Injected failure")
+            else:
+                output = f"{base}/outputs/{prediction['id']}.{extension}"
+                result.update(status="succeeded", output=[output] if extension == "png" else output)
+        return result
+
+    def send_webhook(self, prediction: dict, url: str):
+        data = json.dumps(self.state(prediction)).encode("utf-8")
+        request = urllib.request.Request(url, data, {"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+            self.count("webhooks")
+        except OSError:
+            self.count("webhook_errors")
+
+
+def add_config_args(parser: argparse.ArgumentParser):
+    """Options shared by this server and the benchmark runner."""
+    parser.add_argument("--queue", type=float, default=DEFAULT_QUEUE, help=f"Seconds a prediction waits before starting (default: {DEFAULT_QUEUE})")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help=f"Seconds a prediction runs (default: {DEFAULT_LATENCY})")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Random +/- fraction applied to queue and latency (default: 0.2)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of predictions that fail")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of API requests answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests answered 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429 responses (default: 1)")
+    parser.add_argument("--bandwidth", type=float, default=0.0, metavar="MBPS", help="Cap output download speed in MB/s (default: unlimited)")
+    parser.add_argument("--video", metavar="PATH", help="MP4 returned by video models (default: generated with ffmpeg)")
+    parser.add_argument("--audio-seconds", type=float, default=3.0, help="Length of the WAV returned by speech models (default: 3)")
+    parser.add_argument("--seed", type=int, help="Seed for jitter and failure injection")
+
+
+def config_from_args(args: argparse.Namespace) -> Config:
+    return Config(
+        queue=args.queue,
+        latency=args.latency,
+        jitter=args.jitter,
+        fail_rate=args.fail_rate,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        bandwidth_mbps=args.bandwidth,
+        video_path=args.video,
+        audio_seconds=args.audio_seconds,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Replicate API")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Listen port (default: 8765)")
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    fake = FakeReplicate(config_from_args(args), args.host, args.port).start()
+    print(f"Fake Replicate API at {fake.api_base}")
+    print(f"  export REPLICATE_API_BASE={fake.api_base} REPLICATE_API_TOKEN=r8_fake")
+    print(f"  counters: {fake.base_url}/_stats")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the pfp-animate scripts.
+
+Starts the fake Replicate API (fake_replicate.py) in-process, points the
+scripts at it through REPLICATE_API_BASE and runs each scenario as a
+subprocess with --report. For every scenario it prints wall-clock latency
+percentiles, throughput (jobs per second), peak memory (max RSS of the
+script process) and the p50 of each phase from the scripts' own reports.
+
+Scenarios:
+    keyframe    animate_keyframe.py, nod preset to GIF
+    pfp         animate_pfp.py, one video
+    pfp-batch   animate_pfp.py --batch with --jobs entries
+    veo         animate_veo.py, one video
+    audio       animate_audio.py --tts
+    audio-batch animate_audio.py --batch with --jobs entries
+
+Usage:
+    python benchmarks/run.py
+    python benchmarks/run.py --only pfp pfp-batch --jobs 20 --repeat 5
+    python benchmarks/run.py --latency 5 --throttle-rate 0.2 --json results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fake_replicate import FakeReplicate, add_config_args, config_from_args, png_bytes, wav_bytes
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+PHASES = ("upload", "create", "queue_wait", "model_run", "wait", "download", "encode")
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def build_scenarios(workdir: Path, jobs: int) -> dict:
+    """Map scenario name to (argv builder, jobs per run)."""
+    image = workdir / "face.png"
+    image.write_bytes(png_bytes(512, 512, (200, 160, 130)))
+    audio = workdir / "speech.wav"
+    audio.write_bytes(wav_bytes(4.0))
+
+    def pfp_manifest(run: Path) -> Path:
+        path = run / "pfp.jsonl"
+        with open(path, "w") as f:
+            for i in range(jobs):
+                f.write(json.dumps({"input": str(image), "output": str(run / f"pfp_{i}.mp4")}) + "\n")
+        return path
+
+    def audio_manifest(run: Path) -> Path:
+        path = run / "audio.jsonl"
+        with open(path, "w") as f:
+            for i in range(jobs):
+                source = {"text": f"Benchmark line {i}."} if i % 2 else {"audio": str(audio)}
+                f.write(json.dumps({"image": str(image), "output": str(run / f"audio_{i}.mp4"), **source}) + "\n")
+        return path
+
+    return {
+        "keyframe": (lambda run: [
+            "animate_keyframe.py", str(image), str(run / "out.gif"),
+            "--motion", "nod", "--rate", "100000", "--burst", "1000", "--no-cache",
+        ], 1),
+        "pfp": (lambda run: ["animate_pfp.py", str(image), str(run / "out.mp4")], 1),
+        "pfp-batch": (lambda run: [
+            "animate_pfp.py", "--batch", str(pfp_manifest(run)), "--results", str(run / "results.jsonl"),
+        ], jobs),
+        "veo": (lambda run: [
+            "animate_veo.py", str(image), str(run / "out.mp4"), "--prompt", "gentle smile",
+        ], 1),
+        "audio": (lambda run: [
+            "animate_audio.py", str(image), str(run / "out.mp4"),
+            "--tts", "Hello from the benchmark.", "--no-cache",
+        ], 1),
+        "audio-batch": (lambda run: [
+            "animate_audio.py", "--batch", str(audio_manifest(run)), "--results", str(run / "results.jsonl"),
+            "--no-cache",
+        ], jobs),
+    }
+
+
+def run_once(argv: list, run: Path, env: dict) -> dict:
+    """Run one script invocation and measure wall time and peak memory."""
+    report = run / "report.json"
+    command = [sys.executable, str(SCRIPTS_DIR / argv[0]), *argv[1:], "--report", str(report)]
+    log = open(run / "output.log", "wb")
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=run, env=env, stdout=log, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    log.close()
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    summary = {}
+    if report.exists():
+        summary = json.loads(report.read_text()).get("summary", {})
+    return {
+        "ok": process.returncode == 0,
+        "wall": wall,
+        "peak_mb": peak_mb,
+        "phases": summary,
+        "log": str(run / "output.log"),
+    }
+
+
+def run_scenario(name: str, build, jobs: int, repeat: int, workdir: Path, env: dict) -> dict:
+    runs = []
+    for n in range(repeat):
+        run = workdir / f"{name}-{n}"
+        run.mkdir()
+        runs.append(run_once(build(run), run, {**env, "PFP_ANIMATE_CACHE_DIR": str(run / "cache")}))
+
+    walls = [r["wall"] for r in runs]
+    phases = {}
+    for phase in PHASES:
+        values = [r["phases"][phase]["p50"] for r in runs if phase in r["phases"]]
+        if values:
+            phases[phase] = round(percentile(values, 0.5), 3)
+    return {
+        "scenario": name,
+        "runs": repeat,
+        "succeeded": sum(r["ok"] for r in runs),
+        "jobs_per_run": jobs,
+        "wall_p50": round(percentile(walls, 0.5), 3),
+        "wall_p95": round(percentile(walls, 0.95), 3),
+        "jobs_per_second": round(jobs * repeat / sum(walls), 3),
+        "peak_mb": round(max(r["peak_mb"] for r in runs), 1),
+        "phase_p50": phases,
+        "failed_logs": [r["log"] for r in runs if not r["ok"]],
+    }
+
+
+def print_table(results: list):
+    print(f"\n{'scenario':<12} {'ok':>5} {'p50 s':>7} {'p95 s':>7} {'jobs/s':>7} {'peak MB':>8}  phase p50 (s)")
+    for r in results:
+        phases = " ".join(f"{phase}={seconds:g}" for phase, seconds in r["phase_p50"].items())
+        ok = f"{r['succeeded']}/{r['runs']}"
+        print(f"{r['scenario']:<12} {ok:>5} {r['wall_p50']:>7.2f} {r['wall_p95']:>7.2f} "
+              f"{r['jobs_per_second']:>7.2f} {r['peak_mb']:>8.1f}  {phases}")
+        for path in r["failed_logs"]:
+            print(f"{'':<12} failed run log: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scripts against a local fake Replicate API")
+    parser.add_argument("--only", nargs="+", metavar="SCENARIO", help="Scenarios to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario (default: 3)")
+    parser.add_argument("--jobs", type=int, default=8, help="Jobs per batch run (default: 8)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directory (outputs, logs, reports)")
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="pfp-bench-"))
+    scenarios = build_scenarios(workdir, args.jobs)
+    names = args.only or list(scenarios)
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        print(f"ERROR: Unknown scenario(s): {', '.join(unknown)}. Choose from: {', '.join(scenarios)}")
+        sys.exit(1)
+    if not shutil.which("ffmpeg"):
+        print("WARNING: ffmpeg not found; scenarios that encode or join video may fail")
+
+    fake = FakeReplicate(config_from_args(args)).start()
+    env = {
+        **os.environ,
+        "REPLICATE_API_BASE": fake.api_base,
+        "REPLICATE_API_TOKEN": "r8_benchmark",
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+    }
+    print(f"Fake Replicate API at {fake.api_base} (latency {args.latency}s, queue {args.queue}s)")
+
+    results = []
+    try:
+        for name in names:
+            build, jobs = scenarios[name]
+            print(f"Running {name} x{args.repeat}...")
+            results.append(run_scenario(name, build, jobs, args.repeat, workdir, env))
+    finally:
+        stats = fake.stats()
+        fake.stop()
+
+    print_table(results)
+    print(f"\nServer: {json.dumps(stats)}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "server": stats, "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    if args.keep or any(r["failed_logs"] for r in results):
+        print(f"Working directory: {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if all(r["succeeded"] == r["runs"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
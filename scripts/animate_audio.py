@@ -16,19 +16,70 @@ Usage:
 """
 
 import argparse
-import base64
+import asyncio
+import csv
 import json
 import os
+import random
 import sys
+import tempfile
 import time
-import urllib.request
-import urllib.error
 from pathlib import Path
+from typing import Callable, List
+
+from audio_probe import probe_duration
+from core import (
+    Generation, InputError, OutputError, PredictionError,
+    quiet, require_token, run_cli, succeeded_output, watch_prediction,
+)
+from disk_cache import DEFAULT_CACHE_DIR, DiskCache, make_key
+from instrument import add_report_args, configure_report, span
+from journal import EXPIRED, JOURNAL_SUFFIX, Journal, add_journal_args
+from pipeline import Stage, run_pipeline
+from media import MediaError, concat_videos, detect_silences, ffmpeg_available, plan_segments, split_audio
+from poller import get_poller
+from replicate_client import API_BASE, ClientError, HTTPError, get_client
+from result_store import add_result_args, configure_results, get_result_store, input_digest, result_key
+from uploads import file_input
+from webhooks import add_webhook_args, configure_webhooks, webhook_fields
 
 
 # Models
 OMNI_HUMAN_MODEL = "bytedance/omni-human-1.5"
 TTS_MODEL = "minimax/speech-02-turbo"
+TTS_EMOTION = "calm"
+TTS_SPEED = 0.95
+# Size cap for the cache of generated TTS audio
+TTS_CACHE_MB = 200
+
+# OmniHuman truncates audio past this length; longer audio is split into
+# segments with this much headroom below the limit
+MAX_AUDIO_SECONDS = 35
+SEGMENT_HEADROOM = 1.0
+PREDICTION_TIMEOUT = 600
+
+# Batch mode: workers per pipeline stage
+DEFAULT_TTS_WORKERS = 4
+DEFAULT_RENDER_WORKERS = 4
+DEFAULT_DOWNLOAD_WORKERS = 4
+MANIFEST_FIELDS = ("image", "output", "audio", "text", "voice", "prompt", "seed", "fast")
+
+MIME_TYPES = {
+    "image": {
+        ".png": "image/png",
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".webp": "image/webp",
+        ".gif": "image/gif",
+    },
+    "audio": {
+        ".mp3": "audio/mpeg",
+        ".wav": "audio/wav",
+        ".m4a": "audio/mp4",
+        ".ogg": "audio/ogg",
+        ".flac": "audio/flac",
+    },
+}
 
 # Available TTS voices
 TTS_VOICES = [
@@ -39,139 +90,116 @@ TTS_VOICES = [
 
 
 def check_token():
-    """Verify REPLICATE_API_TOKEN is set."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    if not token:
-        print("ERROR: REPLICATE_API_TOKEN environment variable not set.")
-        print("Get your token at: https://replicate.com/account/api-tokens")
-        sys.exit(1)
-    return token
+    """Verify REPLICATE_API_TOKEN is set (raises ConfigError)."""
+    return require_token()
 
 
 def load_file_as_uri(file_path: str, file_type: str = "image") -> str:
-    """Load file and return as data URI."""
+    """Return a file URL for the payload, uploading local files once."""
     if file_path.startswith(("http://", "https://")):
         return file_path
 
     path = Path(file_path)
     if not path.exists():
-        print(f"ERROR: {file_type.title()} file not found: {file_path}")
-        sys.exit(1)
+        raise InputError(f"{file_type.title()} file not found: {file_path}")
 
     suffix = path.suffix.lower()
-
-    if file_type == "image":
-        mime_types = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".webp": "image/webp",
-            ".gif": "image/gif",
-        }
-    else:  # audio
-        mime_types = {
-            ".mp3": "audio/mpeg",
-            ".wav": "audio/wav",
-            ".m4a": "audio/mp4",
-            ".ogg": "audio/ogg",
-            ".flac": "audio/flac",
-        }
-
+    mime_types = MIME_TYPES[file_type]
     mime_type = mime_types.get(suffix)
     if not mime_type:
-        print(f"ERROR: Unsupported {file_type} format: {suffix}")
-        print(f"Supported: {', '.join(mime_types.keys())}")
-        sys.exit(1)
+        raise InputError(f"Unsupported {file_type} format: {suffix}\nSupported: {', '.join(mime_types.keys())}")
 
-    with open(path, "rb") as f:
-        data = base64.b64encode(f.read()).decode("utf-8")
-
-    return f"data:{mime_type};base64,{data}"
+    return file_input(str(path), mime_type)
 
 
 def get_audio_duration(audio_path: str) -> float:
-    """Get audio duration in seconds (rough estimate from file size for mp3)."""
-    if audio_path.startswith(("http://", "https://")):
-        return 0  # Can't determine for URLs
+    """Get audio duration in seconds from its headers (0 if unknown)."""
+    return probe_duration(audio_path) or 0
 
-    path = Path(audio_path)
-    if not path.exists():
-        return 0
 
-    # Rough estimate: MP3 ~128kbps = 16KB/sec, WAV ~176KB/sec
-    size_bytes = path.stat().st_size
-    suffix = path.suffix.lower()
+def tts_cache_key(input_data: dict) -> str:
+    """Cache key for a TTS request: model plus inputs, with whitespace normalized."""
+    normalized = {**input_data, "text": " ".join(input_data["text"].split())}
+    return make_key(TTS_MODEL, normalized)
 
-    if suffix == ".mp3":
-        return size_bytes / 16000  # Rough estimate
-    elif suffix == ".wav":
-        return size_bytes / 176000  # Rough estimate
-    else:
-        return size_bytes / 20000  # Generic estimate
 
+async def fetch_tts(
+    text: str,
+    voice: str = "Deep_Voice_Man",
+    language: str = None,
+    cache: DiskCache = None,
+    on_progress: Callable[[str], None] = quiet,
+) -> str:
+    """Generate audio from text using TTS model (async).
+
+    Returns the audio URL, or the path of a cached file when `cache` already
+    holds audio for the same text, voice, language and settings. New audio is
+    downloaded into the cache for next time.
 
-def generate_tts(text: str, voice: str = "Deep_Voice_Man", language: str = None, retries: int = 3) -> str:
-    """Generate audio from text using TTS model."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    url = f"https://api.replicate.com/v1/models/{TTS_MODEL}/predictions"
+    Raises:
+        PredictionError if the TTS prediction cannot be created or fails
+    """
+    url = f"{API_BASE}/models/{TTS_MODEL}/predictions"
 
     input_data = {
         "text": text,
         "voice_id": voice,
-        "emotion": "calm",
-        "speed": 0.95,
+        "emotion": TTS_EMOTION,
+        "speed": TTS_SPEED,
     }
 
     if language:
         input_data["language_boost"] = language
 
-    for attempt in range(retries):
-        try:
-            payload = json.dumps({"input": input_data}).encode('utf-8')
-            req = urllib.request.Request(
-                url,
-                data=payload,
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json"
-                }
-            )
-            with urllib.request.urlopen(req) as response:
-                prediction = json.loads(response.read().decode('utf-8'))
-            break
-        except urllib.error.HTTPError as e:
-            if e.code == 429 and attempt < retries - 1:
-                wait = 30 * (attempt + 1)
-                print(f"  Rate limited, waiting {wait}s...")
-                time.sleep(wait)
-                continue
-            raise
+    cache_key = tts_cache_key(input_data) if cache else None
+    if cache_key:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached:
+            on_progress(f"  TTS: cached ({cached})")
+            return str(cached)
+
+    def create():
+        with span("create", model=TTS_MODEL):
+            return get_client().post_json(url, {"input": input_data, **webhook_fields()})
+
+    try:
+        prediction = await asyncio.to_thread(create)
+    except ClientError as e:
+        raise PredictionError(f"TTS request failed: {e}")
 
     pred_id = prediction["id"]
-    print(f"  TTS Prediction: {pred_id}")
+    on_progress(f"  TTS Prediction: {pred_id}")
 
     # Wait for TTS to complete
-    poll_url = f"https://api.replicate.com/v1/predictions/{pred_id}"
-    start = time.time()
-    while time.time() - start < 120:
-        req = urllib.request.Request(poll_url, headers={"Authorization": f"Bearer {token}"})
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
+    result = await watch_prediction(prediction, TTS_MODEL, timeout=120)
 
-        status = result.get("status")
-        if status == "succeeded":
-            return result["output"]
-        elif status in ["failed", "canceled"]:
-            raise Exception(f"TTS failed: {result.get('error')}")
-        time.sleep(2)
+    status = result.get("status")
+    if status == "succeeded":
+        audio_url = result["output"]
+        if cache_key:
+            partial = cache.directory / f".tmp-{cache_key}"
+            try:
+                await asyncio.to_thread(get_client().download, audio_url, str(partial), progress=False)
+                await asyncio.to_thread(cache.put_file, cache_key, str(partial))
+            except (ClientError, OSError) as e:
+                on_progress(f"Warning: Could not cache TTS audio: {e}")
+        return audio_url
+    elif status == "timeout":
+        raise PredictionError("TTS timed out", pred_id, status)
+    raise PredictionError(f"TTS failed: {result.get('error')}", pred_id, status)
 
-    raise Exception("TTS timed out")
 
+def generate_tts(text: str, voice: str = "Deep_Voice_Man", language: str = None, cache: DiskCache = None) -> str:
+    """Generate audio from text using TTS model (blocking; see fetch_tts)."""
+    return asyncio.run(fetch_tts(text, voice, language, cache, on_progress=print))
 
-def create_prediction(image_uri: str, audio_uri: str, prompt: str = None, seed: int = None, fast_mode: bool = False, retries: int = 3) -> dict:
-    """Create a prediction using direct HTTP API call with retry on rate limit."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    url = f"https://api.replicate.com/v1/models/{OMNI_HUMAN_MODEL}/predictions"
+
+def create_prediction(image_uri: str, audio_uri: str, prompt: str = None, seed: int = None, fast_mode: bool = False) -> dict:
+    """Create a prediction using the shared client (which retries rate limits).
+
+    Raises ClientError if the request fails.
+    """
+    url = f"{API_BASE}/models/{OMNI_HUMAN_MODEL}/predictions"
 
     input_data = {
         "image": image_uri,
@@ -185,88 +213,156 @@ def create_prediction(image_uri: str, audio_uri: str, prompt: str = None, seed:
     if fast_mode:
         input_data["fast_mode"] = True
 
-    payload = json.dumps({"input": input_data}).encode('utf-8')
-
-    for attempt in range(retries):
-        req = urllib.request.Request(
-            url,
-            data=payload,
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            }
-        )
-
-        try:
-            with urllib.request.urlopen(req, timeout=30) as response:
-                return json.loads(response.read().decode('utf-8'))
-        except urllib.error.HTTPError as e:
-            if e.code == 429 and attempt < retries - 1:
-                wait = 30 * (attempt + 1)
-                print(f"  Rate limited, waiting {wait}s...")
-                time.sleep(wait)
-                continue
-            error_body = e.read().decode('utf-8') if e.fp else str(e)
-            print(f"ERROR: API request failed: {e.code}")
-            print(f"Details: {error_body}")
-            sys.exit(1)
+    with span("create", model=OMNI_HUMAN_MODEL):
+        return get_client().post_json(url, {"input": input_data, **webhook_fields()})
 
 
-def wait_for_prediction(prediction_id: str, timeout: int = 600) -> dict:
-    """Wait for prediction to complete (up to 10 minutes for longer videos)."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    url = f"https://api.replicate.com/v1/predictions/{prediction_id}"
+def cancel_prediction(prediction: dict) -> dict:
+    """Ask Replicate to stop a prediction. Raises ClientError if the request fails."""
+    url = (prediction.get("urls") or {}).get("cancel") or f"{API_BASE}/predictions/{prediction['id']}/cancel"
+    return get_client().post_json(url, {})
 
-    start = time.time()
-    last_status = None
 
-    while time.time() - start < timeout:
-        req = urllib.request.Request(
-            url,
-            headers={"Authorization": f"Bearer {token}"}
-        )
+def job_result_key(
+    image: str,
+    audio: str = None,
+    tts_text: str = None,
+    tts_voice: str = None,
+    prompt: str = None,
+    seed: int = None,
+    fast_mode: bool = False,
+    split: bool = False,
+) -> str:
+    """Result store key for a lip-sync request.
 
+    Local files are keyed by content and TTS audio by its normalized text and
+    voice, so the key is known before any upload or TTS call.
+    """
+    if tts_text:
+        audio_key = {"model": TTS_MODEL, "text": " ".join(tts_text.split()), "voice": tts_voice}
+    else:
+        audio_key = input_digest(audio)
+    return result_key(OMNI_HUMAN_MODEL, {
+        "image": input_digest(image), "audio": audio_key,
+        "prompt": prompt, "seed": seed, "fast_mode": fast_mode, "split": split,
+    })
+
+
+def output_url_of(result: dict) -> str:
+    """Return the video URL from a finished prediction."""
+    url = result.get("output")
+    if isinstance(url, list):
+        url = url[0] if url else None
+    return url
+
+
+async def render_long_form(
+    image_uri: str,
+    audio_source: str,
+    duration: float,
+    output_path: str,
+    prompt: str = None,
+    seed: int = None,
+    fast_mode: bool = False,
+    on_progress: Callable[[str], None] = quiet,
+) -> List[str]:
+    """Split long audio at pauses, render all segments at once, then stitch them.
+
+    Every segment uses the same image and seed so the clips match, and the
+    clips are joined with a stream copy (no re-encode). Returns the segment
+    prediction IDs. If a segment fails, the ones still running are canceled
+    and PredictionError lists every segment's prediction ID and status.
+    """
+    try:
+        silences = await asyncio.to_thread(detect_silences, audio_source)
+    except MediaError as e:
+        raise InputError(f"Could not analyze audio: {e}")
+    segments = plan_segments(duration, silences, MAX_AUDIO_SECONDS - SEGMENT_HEADROOM)
+
+    if seed is None:
+        seed = random.randint(0, 2**31 - 1)
+    on_progress(f"\nSplitting audio into {len(segments)} segments at pauses (seed {seed} for all):")
+    for index, (start, end) in enumerate(segments, 1):
+        on_progress(f"  [{index}] {start:6.1f}s - {end:6.1f}s ({end - start:.1f}s)")
+
+    with tempfile.TemporaryDirectory(prefix="pfp-audio-") as work_dir:
         try:
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-        except urllib.error.HTTPError as e:
-            print(f"Warning: Status check failed: {e.code}")
-            time.sleep(5)
-            continue
-
-        status = result.get("status")
-
-        if status != last_status:
-            elapsed = time.time() - start
-            print(f"  Status: {status} ({elapsed:.0f}s)")
-            last_status = status
-
-        if status == "succeeded":
-            return result
-        elif status in ["failed", "canceled"]:
-            error = result.get("error", "Unknown error")
-            print(f"ERROR: Prediction {status}: {error}")
+            pieces = await asyncio.to_thread(split_audio, audio_source, segments, work_dir)
+        except MediaError as e:
+            raise InputError(f"Could not split audio: {e}")
+
+        predictions = {}  # segment number -> created prediction
+        stopping = False
+
+        async def cancel(index: int):
+            try:
+                await asyncio.to_thread(cancel_prediction, predictions[index])
+                on_progress(f"  [{index}] Canceled {predictions[index].get('id')}")
+            except ClientError as e:
+                on_progress(f"  [{index}] Could not cancel {predictions[index].get('id')}: {e}")
+
+        async def render_segment(index: int, piece: str) -> dict:
+            try:
+                audio_uri = await asyncio.to_thread(load_file_as_uri, piece, "audio")
+                prediction = await asyncio.to_thread(create_prediction, image_uri, audio_uri, prompt, seed, fast_mode)
+            except ClientError as e:
+                raise PredictionError(f"API request failed: {e}", status="not created")
+            predictions[index] = prediction
+            on_progress(f"  [{index}] Prediction ID: {prediction.get('id')}")
+            if stopping:
+                await cancel(index)
+            result = await watch_prediction(
+                prediction, OMNI_HUMAN_MODEL, PREDICTION_TIMEOUT,
+                on_status=lambda status, elapsed: on_progress(f"  [{index}] Status: {status} ({elapsed:.0f}s)"),
+            )
+            if result.get("status") != "succeeded" or not output_url_of(result):
+                raise PredictionError(
+                    result.get("error") or "No output URL in response", result.get("id"), result.get("status"),
+                )
             return result
 
-        time.sleep(5)
-
-    return {"status": "timeout", "error": f"Prediction timed out after {timeout}s"}
+        on_progress(f"\nStarting {len(pieces)} OmniHuman 1.5 generations in parallel...")
+        tasks = [asyncio.create_task(render_segment(i, piece)) for i, piece in enumerate(pieces, 1)]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        if any(task.done() and task.exception() for task in tasks):
+            # Without every segment the clips can't be joined; stop paying for the rest
+            stopping = True
+            running = [index for index, task in enumerate(tasks, 1) if not task.done() and index in predictions]
+            await asyncio.gather(*(cancel(index) for index in running))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        failed = sum(isinstance(result, BaseException) for result in results)
+        if failed:
+            lines = [f"{failed} of {len(results)} segments did not succeed; clips not joined:"]
+            for index, result in enumerate(results, 1):
+                if isinstance(result, BaseException):
+                    prediction_id = getattr(result, "prediction_id", None) or predictions.get(index, {}).get("id")
+                    status = getattr(result, "status", None) or "failed"
+                    detail = f": {result}" if status != "canceled" else ""
+                else:
+                    prediction_id, status, detail = result.get("id"), "succeeded", f", output {output_url_of(result)}"
+                lines.append(f"  Segment {index}: {status}" + (f" (prediction {prediction_id})" if prediction_id else "") + detail)
+            raise PredictionError("\n".join(lines))
+        urls = [output_url_of(result) for result in results]
+
+        on_progress(f"\nDownloading {len(urls)} clips...")
+        clips = [os.path.join(work_dir, f"clip_{i:03d}.mp4") for i in range(len(urls))]
+        downloads = await asyncio.gather(
+            *(asyncio.to_thread(get_client().download, url, clip, progress=False) for url, clip in zip(urls, clips)),
+            return_exceptions=True,
+        )
+        missing = [url for url, error in zip(urls, downloads) if isinstance(error, Exception)]
+        if missing:
+            raise OutputError("Failed to download clips:\n" + "\n".join(f"  {url}" for url in missing))
 
+        try:
+            await asyncio.to_thread(concat_videos, clips, output_path)
+        except MediaError as e:
+            raise OutputError(f"Could not join clips: {e}")
 
-def download_video(url: str, output_path: str) -> bool:
-    """Download video from URL to local file."""
-    try:
-        print(f"Downloading video...")
-        with urllib.request.urlopen(url) as response:
-            with open(output_path, 'wb') as f:
-                f.write(response.read())
-        return True
-    except Exception as e:
-        print(f"ERROR: Failed to download video: {e}")
-        return False
+    return [result.get("id") for result in results]
 
 
-def animate_audio(
+async def generate_audio(
     input_image: str,
     input_audio: str = None,
     output_path: str = None,
@@ -275,96 +371,398 @@ def animate_audio(
     fast_mode: bool = False,
     tts_text: str = None,
     tts_voice: str = "Deep_Voice_Man",
-) -> str:
-    """Generate lip-synced video using OmniHuman 1.5."""
+    split: bool = True,
+    use_cache: bool = True,
+    cache_dir: str = None,
+    cache_max_mb: float = TTS_CACHE_MB,
+    on_progress: Callable[[str], None] = quiet,
+) -> Generation:
+    """Generate lip-synced video using OmniHuman 1.5 (async).
+
+    Arguments are as for animate_audio(); `on_progress` receives progress
+    lines. Audio the model would truncate without splitting is reported in
+    the Generation's warnings.
+
+    Raises:
+        ConfigError, InputError, PredictionError or OutputError
+    """
 
     check_token()
+    start_time = time.time()
+
+    if not output_path:
+        raise InputError("An output path is required")
+    if not input_audio and not tts_text:
+        raise InputError("Either an audio file or TTS text is required")
+
+    # Ensure output path has .mp4 extension
+    if not output_path.lower().endswith(".mp4"):
+        output_path += ".mp4"
+
+    key = await asyncio.to_thread(
+        job_result_key, input_image, input_audio, tts_text, tts_voice, prompt, seed, fast_mode, split,
+    )
+    if await asyncio.to_thread(get_result_store().fetch, key, output_path):
+        on_progress(f"Reusing stored result for identical request: {output_path}")
+        return Generation(output_path, OMNI_HUMAN_MODEL, elapsed=time.time() - start_time, reused=True)
 
     # Load image
-    print(f"Loading image: {input_image}")
-    image_uri = load_file_as_uri(input_image, "image")
+    on_progress(f"Loading image: {input_image}")
+    image_uri = await asyncio.to_thread(load_file_as_uri, input_image, "image")
 
     # Get audio - either from file or TTS
     if tts_text:
-        print(f"\nGenerating TTS audio...")
-        print(f"  Text: \"{tts_text}\"")
-        print(f"  Voice: {tts_voice}")
-        audio_uri = generate_tts(tts_text, tts_voice)
-        print(f"  Audio URL: {audio_uri}")
-        est_duration = len(tts_text) / 15  # Rough estimate: 15 chars/sec
+        on_progress(f"\nGenerating TTS audio...")
+        on_progress(f"  Text: \"{tts_text}\"")
+        on_progress(f"  Voice: {tts_voice}")
+        cache = None
+        if use_cache:
+            cache = DiskCache(Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR / "tts", cache_max_mb, ".mp3")
+        input_audio = await fetch_tts(tts_text, tts_voice, cache=cache, on_progress=on_progress)
+        on_progress(f"  Audio: {input_audio}")
+        est_duration = await asyncio.to_thread(get_audio_duration, input_audio) or len(tts_text) / 15  # Fallback: ~15 chars/sec
     else:
-        # Load audio file
-        print(f"Loading audio: {input_audio}")
-        audio_uri = load_file_as_uri(input_audio, "audio")
+        on_progress(f"Loading audio: {input_audio}")
+        est_duration = await asyncio.to_thread(get_audio_duration, input_audio)
 
     # Estimate duration and cost
-    if not tts_text:
-        est_duration = get_audio_duration(input_audio)
-
     if est_duration > 0:
         est_cost = est_duration * 0.16
-        print(f"\nEstimated duration: ~{est_duration:.1f}s")
-        print(f"Estimated cost: ~${est_cost:.2f}")
-
-        if est_duration > 35:
-            print("WARNING: Audio exceeds 35 second limit. It will be truncated.")
+        on_progress(f"\nEstimated duration: ~{est_duration:.1f}s")
+        on_progress(f"Estimated cost: ~${est_cost:.2f}")
 
     if prompt:
-        print(f"Prompt: {prompt}")
+        on_progress(f"Prompt: {prompt}")
     if fast_mode:
-        print("Fast mode: enabled (faster but lower quality)")
+        on_progress("Fast mode: enabled (faster but lower quality)")
+
+    warnings = []
+    if est_duration > MAX_AUDIO_SECONDS:
+        if split and ffmpeg_available():
+            prediction_ids = await render_long_form(
+                image_uri, input_audio, est_duration, output_path, prompt, seed, fast_mode, on_progress,
+            )
+            await asyncio.to_thread(get_result_store().save, key, output_path)
+            return Generation(output_path, OMNI_HUMAN_MODEL, prediction_ids, time.time() - start_time)
+        reason = "ffmpeg not found" if split else "--no-split"
+        warnings.append(f"Audio exceeds {MAX_AUDIO_SECONDS} second limit. It will be truncated ({reason}).")
+        on_progress(f"WARNING: {warnings[-1]}")
+
+    audio_uri = await asyncio.to_thread(load_file_as_uri, input_audio, "audio")
 
     # Create prediction
-    print(f"\nStarting OmniHuman 1.5 generation...")
-    prediction = create_prediction(
-        image_uri=image_uri,
-        audio_uri=audio_uri,
-        prompt=prompt,
-        seed=seed,
-        fast_mode=fast_mode,
-    )
+    on_progress(f"\nStarting OmniHuman 1.5 generation...")
+    try:
+        prediction = await asyncio.to_thread(create_prediction, image_uri, audio_uri, prompt, seed, fast_mode)
+    except HTTPError as e:
+        raise PredictionError(f"API request failed: {e.code}\nDetails: {e.body}")
+    except ClientError as e:
+        raise PredictionError(f"API request failed: {e}")
 
     prediction_id = prediction.get("id")
     if not prediction_id:
-        print(f"ERROR: Failed to create prediction: {prediction}")
-        sys.exit(1)
+        raise PredictionError(f"Failed to create prediction: {prediction}")
 
-    print(f"Prediction ID: {prediction_id}")
+    on_progress(f"Prediction ID: {prediction_id}")
 
     # Check if already completed (sync mode)
     if prediction.get("status") == "succeeded" and prediction.get("output"):
         result = prediction
     else:
-        # Wait for completion
-        result = wait_for_prediction(prediction_id)
-
-    if result.get("status") != "succeeded":
-        error = result.get("error", "Unknown error")
-        print(f"ERROR: Generation failed: {error}")
-        sys.exit(1)
+        # Wait for completion (up to 10 minutes for longer videos)
+        result = await watch_prediction(
+            prediction, OMNI_HUMAN_MODEL, PREDICTION_TIMEOUT,
+            on_status=lambda status, elapsed: on_progress(f"  Status: {status} ({elapsed:.0f}s)"),
+        )
+    output_url = succeeded_output(result, output_url_of)
 
-    # Get output URL
-    output_url = result.get("output")
-    if isinstance(output_url, list):
-        output_url = output_url[0]
+    # Download video
+    on_progress(f"Downloading video...")
+    try:
+        await asyncio.to_thread(get_client().download, output_url, output_path, progress=False)
+    except ClientError as e:
+        raise OutputError(f"Failed to download video: {e}", output_url)
+    await asyncio.to_thread(get_result_store().save, key, output_path)
 
-    if not output_url:
-        print("ERROR: No output URL in response")
-        sys.exit(1)
+    return Generation(output_path, OMNI_HUMAN_MODEL, [prediction_id], time.time() - start_time, warnings=warnings)
 
-    # Ensure output path has .mp4 extension
-    if not output_path.lower().endswith(".mp4"):
-        output_path += ".mp4"
 
-    # Download video
-    if download_video(output_url, output_path):
-        file_size = Path(output_path).stat().st_size / (1024 * 1024)
-        print(f"\nSUCCESS: Video saved to {output_path}")
-        print(f"File size: {file_size:.1f} MB")
-        return output_path
+def animate_audio(
+    input_image: str,
+    input_audio: str = None,
+    output_path: str = None,
+    prompt: str = None,
+    seed: int = None,
+    fast_mode: bool = False,
+    tts_text: str = None,
+    tts_voice: str = "Deep_Voice_Man",
+    split: bool = True,
+    use_cache: bool = True,
+    cache_dir: str = None,
+    cache_max_mb: float = TTS_CACHE_MB,
+) -> str:
+    """Generate lip-synced video using OmniHuman 1.5.
+
+    With `split`, audio longer than the model's limit is rendered in
+    segments and stitched (see render_long_form). TTS audio is cached on
+    disk per (text, voice, settings) unless `use_cache` is False, and a
+    video already generated for the same request is reused from the result
+    store. Blocking wrapper over generate_audio() that prints progress.
+    """
+    generation = asyncio.run(generate_audio(
+        input_image, input_audio, output_path, prompt, seed, fast_mode, tts_text, tts_voice,
+        split, use_cache, cache_dir, cache_max_mb, on_progress=print,
+    ))
+    file_size = Path(generation.output_path).stat().st_size / (1024 * 1024)
+    print(f"\nSUCCESS: Video saved to {generation.output_path}")
+    print(f"File size: {file_size:.1f} MB")
+    return generation.output_path
+
+
+def load_manifest(manifest_path: str) -> list:
+    """Load batch jobs from a JSONL or CSV manifest.
+
+    Each job has an `image`, an `output` and either `audio` (path or URL) or
+    `text` for TTS, plus any of: voice, prompt, seed, fast. Missing fields
+    use the CLI defaults.
+    """
+    path = Path(manifest_path)
+    if not path.exists():
+        raise InputError(f"Manifest not found: {manifest_path}")
+
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            rows = [(reader.line_num, row) for row in reader]
+        else:
+            rows = []
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    raise InputError(f"Manifest line {line_num}: invalid JSON ({e})")
+                if not isinstance(row, dict):
+                    raise InputError(f"Manifest line {line_num}: expected a JSON object")
+                rows.append((line_num, row))
+
+    jobs = []
+    for line_num, row in rows:
+        job = {key: value for key, value in row.items() if key in MANIFEST_FIELDS and value not in (None, "")}
+        if "image" not in job or "output" not in job or ("audio" not in job) == ("text" not in job):
+            raise InputError(f"Manifest line {line_num} needs 'image', 'output' and one of 'audio' or 'text'")
+        for field in ("image", "audio", "text", "output", "voice", "prompt"):
+            if field in job and not isinstance(job[field], str):
+                raise InputError(f"Manifest line {line_num}: '{field}' must be a string")
+        for field, file_type in (("image", "image"), ("audio", "audio")):
+            value = job.get(field)
+            if not value or value.startswith(("http://", "https://")):
+                continue
+            if not Path(value).exists():
+                raise InputError(f"Manifest line {line_num}: {file_type} file not found: {value}")
+            if Path(value).suffix.lower() not in MIME_TYPES[file_type]:
+                raise InputError(f"Manifest line {line_num}: unsupported {file_type} format: {value}")
+        if job.get("voice") and job["voice"] not in TTS_VOICES:
+            raise InputError(f"Manifest line {line_num}: unknown voice {job['voice']}")
+        if "seed" in job:
+            try:
+                job["seed"] = int(job["seed"])
+            except (TypeError, ValueError) as e:
+                raise InputError(f"Manifest line {line_num}: {e}")
+        if "fast" in job:
+            job["fast"] = str(job["fast"]).lower() in ("1", "true", "yes")
+        if not job["output"].lower().endswith(".mp4"):
+            job["output"] += ".mp4"
+        jobs.append(job)
+    return jobs
+
+
+def run_batch(
+    jobs: list,
+    defaults: dict,
+    tts_workers: int = DEFAULT_TTS_WORKERS,
+    render_workers: int = DEFAULT_RENDER_WORKERS,
+    download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    cache: DiskCache = None,
+    results_path: str = None,
+    journal: Journal = None,
+    split: bool = True,
+) -> list:
+    """
+    Run many lip-sync jobs as a three-stage pipeline.
+
+    The audio stage uploads inputs and runs TTS, the render stage creates
+    and waits on OmniHuman predictions, and the download stage saves the
+    videos. Stages overlap across jobs (TTS for one job runs while another
+    renders), each has its own worker count, and a stage stops taking new
+    jobs while the next one is saturated.
+
+    With a `journal`, jobs already saved by an interrupted run are skipped,
+    and jobs with a recorded prediction skip the audio stage and reattach
+    to that prediction instead of creating a new one. Jobs matching a stored
+    result are copied from the result store and pass through the later
+    stages untouched.
+
+    With `split` (and ffmpeg), audio longer than the model's limit is
+    rendered in segments and stitched in the render stage, as in single
+    mode (see render_long_form); otherwise it is truncated with a warning.
+
+    Args:
+        jobs: Job dicts from load_manifest()
+        defaults: Values for fields a job leaves out (voice, prompt, seed, fast)
+        tts_workers: Jobs uploading inputs / generating speech at once
+        render_workers: OmniHuman predictions running at once
+        download_workers: Videos downloading at once
+        cache: Optional TTS audio cache
+        results_path: Optional JSONL file for the per-job result records
+        journal: Optional Journal for crash-safe resuming
+        split: Split long audio at pauses instead of truncating it
+
+    Returns:
+        List of per-job result records, in manifest order
+    """
+    check_token()
+    keys = [make_key(OMNI_HUMAN_MODEL, {**defaults, **job}) for job in jobs]
+    records = [
+        {"image": job["image"], "output": job["output"], "prediction_id": None,
+         "status": "pending", "error": None, "stage_seconds": {}}
+        for job in jobs
+    ]
+    state = [{} for _ in jobs]
+    start_time = time.time()
+    total = len(jobs)
+
+    def timed(name, func, workers):
+        def run(index):
+            started = time.time()
+            try:
+                return func(index)
+            finally:
+                records[index]["stage_seconds"][name] = round(time.time() - started, 1)
+        return Stage(name, run, workers)
+
+    def prepare_audio(index):
+        job = {**defaults, **jobs[index]}
+        records[index]["status"] = "audio"
+        state[index]["result_key"] = job_result_key(
+            job["image"], job.get("audio"), job.get("text"), job["voice"], job.get("prompt"), job.get("seed"), job.get("fast", False),
+            split,
+        )
+        state[index]["stored"] = get_result_store().fetch(state[index]["result_key"], job["output"])
+        if state[index]["stored"]:
+            print(f"  [{index + 1}/{total}] Reused stored result: {job['output']}")
+            return index
+        state[index]["resumed"] = journal.reattach(keys[index]) if journal else None
+        if state[index]["resumed"]:
+            return index  # the recorded prediction already has its inputs
+        state[index]["image_uri"] = load_file_as_uri(job["image"], "image")
+        audio = job.get("audio") or generate_tts(job["text"], job["voice"], cache=cache)
+        duration = get_audio_duration(audio)
+        if duration > MAX_AUDIO_SECONDS:
+            if split and ffmpeg_available():
+                state[index]["long_form"] = (audio, duration)
+                return index  # segments are uploaded by render_long_form
+            reason = "ffmpeg not found" if split else "--no-split"
+            records[index]["warning"] = f"Audio is {duration:.1f}s; only the first {MAX_AUDIO_SECONDS}s is rendered ({reason})"
+        state[index]["audio_uri"] = load_file_as_uri(audio, "audio")
+        return index
+
+    def render(index):
+        job = {**defaults, **jobs[index]}
+        if state[index]["stored"]:
+            return index
+        records[index]["status"] = "rendering"
+        if state[index].get("long_form"):
+            audio, duration = state[index]["long_form"]
+            print(f"  [{index + 1}/{total}] Splitting {duration:.1f}s of audio for {job['image']}")
+            prediction_ids = asyncio.run(render_long_form(
+                state[index]["image_uri"], audio, duration, jobs[index]["output"],
+                job.get("prompt"), job.get("seed"), job.get("fast", False),
+            ))
+            records[index]["prediction_id"] = prediction_ids[0]
+            records[index]["segment_prediction_ids"] = prediction_ids
+            return index
+        prediction = state[index]["resumed"]
+        if prediction:
+            print(f"  [{index + 1}/{total}] Resuming {job['image']} -> {prediction['id']}")
+        else:
+            prediction = create_prediction(
+                state[index]["image_uri"], state[index]["audio_uri"],
+                job.get("prompt"), job.get("seed"), job.get("fast", False),
+            )
+            if journal:
+                journal.record(keys[index], prediction_id=prediction.get("id"), status=prediction.get("status"))
+            print(f"  [{index + 1}/{total}] Submitted {job['image']} -> {prediction.get('id')}")
+        records[index]["prediction_id"] = prediction.get("id")
+        result = get_poller().wait(prediction, OMNI_HUMAN_MODEL, PREDICTION_TIMEOUT)
+        url = output_url_of(result) if result.get("status") == "succeeded" else None
+        if journal:
+            journal.record(keys[index], status=result.get("status"), output=url, error=result.get("error"))
+        if not url:
+            raise RuntimeError(result.get("error") or f"No usable output (status: {result.get('status')})")
+        state[index]["url"] = url
+        return index
+
+    def download(index):
+        if state[index].get("long_form"):
+            get_result_store().save(state[index]["result_key"], jobs[index]["output"])  # already stitched
+        elif not state[index]["stored"]:
+            records[index]["status"] = "downloading"
+            try:
+                get_client().download(state[index]["url"], jobs[index]["output"], progress=False)
+            except ClientError:
+                if journal and state[index]["resumed"]:
+                    # The recorded output URL has likely expired; resubmit on the next resume
+                    journal.record(keys[index], status=EXPIRED)
+                raise
+            get_result_store().save(state[index]["result_key"], jobs[index]["output"])
+        if journal:
+            journal.record(keys[index], saved=jobs[index]["output"])
+        records[index]["status"] = "succeeded"
+        records[index]["elapsed"] = round(time.time() - start_time, 1)
+        print(f"  [{index + 1}/{total}] Saved {jobs[index]['output']}")
+        return index
+
+    def failed(index, stage, error):
+        records[index].update(status="failed", error=f"{stage}: {error}")
+        records[index]["elapsed"] = round(time.time() - start_time, 1)
+        print(f"  [{index + 1}/{total}] Failed in {stage}: {error}")
+
+    stages = [
+        timed("audio", prepare_audio, tts_workers),
+        timed("render", render, render_workers),
+        timed("download", download, download_workers),
+    ]
+    pending = list(range(total))
+    if journal:
+        for index in range(total):
+            if journal.saved(keys[index]):
+                pending.remove(index)
+                records[index].update(status="succeeded", prediction_id=journal.get(keys[index]).get("prediction_id"))
+                print(f"  [{index + 1}/{total}] Already saved: {jobs[index]['output']}")
+
+    print(f"Batch: {total} jobs, workers audio={tts_workers} render={render_workers} download={download_workers}")
+    run_pipeline(pending, stages, on_error=failed)
+
+    elapsed = time.time() - start_time
+    succeeded = sum(1 for record in records if record["status"] == "succeeded")
+    print(f"Batch completed in {elapsed:.1f}s: {succeeded}/{total} succeeded")
+    if journal:
+        journal.close(remove=succeeded == total)
+        if succeeded < total:
+            print(f"Journal kept at {journal.path}; rerun with --resume to retry the rest")
+
+    if results_path:
+        with open(results_path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        print(f"Results written to {results_path}")
     else:
-        print(f"Video URL (download manually): {output_url}")
-        sys.exit(1)
+        for record in records:
+            print(json.dumps(record))
+
+    return records
 
 
 def main():
@@ -386,11 +784,20 @@ Available voices: {', '.join(TTS_VOICES)}
 Cost: ~$0.16 per second of output video (+ ~$0.001/sec for TTS)
       10 second video = ~$1.60
 
-Audio limit: 35 seconds max
+Audio limit: 35 seconds per clip. Longer audio is split at pauses, rendered
+in parallel with one seed and joined without re-encoding (requires ffmpeg).
+
+Batch mode:
+  %(prog)s --batch jobs.jsonl --render-workers 8 --results results.jsonl
+
+  Manifest is JSONL or CSV with fields: image, output, and either audio or
+  text (TTS), optionally voice, prompt, seed, fast. Omitted fields use the
+  values of the corresponding command-line options. TTS, rendering and
+  downloads run as overlapping stages with their own worker counts.
 """
     )
 
-    parser.add_argument("image", help="Input image path or URL")
+    parser.add_argument("image", nargs="?", help="Input image path or URL")
     parser.add_argument("audio", nargs="?", help="Input audio path or URL (MP3, WAV)")
     parser.add_argument("output", nargs="?", help="Output video path (.mp4)")
     parser.add_argument(
@@ -418,8 +825,89 @@ Audio limit: 35 seconds max
         action="store_true",
         help="Enable fast mode (faster but lower quality)"
     )
+    parser.add_argument(
+        "--no-split",
+        action="store_true",
+        help=f"Submit audio longer than {MAX_AUDIO_SECONDS}s as one clip (truncated) instead of splitting it"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the models instead of reusing cached TTS audio or stored videos"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"TTS audio cache directory (default: {DEFAULT_CACHE_DIR / 'tts'})"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=TTS_CACHE_MB,
+        help=f"TTS audio cache size cap in MB (default: {TTS_CACHE_MB})"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="MANIFEST",
+        help="Run every job in a JSONL or CSV manifest (see Batch mode)"
+    )
+    parser.add_argument(
+        "--tts-workers",
+        type=int,
+        default=DEFAULT_TTS_WORKERS,
+        help=f"Batch mode: jobs in the upload/TTS stage at once (default: {DEFAULT_TTS_WORKERS})"
+    )
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=DEFAULT_RENDER_WORKERS,
+        help=f"Batch mode: OmniHuman predictions running at once (default: {DEFAULT_RENDER_WORKERS})"
+    )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=DEFAULT_DOWNLOAD_WORKERS,
+        help=f"Batch mode: videos downloading at once (default: {DEFAULT_DOWNLOAD_WORKERS})"
+    )
+    parser.add_argument(
+        "--results",
+        metavar="PATH",
+        help="Batch mode: write per-job result records to this JSONL file"
+    )
+    add_journal_args(parser)
+    add_result_args(parser, no_cache=False)
+    add_webhook_args(parser)
+    add_report_args(parser)
 
     args = parser.parse_args()
+    configure_webhooks(args)
+    configure_results(args)
+    configure_report(args)
+
+    if args.batch:
+        cache = None
+        if not args.no_cache:
+            cache = DiskCache(Path(args.cache_dir) if args.cache_dir else DEFAULT_CACHE_DIR / "tts", args.cache_size, ".mp3")
+        defaults = {"voice": args.voice, "prompt": args.prompt, "seed": args.seed, "fast": args.fast}
+        journal = Journal(args.journal or args.batch + JOURNAL_SUFFIX, args.resume)
+        if args.resume and journal.entries:
+            print(f"Resuming from {journal.path} ({len(journal.entries)} recorded jobs)")
+        records = run_batch(
+            load_manifest(args.batch),
+            defaults,
+            tts_workers=args.tts_workers,
+            render_workers=args.render_workers,
+            download_workers=args.download_workers,
+            cache=cache,
+            results_path=args.results,
+            journal=journal,
+            split=not args.no_split,
+        )
+        sys.exit(0 if all(record["status"] == "succeeded" for record in records) else 1)
+
+    if not args.image:
+        parser.error("image is required unless --batch is given")
+    if args.resume:
+        parser.error("--resume applies to --batch runs")
 
     # Handle TTS mode vs audio file mode
     if args.tts:
@@ -434,6 +922,10 @@ Audio limit: 35 seconds max
             fast_mode=args.fast,
             tts_text=args.tts,
             tts_voice=args.voice,
+            split=not args.no_split,
+            use_cache=not args.no_cache,
+            cache_dir=args.cache_dir,
+            cache_max_mb=args.cache_size,
         )
     else:
         if not args.audio or not args.output:
@@ -445,8 +937,9 @@ Audio limit: 35 seconds max
             prompt=args.prompt,
             seed=args.seed,
             fast_mode=args.fast,
+            split=not args.no_split,
         )
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -12,25 +12,80 @@ Usage:
 """
 
 import argparse
-import base64
+import asyncio
 import io
 import os
+import struct
+import subprocess
 import sys
+import tempfile
 import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Tuple
 
 try:
-    from PIL import Image
-    import urllib.request
-    import urllib.error
+    from PIL import Image, ImageChops
 except ImportError:
+    if __name__ != "__main__":
+        raise ImportError("animate_keyframe requires Pillow. Run: pip install pillow")
     print("ERROR: Required packages not installed. Run: pip install pillow")
     sys.exit(1)
 
-# Expression-editor model version
+from core import (
+    Generation, InputError, OutputError, PredictionError, quiet, require_token, run_cli, watch_prediction,
+)
+from disk_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_MB, DiskCache, hash_bytes, hash_file, make_key
+from instrument import add_report_args, configure_report, span
+from journal import EXPIRED, JOURNAL_SUFFIX, Journal, add_journal_args
+from replicate_client import API_BASE, HTTPError, get_client
+from uploads import file_input
+from webhooks import add_webhook_args, configure_webhooks, webhook_fields
+
+# Expression-editor model and version
+EXPRESSION_EDITOR_MODEL = "fofr/expression-editor"
 EXPRESSION_EDITOR_VERSION = "bf913bc90e1c44ba288ba3942a538693b72e8cc7df576f3beebe56adc0a92b86"
 
+# Default scheduler settings. Accounts with <$5 credit are limited to
+# 6 requests/min with a burst of 1; raise --rate/--burst on funded accounts.
+DEFAULT_WORKERS = 4
+DEFAULT_RATE_PER_MIN = 6.0
+DEFAULT_BURST = 1
+
+# Default MP4 encoder settings
+DEFAULT_CODEC = "libx264"
+DEFAULT_CRF = 23
+DEFAULT_PRESET = "medium"
+
+# GIF encoder speed/size tradeoffs: palette sampling, quantizer and dithering.
+# Dithering looks smoother but adds frame-to-frame noise, so diffs get larger.
+GIF_QUALITY = {
+    "fast": {"sample": 4, "method": Image.Quantize.FASTOCTREE, "dither": Image.Dither.NONE},
+    "balanced": {"sample": 2, "method": Image.Quantize.MEDIANCUT, "dither": Image.Dither.NONE},
+    "best": {"sample": 1, "method": Image.Quantize.MEDIANCUT, "dither": Image.Dither.FLOYDSTEINBERG},
+}
+DEFAULT_GIF_QUALITY = "balanced"
+GIF_TRANSPARENT_INDEX = 255
+# GIF delays are whole hundredths of a second, and browsers treat delays
+# below 2 as 10, so GIFs play at most 50 fps
+GIF_MIN_DELAY = 2
+GIF_MAX_FPS = 100 // GIF_MIN_DELAY
+
+# Expression parameters sent with every prediction, with their defaults
+EXPRESSION_DEFAULTS = {
+    "rotate_pitch": 0,
+    "rotate_yaw": 0,
+    "rotate_roll": 0,
+    "blink": 0,
+    "eyebrow": 0,
+    "wink": 0,
+    "pupil_x": 0,
+    "pupil_y": 0,
+    "aaa": 0,
+    "eee": 0,
+    "woo": 0,
+    "smile": 0,
+}
+
 
 # Keyframe presets - each is a list of parameter dicts
 # Parameters: rotate_pitch, rotate_yaw, rotate_roll, blink, eyebrow, wink, pupil_x, pupil_y, aaa, eee, woo, smile
@@ -151,268 +206,681 @@ KEYFRAME_PRESETS = {
 
 
 def check_token():
-    """Verify REPLICATE_API_TOKEN is set."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    if not token:
-        print("ERROR: REPLICATE_API_TOKEN environment variable not set.")
-        sys.exit(1)
-    return token
+    """Verify REPLICATE_API_TOKEN is set (raises ConfigError)."""
+    return require_token()
 
 
 def load_image_as_uri(image_path: str) -> str:
-    """Load image and return as data URI."""
+    """Return an image URL for the payload, uploading local files once."""
     if image_path.startswith(("http://", "https://")):
         return image_path
 
     path = Path(image_path)
     if not path.exists():
-        print(f"ERROR: Image file not found: {image_path}")
-        sys.exit(1)
+        raise InputError(f"Image file not found: {image_path}")
 
     suffix = path.suffix.lower()
     mime_types = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp"}
     mime_type = mime_types.get(suffix, "image/png")
 
-    with open(path, "rb") as f:
-        data = base64.b64encode(f.read()).decode("utf-8")
-
-    return f"data:{mime_type};base64,{data}"
-
-
-def create_prediction(image_uri: str, params: Dict[str, Any]) -> dict:
-    """Create a prediction using direct HTTP API call."""
-    import json
+    return file_input(str(path), mime_type)
 
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    url = "https://api.replicate.com/v1/predictions"
 
-    input_data = {
-        "image": image_uri,
-        "output_format": "png",
-        "output_quality": 90,
-        "rotate_pitch": params.get("rotate_pitch", 0),
-        "rotate_yaw": params.get("rotate_yaw", 0),
-        "rotate_roll": params.get("rotate_roll", 0),
-        "blink": params.get("blink", 0),
-        "eyebrow": params.get("eyebrow", 0),
-        "wink": params.get("wink", 0),
-        "pupil_x": params.get("pupil_x", 0),
-        "pupil_y": params.get("pupil_y", 0),
-        "aaa": params.get("aaa", 0),
-        "eee": params.get("eee", 0),
-        "woo": params.get("woo", 0),
-        "smile": params.get("smile", 0),
-    }
-
-    payload = json.dumps({
-        "version": EXPRESSION_EDITOR_VERSION,
-        "input": input_data
-    }).encode('utf-8')
-
-    req = urllib.request.Request(
-        url,
-        data=payload,
-        headers={
-            "Authorization": f"Token {token}",
-            "Content-Type": "application/json"
-        }
-    )
+def image_digest(image_path: str) -> str:
+    """Content hash identifying an input image (URLs are hashed by address)."""
+    if image_path.startswith(("http://", "https://")):
+        return hash_bytes(image_path.encode("utf-8"))
+    return hash_file(image_path)
 
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read().decode('utf-8'))
 
+def normalize_params(params: Dict[str, Any]) -> Dict[str, float]:
+    """Fill in default expression parameters and coerce values to float."""
+    return {name: float(params.get(name, default)) for name, default in EXPRESSION_DEFAULTS.items()}
 
-def wait_for_prediction(prediction_id: str, timeout: int = 60) -> dict:
-    """Wait for prediction to complete."""
-    import json
 
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    url = f"https://api.replicate.com/v1/predictions/{prediction_id}"
+def dedupe_keyframes(keyframes: List[Dict[str, Any]]) -> Dict[tuple, List[int]]:
+    """Group keyframe positions by their normalized parameters.
 
-    start = time.time()
-    while time.time() - start < timeout:
-        req = urllib.request.Request(
-            url,
-            headers={"Authorization": f"Token {token}"}
-        )
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
+    Returns an insertion-ordered mapping of normalized parameter tuples to
+    the frame indices that use them, so each distinct frame is generated once.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for i, params in enumerate(keyframes):
+        groups.setdefault(tuple(normalize_params(params).items()), []).append(i)
+    return groups
 
-        if result["status"] in ["succeeded", "failed", "canceled"]:
-            return result
 
-        time.sleep(1)
+def frame_cache_key(digest: str, params: Dict[str, Any]) -> str:
+    """Cache key for one expression-editor output."""
+    return make_key(digest, normalize_params(params), EXPRESSION_EDITOR_VERSION)
 
-    return {"status": "timeout", "error": "Prediction timed out"}
 
+def create_prediction(
+    image_uri: str,
+    params: Dict[str, Any],
+    budget: Tuple[float, int] = None,
+    acquired: List[str] = None,
+) -> dict:
+    """Create a prediction using direct HTTP API call.
 
-def generate_frame(image_uri: str, params: Dict[str, Any], frame_num: int, total: int, retry_delay: float = 12.0) -> Image.Image:
-    """Generate a single frame using expression-editor with rate limit handling."""
+    `budget` is (rate_per_min, burst) for the model's request bucket;
+    `acquired` are governor buckets the caller has already taken.
+    """
+    input_data = {
+        "image": image_uri,
+        "output_format": "png",
+        "output_quality": 90,
+        **{name: params.get(name, default) for name, default in EXPRESSION_DEFAULTS.items()},
+    }
 
-    print(f"  Frame {frame_num}/{total}: {params}")
+    with span("create", model=EXPRESSION_EDITOR_MODEL):
+        return get_client().post_json(f"{API_BASE}/predictions", {
+            "version": EXPRESSION_EDITOR_VERSION,
+            "input": input_data,
+            **webhook_fields(),
+        }, model=EXPRESSION_EDITOR_MODEL, budget=budget, acquired=acquired)
+
+
+async def generate_frame(
+    image_uri: str,
+    params: Dict[str, Any],
+    frame_num: int,
+    total: int,
+    retry_delay: float = 12.0,
+    cache: DiskCache = None,
+    digest: str = None,
+    journal: Journal = None,
+    predictions: List[str] = None,
+    budget: Tuple[float, int] = None,
+    on_progress: Callable[[str], None] = quiet,
+) -> Image.Image:
+    """Generate a single frame using expression-editor (async).
+
+    HTTP-level rate limits are retried by the shared client; predictions that
+    fail with a throttling error are resubmitted after `retry_delay`.
+
+    When `cache` and the input image `digest` are given, a cached output for
+    the same image, parameters and model version is returned without any
+    API call.
+
+    With a `journal` (and `digest`), the prediction is recorded as it is
+    submitted and finishes; a prediction recorded by an interrupted run is
+    reattached instead of creating a new one. IDs of created predictions are
+    appended to `predictions`. Creates draw on the shared request budget,
+    with `budget` (rate_per_min, burst) as this call's limit for the model.
+    Returns None if the frame failed.
+    """
+
+    key = frame_cache_key(digest, params) if digest else None
+    cache_key = key if cache else None
+    if cache_key:
+        data = cache.get_bytes(cache_key)
+        if data:
+            on_progress(f"  Frame {frame_num}/{total}: {params} (cached)")
+            return Image.open(io.BytesIO(data))
+
+    resumed = journal.reattach(key) if journal and key else None
+    if resumed:
+        on_progress(f"  Frame {frame_num}/{total}: {params} (resuming {resumed['id']})")
+    else:
+        on_progress(f"  Frame {frame_num}/{total}: {params}")
 
     max_retries = 3
     for attempt in range(max_retries):
+        reattached = resumed is not None
         try:
-            # Create prediction
-            prediction = create_prediction(image_uri, params)
-            prediction_id = prediction["id"]
+            if resumed:
+                prediction, resumed = resumed, None
+            else:
+                # Create prediction (every attempt spends a token from the shared budget).
+                # The token is awaited here so no thread is held while throttled.
+                buckets = await get_client().governor().acquire_async(
+                    "POST", f"{API_BASE}/predictions", EXPRESSION_EDITOR_MODEL, budget,
+                )
+                prediction = await asyncio.to_thread(create_prediction, image_uri, params, budget, buckets)
+                if predictions is not None:
+                    predictions.append(prediction.get("id"))
+                if journal and key:
+                    journal.record(key, prediction_id=prediction.get("id"), status=prediction.get("status"))
 
             # Wait for completion
-            result = wait_for_prediction(prediction_id)
+            result = await watch_prediction(prediction, EXPRESSION_EDITOR_MODEL, 60)
 
             if result["status"] == "succeeded" and result.get("output"):
                 output_url = result["output"][0] if isinstance(result["output"], list) else result["output"]
-                with urllib.request.urlopen(output_url) as response:
-                    return Image.open(io.BytesIO(response.read()))
-            elif result.get("error"):
-                raise Exception(result["error"])
-            else:
-                raise Exception(f"Prediction failed with status: {result['status']}")
-
-        except urllib.error.HTTPError as e:
-            if e.code == 429:
-                if attempt < max_retries - 1:
-                    print(f"    Rate limited, waiting {retry_delay}s...")
-                    time.sleep(retry_delay)
+                if journal and key:
+                    journal.record(key, prediction_id=result.get("id"), status="succeeded", output=output_url)
+                try:
+                    data = await asyncio.to_thread(get_client().get_bytes, output_url)
+                except HTTPError:
+                    if not (reattached and "output" in prediction):
+                        raise
+                    # Output URLs expire; make the frame again
+                    on_progress(f"    Output of {prediction['id']} is no longer available, regenerating...")
+                    journal.record(key, status=EXPIRED)
                     continue
-            print(f"ERROR generating frame {frame_num}: HTTP {e.code}")
+                if cache_key:
+                    cache.put(cache_key, data)
+                return Image.open(io.BytesIO(data))
+
+            if journal and key:
+                journal.record(key, prediction_id=result.get("id"), status=result.get("status"), error=result.get("error"))
+            if result.get("error"):
+                raise PredictionError(result["error"], result.get("id"), result.get("status"))
+            else:
+                raise PredictionError(f"Prediction failed with status: {result['status']}", result.get("id"), result.get("status"))
+
+        except HTTPError as e:
+            # The shared client has already retried rate limits and server errors
+            if reattached and journal:
+                # The recorded prediction can no longer be read; resubmit on the next resume
+                journal.record(key, status=EXPIRED)
+            on_progress(f"ERROR generating frame {frame_num}: HTTP {e.code}")
             return None
         except Exception as e:
             error_str = str(e)
             if "429" in error_str or "throttled" in error_str.lower():
                 if attempt < max_retries - 1:
-                    print(f"    Rate limited, waiting {retry_delay}s...")
-                    time.sleep(retry_delay)
+                    on_progress(f"    Rate limited, waiting {retry_delay}s...")
+                    await asyncio.sleep(retry_delay)
                     continue
-            print(f"ERROR generating frame {frame_num}: {e}")
+            on_progress(f"ERROR generating frame {frame_num}: {e}")
             return None
 
     return None
 
 
-def create_gif(frames: List[Image.Image], output_path: str, fps: int = 10, loop: int = 0):
-    """Create animated GIF from frames."""
+def blend_between(a: Image.Image, b: Image.Image, steps: int) -> List[Image.Image]:
+    """Return `steps` locally blended in-between frames from `a` to `b`.
+
+    Uses Pillow's C-level alpha blend, so no extra predictions are made.
+    """
+    if b.mode != a.mode:
+        b = b.convert(a.mode)
+    if b.size != a.size:
+        b = b.resize(a.size, Image.LANCZOS)
+    return [Image.blend(a, b, step / (steps + 1)) for step in range(1, steps + 1)]
+
+
+def build_gif_palette(frames: List[Image.Image], quality: str = DEFAULT_GIF_QUALITY) -> Image.Image:
+    """Compute one palette shared by all frames.
+
+    All frames (downsampled for the faster settings) are tiled into a single
+    mosaic and quantized in one pass. Index 255 is left free for transparency.
+    """
+    settings = GIF_QUALITY[quality]
+    scale = settings["sample"]
+    width, height = frames[0].size
+    tile = (max(1, width // scale), max(1, height // scale))
+
+    mosaic = Image.new("RGB", (tile[0], tile[1] * len(frames)))
+    for i, frame in enumerate(frames):
+        if frame.size != tile:
+            frame = frame.resize(tile, Image.NEAREST)
+        mosaic.paste(frame, (0, i * tile[1]))
+
+    quantized = mosaic.quantize(colors=GIF_TRANSPARENT_INDEX, method=settings["method"], dither=Image.Dither.NONE)
+    palette = quantized.getpalette()[:GIF_TRANSPARENT_INDEX * 3]
+    # Pad unused entries with the first color so nothing maps to them by accident
+    palette += palette[:3] * (256 - len(palette) // 3)
+
+    palette_image = Image.new("P", (1, 1))
+    palette_image.putpalette(palette)
+    return palette_image
+
+
+def gif_image_data(frame: Image.Image) -> bytes:
+    """LZW-compress a palette frame, returning its GIF image data sub-blocks.
+
+    The frame is saved as a standalone single-frame GIF with Pillow and the
+    compressed data following its image descriptor is extracted.
+    """
+    buffer = io.BytesIO()
+    frame.save(buffer, format="GIF", optimize=False, interlace=False)
+    data = buffer.getvalue()
+
+    pos = 13  # header + logical screen descriptor
+    if data[10] & 0x80:
+        pos += 3 << ((data[10] & 0x07) + 1)
+    while data[pos] == 0x21:  # skip extensions
+        pos += 2
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    if data[pos] != 0x2C:
+        raise ValueError("Unexpected GIF block from encoder")
+    flags = data[pos + 9]
+    pos += 10
+    if flags & 0x80:
+        pos += 3 << ((flags & 0x07) + 1)
+
+    start = pos
+    pos += 1  # LZW minimum code size
+    while data[pos]:
+        pos += data[pos] + 1
+    return data[start:pos + 1]
+
+
+def gif_delays(count: int, fps: float) -> List[int]:
+    """Per-frame GIF delays in hundredths of a second for `count` frames at `fps`.
+
+    Each frame ends at its ideal time rounded to a hundredth, so rounding
+    errors don't accumulate (36 fps gives 3, 3, 2, 3, 3, 2, ...). Delays are
+    at least GIF_MIN_DELAY.
+    """
+    delays = []
+    elapsed = 0
+    for number in range(1, count + 1):
+        delay = max(GIF_MIN_DELAY, round(number * 100 / fps) - elapsed)
+        delays.append(delay)
+        elapsed += delay
+    return delays
+
+
+def create_gif(
+    frames: List[Image.Image],
+    output_path: str,
+    fps: int = 10,
+    loop: int = 0,
+    quality: str = DEFAULT_GIF_QUALITY,
+):
+    """Create animated GIF from frames.
+
+    All frames share one global palette. After the first frame only the
+    rectangle that changed is stored, with unchanged pixels inside it marked
+    transparent, and identical frames are merged into a longer delay.
+    Frame delays alternate between neighbouring whole hundredths so the
+    total duration matches `fps`; above GIF_MAX_FPS playback is slower.
+    """
     if not frames:
         print("ERROR: No frames to create GIF")
         return False
 
-    duration = int(1000 / fps)  # milliseconds per frame
+    settings = GIF_QUALITY[quality]
+    delays = gif_delays(len(frames), fps)
 
-    # Ensure all frames are in the same mode
-    processed_frames = []
+    rgb_frames = []
     for frame in frames:
-        if frame.mode != 'RGBA':
-            frame = frame.convert('RGBA')
-        processed_frames.append(frame)
-
-    # Save as GIF
-    processed_frames[0].save(
-        output_path,
-        save_all=True,
-        append_images=processed_frames[1:],
-        duration=duration,
-        loop=loop,
-        optimize=True
-    )
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        if frame.size != frames[0].size:
+            frame = frame.resize(frames[0].size, Image.LANCZOS)
+        rgb_frames.append(frame)
+
+    palette_image = build_gif_palette(rgb_frames, quality)
+    palette = palette_image.getpalette()
+    remap = list(range(256))
+    remap[GIF_TRANSPARENT_INDEX] = 0  # padded entry duplicates color 0
+
+    # Encode frames as (left, top, image, delay)
+    encoded = []
+    previous = None
+    for frame, delay in zip(rgb_frames, delays):
+        indices = frame.quantize(palette=palette_image, dither=settings["dither"])
+        indices = Image.frombytes("L", indices.size, indices.tobytes()).point(remap)
+
+        if previous is None:
+            box = (0, 0) + indices.size
+            region = indices
+        else:
+            diff = ImageChops.difference(indices, previous)
+            box = diff.getbbox()
+            if box is None:
+                encoded[-1][3] += delay
+                continue
+            region = indices.crop(box)
+            unchanged = diff.crop(box).point(lambda v: 255 if v == 0 else 0)
+            region.paste(GIF_TRANSPARENT_INDEX, mask=unchanged)
+        previous = indices
+
+        image = Image.frombytes("P", region.size, region.tobytes())
+        image.putpalette(palette)
+        encoded.append([box[0], box[1], image, delay])
+
+    width, height = rgb_frames[0].size
+    with open(output_path, "wb") as f:
+        f.write(b"GIF89a")
+        f.write(struct.pack("<HHBBB", width, height, 0xF7, 0, 0))
+        f.write(bytes(palette[:768]))
+        f.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00")
+        for left, top, image, frame_delay in encoded:
+            # Graphic control: disposal 1 (keep previous frame), transparent index set
+            f.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0x05, min(frame_delay, 0xFFFF), GIF_TRANSPARENT_INDEX, 0))
+            f.write(struct.pack("<BHHHHB", 0x2C, left, top, image.width, image.height, 0))
+            f.write(gif_image_data(image))
+        f.write(b"\x3B")
     return True
 
 
-def create_mp4(frames: List[Image.Image], output_path: str, fps: int = 10):
-    """Create MP4 from frames using ffmpeg if available."""
-    import subprocess
-    import tempfile
-
-    # Save frames to temp directory
-    with tempfile.TemporaryDirectory() as tmpdir:
-        for i, frame in enumerate(frames):
-            frame_path = os.path.join(tmpdir, f"frame_{i:04d}.png")
-            if frame.mode == 'RGBA':
-                frame = frame.convert('RGB')
-            frame.save(frame_path)
-
-        # Use ffmpeg to create MP4
+class FFmpegWriter:
+    """Encode frames by streaming raw RGB buffers into ffmpeg's stdin.
+
+    ffmpeg is started on the first frame, once the frame size is known, so
+    encoding can overlap with generation of later frames. Frames of a
+    different size are resized to match the first one.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        fps: int,
+        codec: str = DEFAULT_CODEC,
+        crf: int = DEFAULT_CRF,
+        preset: str = DEFAULT_PRESET,
+    ):
+        self.output_path = output_path
+        self.fps = fps
+        self.codec = codec
+        self.crf = crf
+        self.preset = preset
+        self.size = None
+        self.process = None
+        self.stderr = None
+        self.error = None
+
+    def _start(self, size):
+        self.size = size
         cmd = [
-            "ffmpeg", "-y",
-            "-framerate", str(fps),
-            "-i", os.path.join(tmpdir, "frame_%04d.png"),
-            "-c:v", "libx264",
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{size[0]}x{size[1]}",
+            "-framerate", str(self.fps),
+            "-i", "-",
+            "-c:v", self.codec,
             "-pix_fmt", "yuv420p",
-            "-crf", "23",
-            output_path
+            "-crf", str(self.crf),
+            "-preset", self.preset,
+            self.output_path,
         ]
+        # stderr goes to a temp file so a chatty ffmpeg can never block on a full pipe
+        self.stderr = tempfile.TemporaryFile()
+        try:
+            self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self.stderr)
+        except FileNotFoundError as e:
+            self.error = str(e)
+
+    def write(self, frame: Image.Image) -> bool:
+        """Send one frame to the encoder. Returns False once encoding has failed."""
+        if self.error:
+            return False
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        if self.size is None:
+            self._start(frame.size)
+            if self.error:
+                return False
+        elif frame.size != self.size:
+            frame = frame.resize(self.size, Image.LANCZOS)
 
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            print(f"Warning: ffmpeg failed, falling back to GIF: {e}")
+            self.process.stdin.write(frame.tobytes())
+        except (BrokenPipeError, OSError) as e:
+            self.error = f"ffmpeg stopped accepting frames: {e}"
             return False
+        return True
+
+    def close(self) -> bool:
+        """Finish encoding. Returns True if the output file was written."""
+        if self.process is None:
+            return False
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        if self.process.wait() != 0 and not self.error:
+            self.stderr.seek(0)
+            details = self.stderr.read().decode("utf-8", "replace").strip()
+            self.error = f"ffmpeg exited with code {self.process.returncode}: {details}"
+        self.stderr.close()
+        return not self.error
+
+    def abort(self):
+        """Stop ffmpeg and remove any partial output."""
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.stderr.close()
+            if os.path.exists(self.output_path):
+                os.unlink(self.output_path)
+        self.error = self.error or "aborted"
+
+
+def create_mp4(
+    frames: List[Image.Image],
+    output_path: str,
+    fps: int = 10,
+    codec: str = DEFAULT_CODEC,
+    crf: int = DEFAULT_CRF,
+    preset: str = DEFAULT_PRESET,
+):
+    """Create MP4 from frames by piping them to ffmpeg, if available."""
+    writer = FFmpegWriter(output_path, fps, codec, crf, preset)
+    for frame in frames:
+        if not writer.write(frame):
+            break
+    if writer.close():
+        return True
+    print(f"Warning: ffmpeg failed, falling back to GIF: {writer.error}")
+    return False
 
 
-def animate_keyframe(
+async def generate_keyframe(
     input_image: str,
     output_path: str,
     motion: str = "nod",
     output_format: str = "gif",
-) -> str:
-    """Generate animated GIF/MP4 using expression-editor keyframes."""
+    workers: int = DEFAULT_WORKERS,
+    rate_per_min: float = DEFAULT_RATE_PER_MIN,
+    burst: int = DEFAULT_BURST,
+    use_cache: bool = True,
+    cache_dir: str = None,
+    cache_max_mb: float = DEFAULT_MAX_MB,
+    interpolate: int = 0,
+    codec: str = DEFAULT_CODEC,
+    crf: int = DEFAULT_CRF,
+    encoder_preset: str = DEFAULT_PRESET,
+    gif_quality: str = DEFAULT_GIF_QUALITY,
+    resume: bool = False,
+    journal_path: str = None,
+    on_progress: Callable[[str], None] = quiet,
+) -> Generation:
+    """Generate animated GIF/MP4 using expression-editor keyframes (async).
+
+    Arguments are as for animate_keyframe(); `on_progress` receives progress
+    lines. Up to `workers` frames are in flight at once. The Generation's
+    output path ends in .gif if MP4 encoding fell back to GIF, and frames
+    that could not be generated are listed in its warnings.
+
+    Raises:
+        ConfigError, InputError, PredictionError (no frames) or OutputError
+    """
 
     check_token()
 
     if motion not in KEYFRAME_PRESETS:
-        print(f"ERROR: Unknown motion '{motion}'")
-        print(f"Available: {', '.join(KEYFRAME_PRESETS.keys())}")
-        sys.exit(1)
+        raise InputError(f"Unknown motion '{motion}'\nAvailable: {', '.join(KEYFRAME_PRESETS.keys())}")
+    if rate_per_min <= 0:
+        raise InputError("Rate limit must be positive")
 
     preset = KEYFRAME_PRESETS[motion]
     keyframes = preset["frames"]
     fps = preset["fps"]
 
-    print(f"Loading image: {input_image}")
-    image_uri = load_image_as_uri(input_image)
+    on_progress(f"Loading image: {input_image}")
+    image_uri = await asyncio.to_thread(load_image_as_uri, input_image)
 
-    print(f"Generating {len(keyframes)} frames for '{motion}' motion...")
-    print(f"Estimated cost: ${len(keyframes) * 0.002:.3f}")
+    cache = None
+    if use_cache:
+        cache = DiskCache(Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR / "frames", cache_max_mb, ".png")
+    digest = await asyncio.to_thread(image_digest, input_image)
 
-    start_time = time.time()
-    frames = []
+    journal = Journal(journal_path or output_path + JOURNAL_SUFFIX, resume)
+    if resume and journal.entries:
+        on_progress(f"Resuming from {journal.path} ({len(journal.entries)} recorded frames)")
 
-    for i, params in enumerate(keyframes):
-        frame = generate_frame(image_uri, params, i + 1, len(keyframes))
-        if frame:
-            frames.append(frame)
-        else:
-            print(f"Warning: Failed to generate frame {i + 1}")
+    groups = dedupe_keyframes(keyframes)
+
+    on_progress(f"Generating {len(keyframes)} frames for '{motion}' motion...")
+    if len(groups) < len(keyframes):
+        on_progress(f"Unique frames: {len(groups)} (duplicates reuse the same prediction)")
+    on_progress(f"Estimated cost: ${len(groups) * 0.002:.3f}")
 
-        # Add delay between frames to avoid rate limiting
-        if i < len(keyframes) - 1:
-            time.sleep(10)  # 10s delay = 6 requests/min safe
+    on_progress(f"Workers: {workers}, rate limit: {rate_per_min:g} req/min (burst {burst})")
+    # Limits this call's creates; the bucket is shared with every other
+    # process using this token (see governor.py)
+    budget = (rate_per_min, burst)
+
+    want_mp4 = output_format == "mp4" or output_path.lower().endswith(".mp4")
+    if interpolate > 0:
+        fps = fps * (interpolate + 1)
+        if not want_mp4 and fps > GIF_MAX_FPS:
+            on_progress(f"Warning: GIFs play at most {GIF_MAX_FPS} fps; {fps} fps will play slower (use MP4 output)")
+    writer = FFmpegWriter(output_path, fps, codec, crf, encoder_preset) if want_mp4 else None
+
+    start_time = time.time()
+    pending = object()
+    results = [pending] * len(keyframes)
+    frames = []          # successful keyframes, in order
+    output_frames = []   # keyframes plus interpolated frames, in order
+    warnings = []
+    predictions = []
+    next_index = 0
+    slots = asyncio.Semaphore(max(1, workers))
+
+    async def render(positions):
+        async with slots:
+            frame = await generate_frame(
+                image_uri, keyframes[positions[0]], positions[0] + 1, len(keyframes),
+                cache=cache, digest=digest, journal=journal, predictions=predictions, budget=budget,
+                on_progress=on_progress,
+            )
+        return positions, frame
+
+    async def emit(frame):
+        output_frames.append(frame)
+        if writer:
+            await asyncio.to_thread(writer.write, frame)
+
+    # Start the renders in keyframe order so the semaphore admits early frames
+    # first (as_completed would schedule bare coroutines in arbitrary order)
+    tasks = [asyncio.create_task(render(positions)) for positions in groups.values()]
+    try:
+        for done in asyncio.as_completed(tasks):
+            # Fan the shared result back out to every frame position
+            positions, frame = await done
+            for i in positions:
+                results[i] = frame
+
+            # Emit the completed prefix in keyframe order, dropping failed frames
+            while next_index < len(results) and results[next_index] is not pending:
+                frame = results[next_index]
+                if frame is None:
+                    warnings.append(f"Failed to generate frame {next_index + 1}")
+                    on_progress(f"Warning: {warnings[-1]}")
+                else:
+                    if frames and interpolate > 0:
+                        for tween in blend_between(frames[-1], frame, interpolate):
+                            await emit(tween)
+                    frames.append(frame)
+                    await emit(frame)
+                next_index += 1
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        if writer:
+            writer.abort()
+        raise
+
+    # Keep the journal while any frame is missing so --resume can finish the job
+    journal.close(remove=len(frames) == len(keyframes))
+    if len(frames) < len(keyframes):
+        on_progress(f"Journal kept at {journal.path}; rerun with --resume to retry missing frames")
 
     elapsed = time.time() - start_time
-    print(f"Generated {len(frames)} frames in {elapsed:.1f}s")
+    on_progress(f"Generated {len(frames)} frames in {elapsed:.1f}s")
+    if cache:
+        stats = cache.stats()
+        on_progress(f"Frame cache: {stats['hits']} hits, {stats['misses']} misses")
 
     if not frames:
-        print("ERROR: No frames generated")
-        sys.exit(1)
+        if writer:
+            writer.abort()
+        raise PredictionError("No frames generated")
+
+    if interpolate > 0:
+        on_progress(f"Interpolated to {len(output_frames)} frames at {fps} fps")
 
     # Determine output format
-    if output_format == "mp4" or output_path.lower().endswith(".mp4"):
-        if create_mp4(frames, output_path, fps):
-            print(f"SUCCESS: MP4 saved to {output_path}")
-            return output_path
-        else:
+    if writer:
+        with span("encode", format="mp4"):
+            encoded = await asyncio.to_thread(writer.close)
+        if not encoded:
             # Fallback to GIF
-            gif_path = output_path.rsplit(".", 1)[0] + ".gif"
-            create_gif(frames, gif_path, fps)
-            print(f"SUCCESS: GIF saved to {gif_path} (ffmpeg not available for MP4)")
-            return gif_path
+            warnings.append(f"ffmpeg failed, falling back to GIF: {writer.error}")
+            on_progress(f"Warning: {warnings[-1]}")
+            output_path = output_path.rsplit(".", 1)[0] + ".gif"
+    elif not output_path.lower().endswith(".gif"):
+        output_path += ".gif"
+    if not writer or not encoded:
+        with span("encode", format="gif"):
+            if not await asyncio.to_thread(create_gif, output_frames, output_path, fps, quality=gif_quality):
+                raise OutputError(f"Could not write GIF to {output_path}")
+
+    return Generation(
+        output_path, EXPRESSION_EDITOR_MODEL, predictions, time.time() - start_time, warnings=warnings,
+    )
+
+
+def animate_keyframe(
+    input_image: str,
+    output_path: str,
+    motion: str = "nod",
+    output_format: str = "gif",
+    workers: int = DEFAULT_WORKERS,
+    rate_per_min: float = DEFAULT_RATE_PER_MIN,
+    burst: int = DEFAULT_BURST,
+    use_cache: bool = True,
+    cache_dir: str = None,
+    cache_max_mb: float = DEFAULT_MAX_MB,
+    interpolate: int = 0,
+    codec: str = DEFAULT_CODEC,
+    crf: int = DEFAULT_CRF,
+    encoder_preset: str = DEFAULT_PRESET,
+    gif_quality: str = DEFAULT_GIF_QUALITY,
+    resume: bool = False,
+    journal_path: str = None,
+) -> str:
+    """Generate animated GIF/MP4 using expression-editor keyframes.
+
+    Up to `workers` frames are generated concurrently, with prediction
+    requests paced by the shared governor's budget for the model
+    (`rate_per_min`, `burst`), which other processes on the host also draw on.
+    Frames are reassembled in keyframe order before encoding. Outputs are
+    cached on disk per (image, params, model version) unless `use_cache`
+    is False. With `interpolate` > 0, that many blended frames are
+    synthesized locally between each keyframe pair and the fps is raised
+    to match, so the motion keeps its duration. MP4 output is streamed to
+    ffmpeg as soon as each leading run of frames is complete.
+
+    Predictions are journaled to `journal_path` (default: output path +
+    .journal.jsonl); with `resume`, frames finished or still running in an
+    interrupted run are reused instead of being generated again.
+
+    Blocking wrapper over generate_keyframe() that prints progress.
+    """
+    generation = asyncio.run(generate_keyframe(
+        input_image, output_path, motion, output_format, workers, rate_per_min, burst,
+        use_cache, cache_dir, cache_max_mb, interpolate, codec, crf, encoder_preset, gif_quality,
+        resume, journal_path, on_progress=print,
+    ))
+    if generation.output_path.lower().endswith(".mp4"):
+        print(f"SUCCESS: MP4 saved to {generation.output_path}")
+    elif output_path.lower().endswith(".mp4"):
+        print(f"SUCCESS: GIF saved to {generation.output_path} (ffmpeg not available for MP4)")
     else:
-        if not output_path.lower().endswith(".gif"):
-            output_path += ".gif"
-        create_gif(frames, output_path, fps)
-        print(f"SUCCESS: GIF saved to {output_path}")
-        return output_path
+        print(f"SUCCESS: GIF saved to {generation.output_path}")
+    return generation.output_path
 
 
 def main():
@@ -427,6 +895,8 @@ Examples:
   %(prog)s photo.png output.gif --motion nod
   %(prog)s photo.png output.gif --motion wink
   %(prog)s photo.png output.mp4 --motion nod_wink
+  %(prog)s photo.png output.gif --motion nod --rate 60 --burst 10
+  %(prog)s photo.png output.gif --motion nod --interpolate 2   # 36 fps, same API cost
 """
     )
 
@@ -438,11 +908,76 @@ Examples:
         choices=list(KEYFRAME_PRESETS.keys()),
         help="Motion preset (default: nod)"
     )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Frames generated concurrently (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE_PER_MIN,
+        help=f"Max prediction requests per minute (default: {DEFAULT_RATE_PER_MIN:g})"
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=DEFAULT_BURST,
+        help=f"Requests allowed back-to-back before rate limiting (default: {DEFAULT_BURST})"
+    )
+    parser.add_argument(
+        "--interpolate", "-i",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Blend N local in-between frames per keyframe pair and raise fps to match (default: 0)"
+    )
+    parser.add_argument(
+        "--gif-quality",
+        default=DEFAULT_GIF_QUALITY,
+        choices=list(GIF_QUALITY.keys()),
+        help=f"GIF encoding speed/size tradeoff (default: {DEFAULT_GIF_QUALITY})"
+    )
+    parser.add_argument(
+        "--codec",
+        default=DEFAULT_CODEC,
+        help=f"ffmpeg video codec for MP4 output (default: {DEFAULT_CODEC})"
+    )
+    parser.add_argument(
+        "--crf",
+        type=int,
+        default=DEFAULT_CRF,
+        help=f"Constant rate factor for MP4 output, lower = better (default: {DEFAULT_CRF})"
+    )
+    parser.add_argument(
+        "--encoder-preset",
+        default=DEFAULT_PRESET,
+        help=f"ffmpeg encoder preset for MP4 output (default: {DEFAULT_PRESET})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API instead of reusing cached frames"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"Frame cache directory (default: {DEFAULT_CACHE_DIR / 'frames'})"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help=f"Frame cache size cap in MB (default: {DEFAULT_MAX_MB})"
+    )
     parser.add_argument(
         "--list-presets",
         action="store_true",
         help="List all available motion presets"
     )
+    add_journal_args(parser)
+    add_webhook_args(parser)
+    add_report_args(parser)
 
     args = parser.parse_args()
 
@@ -455,12 +990,28 @@ Examples:
             print()
         sys.exit(0)
 
+    configure_webhooks(args)
+    configure_report(args)
+
     animate_keyframe(
         input_image=args.input,
         output_path=args.output,
         motion=args.motion,
+        workers=args.workers,
+        rate_per_min=args.rate,
+        burst=args.burst,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        cache_max_mb=args.cache_size,
+        interpolate=max(0, args.interpolate),
+        codec=args.codec,
+        crf=args.crf,
+        encoder_preset=args.encoder_preset,
+        gif_quality=args.gif_quality,
+        resume=args.resume,
+        journal_path=args.journal,
     )
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -10,17 +10,31 @@ Examples:
     python animate_pfp.py photo.png video.mp4 --motion wave
     python animate_pfp.py photo.png video.mp4 --prompt "slowly nodding"
     python animate_pfp.py photo.png video.mp4 --aspect 9:16 --guidance 0.7
+    python animate_pfp.py --batch jobs.jsonl --max-in-flight 8
 """
 
 import argparse
-import base64
+import asyncio
+import csv
 import json
-import os
 import sys
 import time
-import urllib.request
-import urllib.error
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Callable
+
+from core import (
+    Generation, InputError, OutputError, PredictionError, quiet, require_token, run_cli, succeeded_output,
+    watch_prediction,
+)
+from disk_cache import make_key
+from instrument import add_report_args, configure_report, span
+from journal import EXPIRED, JOURNAL_SUFFIX, Journal, add_journal_args
+from poller import get_poller
+from replicate_client import API_BASE, ClientError, HTTPError, get_client
+from result_store import add_result_args, configure_results, get_result_store, input_digest, result_key
+from uploads import file_input
+from webhooks import add_webhook_args, configure_webhooks, webhook_fields
 
 
 # Load presets from JSON file
@@ -55,20 +69,23 @@ def load_presets():
 
 PRESETS = load_presets()
 
+# Kling v2.5 Turbo Pro endpoint
+MODEL = "kwaivgi/kling-v2.5-turbo-pro"
+PREDICTIONS_URL = f"{API_BASE}/models/{MODEL}/predictions"
+
+# Batch mode defaults
+DEFAULT_MAX_IN_FLIGHT = 4
+PREDICTION_TIMEOUT = 600
+MANIFEST_FIELDS = ["input", "output", "motion", "prompt", "negative", "duration", "aspect", "guidance"]
+
 
 def check_token():
-    """Verify REPLICATE_API_TOKEN is set."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    if not token:
-        print("ERROR: REPLICATE_API_TOKEN environment variable not set.")
-        print("Get your token from: https://replicate.com/account/api-tokens")
-        print("Then run: export REPLICATE_API_TOKEN='r8_your_token_here'")
-        sys.exit(1)
-    return token
+    """Verify REPLICATE_API_TOKEN is set (raises ConfigError)."""
+    return require_token()
 
 
 def load_image(image_path: str) -> str:
-    """Load image and return as data URI or URL."""
+    """Return an image URL for the payload, uploading local files once."""
     # If it's already a URL, return as-is
     if image_path.startswith(("http://", "https://")):
         return image_path
@@ -76,8 +93,7 @@ def load_image(image_path: str) -> str:
     # Load local file
     path = Path(image_path)
     if not path.exists():
-        print(f"ERROR: Image file not found: {image_path}")
-        sys.exit(1)
+        raise InputError(f"Image file not found: {image_path}")
 
     # Determine MIME type
     suffix = path.suffix.lower()
@@ -90,24 +106,157 @@ def load_image(image_path: str) -> str:
     }
     mime_type = mime_types.get(suffix, "image/png")
 
-    # Read and encode
-    with open(path, "rb") as f:
-        data = base64.b64encode(f.read()).decode("utf-8")
-
-    return f"data:{mime_type};base64,{data}"
+    return file_input(str(path), mime_type)
 
 
 def download_video(url: str, output_path: str) -> bool:
     """Download video from URL to local file."""
     try:
         print(f"Downloading video to {output_path}...")
-        urllib.request.urlretrieve(url, output_path)
+        get_client().download(url, output_path)
         return True
     except Exception as e:
         print(f"ERROR: Failed to download video: {e}")
         return False
 
 
+def resolve_prompt(motion: str, prompt: str = None, negative_prompt: str = None, fallback: bool = False) -> tuple:
+    """Return (prompt, negative_prompt) from a custom prompt or motion preset.
+
+    An unknown motion raises InputError, or with `fallback` (batch manifests)
+    warns and uses the 'nod' preset.
+    """
+    if prompt:
+        return prompt, negative_prompt or ""
+    if motion in PRESETS:
+        preset = PRESETS[motion]
+    elif fallback:
+        print(f"WARNING: Unknown motion '{motion}', using 'nod' preset")
+        preset = PRESETS["nod"]
+    else:
+        raise InputError(f"Unknown motion '{motion}'\nAvailable: {', '.join(PRESETS.keys())}")
+    return preset["prompt"], negative_prompt or preset.get("negative", "")
+
+
+def build_input(
+    image_data: str,
+    final_prompt: str,
+    final_negative: str,
+    duration: int = 5,
+    aspect_ratio: str = "1:1",
+    guidance_scale: float = 0.5,
+) -> dict:
+    """Build the Kling v2.5 Turbo Pro input payload."""
+    input_params = {
+        "prompt": final_prompt,
+        "start_image": image_data,
+        "duration": duration,
+        "aspect_ratio": aspect_ratio,
+        "guidance_scale": guidance_scale,
+    }
+    if final_negative:
+        input_params["negative_prompt"] = final_negative
+    return input_params
+
+
+def job_result_key(input_image: str, final_prompt: str, final_negative: str, duration: int, aspect_ratio: str, guidance_scale: float) -> str:
+    """Result store key for a Kling request, with a local image keyed by content."""
+    return result_key(MODEL, build_input(
+        input_digest(input_image), final_prompt, final_negative, duration, aspect_ratio, guidance_scale,
+    ))
+
+
+def create_prediction(input_params: dict) -> dict:
+    """Create a Kling prediction."""
+    with span("create", model=MODEL):
+        return get_client().post_json(PREDICTIONS_URL, {"input": input_params, **webhook_fields()})
+
+
+def output_url(result: dict):
+    """Return the video URL from a finished prediction, or None."""
+    output = result.get("output")
+    if not output:
+        return None
+    # Handle output - could be URL string or list
+    video_url = output[0] if isinstance(output, list) else output
+    if isinstance(video_url, str) and video_url.startswith(('http://', 'https://')):
+        return video_url
+    return None
+
+
+async def generate_kling(
+    input_image: str,
+    output_path: str,
+    motion: str = "nod",
+    prompt: str = None,
+    duration: int = 5,
+    negative_prompt: str = None,
+    aspect_ratio: str = "1:1",
+    guidance_scale: float = 0.5,
+    on_progress: Callable[[str], None] = quiet,
+) -> Generation:
+    """
+    Generate animated video from image using Kling v2.5 Turbo Pro (async).
+
+    Arguments are as for animate(); `on_progress` receives progress lines.
+    A video already generated for the same image and settings is copied from
+    the result store instead of creating a prediction.
+
+    Returns:
+        Generation for the saved video
+
+    Raises:
+        ConfigError, InputError, PredictionError or OutputError
+    """
+    check_token()
+    start_time = time.time()
+
+    # Determine prompt and negative prompt
+    final_prompt, final_negative = resolve_prompt(motion, prompt, negative_prompt)
+
+    key = await asyncio.to_thread(
+        job_result_key, input_image, final_prompt, final_negative, duration, aspect_ratio, guidance_scale,
+    )
+    if await asyncio.to_thread(get_result_store().fetch, key, output_path):
+        on_progress(f"Reusing stored result for identical request: {output_path}")
+        return Generation(output_path, MODEL, elapsed=time.time() - start_time, reused=True)
+
+    # Load image
+    on_progress(f"Loading image: {input_image}")
+    image_data = await asyncio.to_thread(load_image, input_image)
+
+    # Prepare API parameters for Kling v2.5 Turbo Pro
+    input_params = build_input(image_data, final_prompt, final_negative, duration, aspect_ratio, guidance_scale)
+
+    on_progress(f"Generating {duration}s video with '{motion}' motion...")
+    on_progress(f"Prompt: {final_prompt[:80]}...")
+    on_progress(f"Aspect ratio: {aspect_ratio}, Guidance: {guidance_scale}")
+    on_progress("This may take 30-120 seconds...")
+
+    # Create the prediction, then wait on the shared poller without holding a thread
+    try:
+        prediction = await asyncio.to_thread(create_prediction, input_params)
+    except HTTPError as e:
+        raise PredictionError(f"Replicate API error ({e.code}): {e.body}")
+    except ClientError as e:
+        raise PredictionError(f"Network error: {e}")
+    result = await watch_prediction(
+        prediction, MODEL, PREDICTION_TIMEOUT,
+        on_status=lambda status, elapsed: on_progress(f"  Status: {status}..."),
+    )
+    on_progress(f"Generation completed in {time.time() - start_time:.1f}s")
+
+    video_url = succeeded_output(result, output_url)
+    on_progress(f"Downloading video to {output_path}...")
+    try:
+        await asyncio.to_thread(get_client().download, video_url, output_path, progress=False)
+    except ClientError as e:
+        raise OutputError(f"Failed to download video: {e}", video_url)
+    await asyncio.to_thread(get_result_store().save, key, output_path)
+
+    return Generation(output_path, MODEL, [prediction.get("id")], time.time() - start_time)
+
+
 def animate(
     input_image: str,
     output_path: str,
@@ -121,6 +270,8 @@ def animate(
     """
     Generate animated video from image using Kling v2.5 Turbo Pro.
 
+    Blocking wrapper over generate_kling() that prints progress.
+
     Args:
         input_image: Path to input image or URL
         output_path: Path for output video file
@@ -134,113 +285,223 @@ def animate(
     Returns:
         Path to generated video file
     """
-    check_token()
+    generation = asyncio.run(generate_kling(
+        input_image, output_path, motion, prompt, duration, negative_prompt, aspect_ratio, guidance_scale,
+        on_progress=print,
+    ))
+    print(f"SUCCESS: Video saved to {generation.output_path}")
+    return generation.output_path
 
-    # Determine prompt and negative prompt
-    if prompt:
-        final_prompt = prompt
-        final_negative = negative_prompt or ""
-    elif motion in PRESETS:
-        preset = PRESETS[motion]
-        final_prompt = preset["prompt"]
-        final_negative = negative_prompt or preset.get("negative", "")
-    else:
-        print(f"WARNING: Unknown motion '{motion}', using 'nod' preset")
-        preset = PRESETS["nod"]
-        final_prompt = preset["prompt"]
-        final_negative = negative_prompt or preset.get("negative", "")
 
-    # Load image
-    print(f"Loading image: {input_image}")
-    image_data = load_image(input_image)
+def load_manifest(manifest_path: str) -> list:
+    """Load batch jobs from a JSONL or CSV manifest.
 
-    # Prepare API parameters for Kling v2.5 Turbo Pro
-    model = "kwaivgi/kling-v2.5-turbo-pro"
-    input_params = {
-        "prompt": final_prompt,
-        "start_image": image_data,
-        "duration": duration,
-        "aspect_ratio": aspect_ratio,
-        "guidance_scale": guidance_scale,
-    }
-
-    if final_negative:
-        input_params["negative_prompt"] = final_negative
-
-    # Run prediction using direct HTTP API
-    print(f"Generating {duration}s video with '{motion}' motion...")
-    print(f"Prompt: {final_prompt[:80]}...")
-    print(f"Aspect ratio: {aspect_ratio}, Guidance: {guidance_scale}")
-    print("This may take 30-120 seconds...")
-
-    start_time = time.time()
+    Each job has an `input` and `output` plus any of: motion, prompt,
+    negative, duration, aspect, guidance. Missing fields use the CLI defaults.
+    """
+    path = Path(manifest_path)
+    if not path.exists():
+        raise InputError(f"Manifest not found: {manifest_path}")
 
-    # Create prediction via Replicate API
-    token = check_token()
-    url = "https://api.replicate.com/v1/models/kwaivgi/kling-v2.5-turbo-pro/predictions"
-
-    payload = json.dumps({"input": input_params}).encode('utf-8')
-    req = urllib.request.Request(
-        url,
-        data=payload,
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Prefer": "wait"  # Wait for completion
-        },
-        method="POST"
-    )
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            rows = [(reader.line_num, row) for row in reader]
+        else:
+            rows = []
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    raise InputError(f"Manifest line {line_num}: invalid JSON ({e})")
+                if not isinstance(row, dict):
+                    raise InputError(f"Manifest line {line_num}: expected a JSON object")
+                rows.append((line_num, row))
+
+    jobs = []
+    for line_num, row in rows:
+        job = {key: value for key, value in row.items() if key in MANIFEST_FIELDS and value not in (None, "")}
+        if "input" not in job or "output" not in job:
+            raise InputError(f"Manifest line {line_num} needs 'input' and 'output'")
+        try:
+            if "duration" in job:
+                job["duration"] = int(job["duration"])
+            if "guidance" in job:
+                job["guidance"] = max(0.0, min(1.0, float(job["guidance"])))
+        except (TypeError, ValueError) as e:
+            raise InputError(f"Manifest line {line_num}: {e}")
+        if not job["output"].lower().endswith(".mp4"):
+            job["output"] += ".mp4"
+        jobs.append(job)
+    return jobs
+
+
+def run_batch(
+    jobs: list,
+    defaults: dict,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    results_path: str = None,
+    journal: Journal = None,
+) -> list:
+    """
+    Run many Kling generations in one process.
 
-    try:
-        with urllib.request.urlopen(req, timeout=300) as response:
-            result = json.loads(response.read().decode('utf-8'))
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8') if e.fp else str(e)
-        print(f"ERROR: Replicate API error ({e.code}): {error_body}")
-        sys.exit(1)
-    except urllib.error.URLError as e:
-        print(f"ERROR: Network error: {e}")
-        sys.exit(1)
-
-    # Poll for completion if not using wait preference
-    while result.get("status") in ["starting", "processing"]:
-        time.sleep(2)
-        poll_url = result.get("urls", {}).get("get", f"https://api.replicate.com/v1/predictions/{result['id']}")
-        poll_req = urllib.request.Request(
-            poll_url,
-            headers={"Authorization": f"Bearer {token}"},
-            method="GET"
-        )
-        with urllib.request.urlopen(poll_req) as response:
-            result = json.loads(response.read().decode('utf-8'))
-        print(f"  Status: {result.get('status')}...")
+    Up to `max_in_flight` predictions are submitted at once. All in-flight
+    predictions are tracked by the shared poller's single loop, and each
+    finished video is downloaded in the background while the rest keep
+    running.
 
-    elapsed = time.time() - start_time
-    print(f"Generation completed in {elapsed:.1f}s")
+    With a `journal`, each job's prediction ID, result and saved file are
+    recorded as they happen. Jobs the journal shows as saved are skipped,
+    and jobs with a recorded prediction are reattached to it instead of
+    being submitted again. Jobs matching a stored result are copied from the
+    result store without a prediction.
 
-    if result.get("status") == "failed":
-        print(f"ERROR: Generation failed: {result.get('error', 'Unknown error')}")
-        sys.exit(1)
+    Args:
+        jobs: Job dicts from load_manifest()
+        defaults: Values for fields a job leaves out (motion, duration, ...)
+        max_in_flight: Maximum predictions running at the same time
+        results_path: Optional JSONL file for the per-job result records
+        journal: Optional Journal for crash-safe resuming
 
-    # Get output URL
-    output = result.get("output")
-    if not output:
-        print("ERROR: No output returned from API")
-        sys.exit(1)
+    Returns:
+        List of per-job result records, in manifest order
+    """
+    check_token()
+    keys = [make_key(MODEL, {**defaults, **job}) for job in jobs]
+    records = [
+        {"input": job["input"], "output": job["output"], "prediction_id": None, "status": "pending", "error": None}
+        for job in jobs
+    ]
+    queue = list(range(len(jobs)))
+    in_flight = {}  # poller future -> job index
+    submitted_at = {}
+    downloads = {}
+    reattached = set()
+    result_keys = {}
+    start_time = time.time()
 
-    # Handle output - could be URL string or list
-    video_url = output[0] if isinstance(output, list) else output
+    print(f"Batch: {len(jobs)} jobs, up to {max_in_flight} in flight")
+
+    def finish_download(index, url):
+        ok = download_video(url, jobs[index]["output"])
+        records[index]["status"] = "succeeded" if ok else "download_failed"
+        if ok and index in result_keys:
+            get_result_store().save(result_keys[index], jobs[index]["output"])
+        if journal and ok:
+            journal.record(keys[index], saved=jobs[index]["output"])
+        elif journal and index in reattached:
+            # The recorded output URL has likely expired; resubmit on the next resume
+            journal.record(keys[index], status=EXPIRED)
+        if not ok:
+            records[index]["error"] = f"Download failed: {url}"
+        records[index]["elapsed"] = round(time.time() - submitted_at[index], 1)
+
+    if journal:
+        for index in list(queue):
+            if journal.saved(keys[index]):
+                queue.remove(index)
+                records[index].update(status="succeeded", prediction_id=journal.get(keys[index]).get("prediction_id"))
+                print(f"  [{index + 1}/{len(jobs)}] Already saved: {jobs[index]['output']}")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+        while queue or in_flight:
+            # Top up the in-flight set
+            while queue and len(in_flight) < max_in_flight:
+                index = queue.pop(0)
+                job = {**defaults, **jobs[index]}
+                record = records[index]
+                resumed = journal.reattach(keys[index]) if journal else None
+                if resumed:
+                    reattached.add(index)
+                    submitted_at[index] = time.time()
+                    record["prediction_id"] = resumed["id"]
+                    in_flight[get_poller().watch(resumed, MODEL, PREDICTION_TIMEOUT)] = index
+                    print(f"  [{index + 1}/{len(jobs)}] Resuming {job['input']} -> {resumed['id']}")
+                    continue
+                if not job["input"].startswith(("http://", "https://")) and not Path(job["input"]).exists():
+                    record.update(status="failed", error=f"Image file not found: {job['input']}")
+                    continue
+                final_prompt, final_negative = resolve_prompt(
+                    job["motion"], job.get("prompt"), job.get("negative"), fallback=True,
+                )
+                result_keys[index] = job_result_key(
+                    job["input"], final_prompt, final_negative, job["duration"], job["aspect"], job["guidance"],
+                )
+                if get_result_store().fetch(result_keys[index], job["output"]):
+                    record["status"] = "succeeded"
+                    print(f"  [{index + 1}/{len(jobs)}] Reused stored result: {job['output']}")
+                    if journal:
+                        journal.record(keys[index], saved=job["output"])
+                    continue
+                try:
+                    input_params = build_input(
+                        load_image(job["input"]), final_prompt, final_negative,
+                        job["duration"], job["aspect"], job["guidance"],
+                    )
+                    prediction = create_prediction(input_params)
+                except (ClientError, InputError) as e:
+                    record.update(status="failed", error=f"Create failed: {e}")
+                    continue
+                submitted_at[index] = time.time()
+                record["prediction_id"] = prediction.get("id")
+                if journal:
+                    journal.record(keys[index], prediction_id=prediction.get("id"), status=prediction.get("status"))
+                in_flight[get_poller().watch(prediction, MODEL, PREDICTION_TIMEOUT)] = index
+                print(f"  [{index + 1}/{len(jobs)}] Submitted {job['input']} -> {prediction.get('id')}")
+
+            if not in_flight:
+                continue
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"status": "failed", "error": f"Status check failed: {e}"}
+                status = result.get("status")
+                video_url = output_url(result) if status == "succeeded" else None
+                if journal:
+                    journal.record(keys[index], status=status, output=video_url, error=result.get("error"))
+                if video_url:
+                    print(f"  [{index + 1}/{len(jobs)}] Succeeded, downloading to {jobs[index]['output']}")
+                    records[index]["status"] = "downloading"
+                    downloads[index] = pool.submit(finish_download, index, video_url)
+                else:
+                    error = result.get("error") or f"No usable output (status: {status})"
+                    print(f"  [{index + 1}/{len(jobs)}] Failed: {error}")
+                    records[index].update(status="failed", error=error)
+                    records[index]["elapsed"] = round(time.time() - submitted_at[index], 1)
+
+        for index, future in downloads.items():
+            try:
+                future.result()
+            except Exception as e:
+                # Download or post-processing failed; the rest of the batch still counts
+                records[index].update(status="failed", error=f"Download failed: {e}")
+                print(f"  [{index + 1}/{len(jobs)}] Failed: {records[index]['error']}")
 
-    if isinstance(video_url, str) and video_url.startswith(('http://', 'https://')):
-        if download_video(video_url, output_path):
-            print(f"SUCCESS: Video saved to {output_path}")
-            return output_path
-        else:
-            print(f"Video URL (download manually): {video_url}")
-            return video_url
+    elapsed = time.time() - start_time
+    succeeded = sum(1 for record in records if record["status"] == "succeeded")
+    print(f"Batch completed in {elapsed:.1f}s: {succeeded}/{len(jobs)} succeeded")
+    if journal:
+        journal.close(remove=succeeded == len(jobs))
+        if succeeded < len(jobs):
+            print(f"Journal kept at {journal.path}; rerun with --resume to retry the rest")
+
+    if results_path:
+        with open(results_path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        print(f"Results written to {results_path}")
     else:
-        print(f"ERROR: Unexpected output format: {type(video_url)}")
-        sys.exit(1)
+        for record in records:
+            print(json.dumps(record))
+
+    return records
 
 
 def main():
@@ -264,6 +525,13 @@ Examples:
   %(prog)s photo.png video.mp4 --prompt "slowly turning head"
   %(prog)s photo.png video.mp4 --duration 10 --aspect 9:16
   %(prog)s photo.png video.mp4 --guidance 0.8  # Higher prompt adherence
+
+Batch mode:
+  %(prog)s --batch jobs.jsonl --max-in-flight 8 --results results.jsonl
+
+  Manifest is JSONL or CSV with fields: input, output, and optionally
+  motion, prompt, negative, duration, aspect, guidance. Omitted fields
+  use the values of the corresponding command-line options.
 """
     )
 
@@ -307,6 +575,26 @@ Examples:
         action="store_true",
         help="List all available motion presets"
     )
+    parser.add_argument(
+        "--batch",
+        metavar="MANIFEST",
+        help="Run many jobs from a JSONL or CSV manifest"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f"Batch mode: predictions running at once (default: {DEFAULT_MAX_IN_FLIGHT})"
+    )
+    parser.add_argument(
+        "--results",
+        metavar="PATH",
+        help="Batch mode: write per-job result records to this JSONL file"
+    )
+    add_journal_args(parser)
+    add_result_args(parser)
+    add_webhook_args(parser)
+    add_report_args(parser)
 
     args = parser.parse_args()
 
@@ -318,7 +606,28 @@ Examples:
             print()
         sys.exit(0)
 
+    configure_webhooks(args)
+    configure_results(args)
+    configure_report(args)
+
+    if args.batch:
+        defaults = {
+            "motion": args.motion,
+            "prompt": args.prompt,
+            "negative": args.negative,
+            "duration": args.duration,
+            "aspect": args.aspect,
+            "guidance": max(0.0, min(1.0, args.guidance)),
+        }
+        journal = Journal(args.journal or args.batch + JOURNAL_SUFFIX, args.resume)
+        if args.resume and journal.entries:
+            print(f"Resuming from {journal.path} ({len(journal.entries)} recorded jobs)")
+        records = run_batch(load_manifest(args.batch), defaults, max(1, args.max_in_flight), args.results, journal)
+        sys.exit(0 if all(record["status"] == "succeeded" for record in records) else 1)
+
     # Validate required args when not listing presets
+    if args.resume:
+        parser.error("--resume applies to --batch runs")
     if not args.input or not args.output:
         parser.error("input and output are required")
 
@@ -343,4 +652,4 @@ Examples:
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Server) - Resident job service for all four generators.
+
+Runs as one long-lived process that imports the generators (and their
+presets) once and keeps the pooled HTTP client, upload index and caches warm
+between jobs. Jobs are accepted over a small JSON HTTP API on a TCP port or a
+Unix socket and acknowledged as soon as they are queued. Each model kind has
+its own concurrency limit; within a kind, higher-priority jobs start first
+and equal priorities run in submission order.
+
+API:
+    POST   /jobs        {"kind": "kling|keyframe|veo|audio", "params": {...}, "priority": 0}
+                        -> 202 with the queued job
+    GET    /jobs        all known jobs (without logs)
+    GET    /jobs/ID     one job: status, result, error and its output log
+    DELETE /jobs/ID     cancel a job that has not started yet
+    GET    /health      per-kind availability, limits, queued and running counts
+
+`params` are the keyword arguments of the kind's function: animate()
+(kling), animate_keyframe(), animate_veo() or animate_audio(), for example
+{"input_image": "me.png", "output_path": "out/me.mp4", "motion": "wave"}.
+Paths are resolved on the server.
+
+Usage:
+    python animate_server.py --listen 127.0.0.1:8788 --concurrency veo=2 --concurrency kling=8
+    python animate_server.py --socket /tmp/pfp-animate.sock
+
+    curl -s localhost:8788/jobs -d '{"kind": "kling", "params": {"input_image": "me.png", "output_path": "me.mp4"}}'
+    curl -s --unix-socket /tmp/pfp-animate.sock http://local/jobs/JOB_ID
+"""
+
+import argparse
+import contextvars
+import heapq
+import importlib
+import inspect
+import itertools
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core import AnimateError, log_to_console
+from instrument import add_report_args, configure_report
+from replicate_client import get_client
+from result_store import add_result_args, configure_results
+from webhooks import add_webhook_args, configure_webhooks
+
+
+DEFAULT_LISTEN = "127.0.0.1:8788"
+
+# kind -> (module, function) run for jobs of that kind
+KINDS = {
+    "kling": ("animate_pfp", "animate"),
+    "keyframe": ("animate_keyframe", "animate_keyframe"),
+    "veo": ("animate_veo", "animate_veo"),
+    "audio": ("animate_audio", "animate_audio"),
+}
+# Jobs of each kind running at once (each job may run several predictions)
+DEFAULT_CONCURRENCY = {"kling": 4, "keyframe": 2, "veo": 2, "audio": 4}
+
+# Finished jobs kept for status queries before the oldest are forgotten
+MAX_FINISHED = 1000
+# Output lines kept per job
+LOG_LINES = 200
+
+
+class Job:
+    """One queued or running generation and everything known about it."""
+
+    def __init__(self, kind: str, params: dict, priority: int = 0):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.log = deque(maxlen=LOG_LINES)
+        self.partial = ""
+
+    def write(self, text: str):
+        """Collect the job's printed output line by line."""
+        self.partial += text
+        *lines, self.partial = self.partial.split("\n")
+        self.log.extend(line for line in lines if line.strip())
+
+    def summary(self, with_log: bool = False) -> dict:
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "params": self.params,
+            "created": round(self.created, 3),
+            "started": self.started and round(self.started, 3),
+            "finished": self.finished and round(self.finished, 3),
+            "result": self.result,
+            "error": self.error,
+        }
+        if with_log:
+            data["log"] = list(self.log) + ([self.partial] if self.partial.strip() else [])
+        return data
+
+
+class JobOutput:
+    """Stand-in for sys.stdout that sends a job's prints to its Job.
+
+    The generators report progress and errors with print(). The current job
+    is a context variable, so prints from the poller's status callbacks and
+    asyncio.to_thread helpers reach it too; code outside a job writes
+    through to the real stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.job = contextvars.ContextVar("job", default=None)
+
+    def write(self, text: str) -> int:
+        job = self.job.get()
+        if job is None:
+            return self.stream.write(text)
+        job.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class Scheduler:
+    """Per-kind priority queues, each drained by its own fixed set of workers."""
+
+    def __init__(self, concurrency: dict, output: JobOutput):
+        self.output = output
+        self.limits = dict(concurrency)
+        self.functions = {}
+        self.unavailable = {}
+        self.jobs = {}
+        self.finished = deque()
+        self.queues = {kind: [] for kind in KINDS}
+        self.running = {kind: 0 for kind in KINDS}
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.ready = {kind: threading.Condition(self.lock) for kind in KINDS}
+
+    def load(self):
+        """Import every generator once; kinds that fail to import are reported, not fatal."""
+        for kind, (module_name, function_name) in KINDS.items():
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError as e:
+                self.unavailable[kind] = f"could not import {module_name}: {e}"
+            if kind in self.unavailable:
+                print(f"  {kind}: unavailable ({self.unavailable[kind]})")
+                continue
+            self.functions[kind] = getattr(module, function_name)
+            print(f"  {kind}: {module_name}.{function_name}, {self.limits[kind]} at once")
+
+    def start(self):
+        for kind in self.functions:
+            for n in range(max(1, self.limits[kind])):
+                threading.Thread(target=self.worker, args=(kind,), name=f"{kind}-{n}", daemon=True).start()
+
+    def submit(self, kind: str, params: dict, priority: int = 0) -> Job:
+        """Validate and queue a job. Raises ValueError for requests that can never run."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind '{kind}' (expected one of: {', '.join(KINDS)})")
+        if kind in self.unavailable:
+            raise ValueError(f"Kind '{kind}' is unavailable: {self.unavailable[kind]}")
+        if not isinstance(params, dict):
+            raise ValueError("'params' must be an object")
+        try:
+            inspect.signature(self.functions[kind]).bind(**params)
+        except TypeError as e:
+            raise ValueError(f"Invalid params for {kind}: {e}")
+
+        try:
+            priority = int(priority or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"'priority' must be an integer, not {priority!r}")
+
+        job = Job(kind, params, priority)
+        with self.lock:
+            self.jobs[job.id] = job
+            heapq.heappush(self.queues[kind], (-job.priority, next(self.counter), job))
+            self.ready[kind].notify()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> list:
+        with self.lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job; False if it has already started or finished."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            job.status = "canceled"
+            self.retire(job)
+            return True
+
+    def health(self) -> dict:
+        with self.lock:
+            return {
+                kind: {
+                    "available": kind in self.functions,
+                    "error": self.unavailable.get(kind),
+                    "limit": self.limits[kind],
+                    "queued": sum(1 for _, _, job in self.queues[kind] if job.status == "queued"),
+                    "running": self.running[kind],
+                }
+                for kind in KINDS
+            }
+
+    def retire(self, job: Job):
+        """Mark a job finished and forget the oldest finished jobs past MAX_FINISHED (lock held)."""
+        job.finished = time.time()
+        self.finished.append(job.id)
+        while len(self.finished) > MAX_FINISHED:
+            self.jobs.pop(self.finished.popleft(), None)
+
+    def worker(self, kind: str):
+        while True:
+            with self.lock:
+                while not self.queues[kind]:
+                    self.ready[kind].wait()
+                _, _, job = heapq.heappop(self.queues[kind])
+                if job.status != "queued":
+                    continue  # canceled while waiting
+                job.status = "running"
+                job.started = time.time()
+                self.running[kind] += 1
+            self.run(job)
+
+    def run(self, job: Job):
+        print(f"[{job.id}] {job.kind} started")
+        token = self.output.job.set(job)
+        try:
+            result = self.functions[job.kind](**job.params)
+            status, error = "succeeded", None
+        except AnimateError as e:
+            result, status, error = None, "failed", str(e)
+        except Exception as e:
+            result, status, error = None, "failed", f"{type(e).__name__}: {e}"
+        finally:
+            self.output.job.reset(token)
+
+        with self.lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            self.running[job.kind] -= 1
+            self.retire(job)
+        print(f"[{job.id}] {job.kind} {status} in {job.finished - job.started:.1f}s" + (f": {error}" if error else ""))
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    """JSON API over the scheduler (see the module docstring)."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def job_id(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+    def do_GET(self):
+        scheduler = self.server.scheduler
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/health":
+            self.send_json(200, {"status": "ok", "kinds": scheduler.health()})
+        elif path == "/jobs":
+            self.send_json(200, {"jobs": [job.summary() for job in scheduler.list()]})
+        elif self.job_id():
+            job = scheduler.get(self.job_id())
+            if job:
+                self.send_json(200, job.summary(with_log=True))
+            else:
+                self.send_json(404, {"error": "No such job"})
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path.split("?")[0].rstrip("/") != "/jobs":
+            self.send_json(404, {"error": "Not found"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            job = self.server.scheduler.submit(request.get("kind"), request.get("params", {}), request.get("priority", 0))
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(202, job.summary())
+
+    def do_DELETE(self):
+        scheduler = self.server.scheduler
+        job_id = self.job_id()
+        job = scheduler.get(job_id) if job_id else None
+        if job is None:
+            self.send_json(404, {"error": "No such job"})
+        elif scheduler.cancel(job_id):
+            self.send_json(200, job.summary())
+        else:
+            self.send_json(409, {"error": f"Job is {job.status}; only queued jobs can be canceled"})
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a Unix socket, one thread per connection."""
+
+    daemon_threads = True
+
+
+def make_server(scheduler: Scheduler, listen: str = DEFAULT_LISTEN, socket_path: str = None):
+    """Create the API server on a Unix socket (if given) or a TCP address."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # stale socket from a previous run
+        server = UnixHTTPServer(socket_path, JobHandler)
+    else:
+        host, _, port = listen.rpartition(":")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), JobHandler)
+        server.daemon_threads = True
+    server.scheduler = scheduler
+    return server
+
+
+def parse_concurrency(values: list) -> dict:
+    """Merge KIND=N overrides into the default per-kind limits."""
+    limits = dict(DEFAULT_CONCURRENCY)
+    for value in values or []:
+        kind, _, count = value.partition("=")
+        if kind not in KINDS or not count.isdigit() or int(count) < 1:
+            raise ValueError(f"Expected KIND=N with KIND one of {', '.join(KINDS)}: {value}")
+        limits[kind] = int(count)
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve animation jobs from one resident process",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s --listen 127.0.0.1:8788
+  %(prog)s --socket /tmp/pfp-animate.sock --concurrency veo=1 --concurrency kling=8
+
+Submit a job:
+  curl -s localhost:8788/jobs -d '{"kind": "veo", "priority": 5,
+    "params": {"input_image": "me.png", "output_path": "me.mp4", "prompt": "waves hello"}}'
+"""
+    )
+    parser.add_argument(
+        "--listen",
+        default=DEFAULT_LISTEN,
+        metavar="HOST:PORT",
+        help=f"TCP address for the job API (default: {DEFAULT_LISTEN})"
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Serve the job API on this Unix socket instead of TCP"
+    )
+    parser.add_argument(
+        "--concurrency",
+        action="append",
+        metavar="KIND=N",
+        help="Jobs of one kind running at once (default: "
+             + ", ".join(f"{kind}={count}" for kind, count in DEFAULT_CONCURRENCY.items()) + ")"
+    )
+    add_result_args(parser)
+    add_webhook_args(parser)
+    add_report_args(parser)
+
+    args = parser.parse_args()
+    try:
+        limits = parse_concurrency(args.concurrency)
+    except ValueError as e:
+        parser.error(str(e))
+    if not os.environ.get("REPLICATE_API_TOKEN"):
+        print("ERROR: REPLICATE_API_TOKEN environment variable not set.")
+        print("Get your token at: https://replicate.com/account/api-tokens")
+        sys.exit(1)
+
+    configure_webhooks(args)
+    configure_results(args)
+    configure_report(args)
+
+    output = JobOutput(sys.stdout)
+    sys.stdout = output
+    log_to_console()
+    scheduler = Scheduler(limits, output)
+    print("Loading generators:")
+    scheduler.load()
+    get_client()  # open the shared connection pool up front
+    scheduler.start()
+
+    server = make_server(scheduler, args.listen, args.socket)
+    where = args.socket or "http://%s:%d" % server.server_address[:2]
+    print(f"Serving animation jobs on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
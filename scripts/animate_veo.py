@@ -9,42 +9,67 @@ Usage:
     python animate_veo.py IMAGE OUTPUT --prompt "description of what happens"
     python animate_veo.py photo.png video.mp4 --prompt "person speaks to camera"
     python animate_veo.py photo.png video.mp4 --prompt "person waves hello" --no-audio
+
+    # Multi-shot sequence from a storyboard (shots render in parallel)
+    python animate_veo.py --storyboard shots.jsonl story.mp4
+
+    # Cheap drafts of several prompts, then re-render the best one in full
+    python animate_veo.py photo.png drafts/ --draft "waves hello" "nods and smiles"
+    python animate_veo.py final.mp4 --promote drafts/drafts.json 2
 """
 
 import argparse
-import base64
+import asyncio
+import csv
 import json
 import os
+import random
 import sys
+import tempfile
 import time
-import urllib.request
-import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable
+
+from core import (
+    ConfigError, Generation, InputError, OutputError, PredictionError,
+    quiet, require_token, run_cli, succeeded_output, watch_prediction,
+)
+from media import MediaError, concat_videos, ffmpeg_available
+from instrument import add_report_args, configure_report, span
+from poller import get_poller
+from replicate_client import API_BASE, ClientError, HTTPError, get_client
+from result_store import add_result_args, configure_results, get_result_store, input_digest, result_key
+from uploads import file_input
+from webhooks import add_webhook_args, configure_webhooks, webhook_fields
 
 
 # Veo 3.1 model
 VEO_MODEL = "google/veo-3.1"
+PREDICTIONS_URL = f"{API_BASE}/models/{VEO_MODEL}/predictions"
+PREDICTION_TIMEOUT = 600
+DURATIONS = (4, 6, 8)
+STORYBOARD_FIELDS = ("image", "prompt", "duration", "end_image", "seed")
+
+# Draft renders: fastest, cheapest settings; promoted drafts keep prompt, seed and inputs
+DRAFT_RESOLUTION = "720p"
+DRAFT_DURATION = 4
+DRAFT_MANIFEST = "drafts.json"
 
 
 def check_token():
-    """Verify REPLICATE_API_TOKEN is set."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    if not token:
-        print("ERROR: REPLICATE_API_TOKEN environment variable not set.")
-        print("Get your token at: https://replicate.com/account/api-tokens")
-        sys.exit(1)
-    return token
+    """Verify REPLICATE_API_TOKEN is set (raises ConfigError)."""
+    return require_token()
 
 
 def load_image_as_uri(file_path: str) -> str:
-    """Load image and return as data URI."""
+    """Return an image URL for the payload, uploading local files once."""
     if file_path.startswith(("http://", "https://")):
         return file_path
 
     path = Path(file_path)
     if not path.exists():
-        print(f"ERROR: Image file not found: {file_path}")
-        sys.exit(1)
+        raise InputError(f"Image file not found: {file_path}")
 
     suffix = path.suffix.lower()
     mime_types = {
@@ -55,71 +80,65 @@ def load_image_as_uri(file_path: str) -> str:
     }
     mime_type = mime_types.get(suffix, "image/png")
 
-    with open(path, "rb") as f:
-        data = base64.b64encode(f.read()).decode("utf-8")
-
-    return f"data:{mime_type};base64,{data}"
+    return file_input(str(path), mime_type)
 
 
-def api_call(method: str, url: str, data: dict = None, retries: int = 3) -> dict:
-    """Make API request with retry on rate limit."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-
-    for attempt in range(retries):
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(data).encode('utf-8') if data else None,
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            },
-            method=method
-        )
-        try:
-            with urllib.request.urlopen(req) as resp:
-                return json.loads(resp.read().decode('utf-8'))
-        except urllib.error.HTTPError as e:
-            if e.code == 429 and attempt < retries - 1:
-                wait = 30 * (attempt + 1)
-                print(f"  Rate limited, waiting {wait}s...")
-                time.sleep(wait)
-                continue
-            error_body = e.read().decode('utf-8') if e.fp else str(e)
-            print(f"ERROR: API request failed: {e.code}")
-            print(f"Details: {error_body}")
-            sys.exit(1)
-
-
-def wait_for_prediction(prediction_id: str, timeout: int = 600) -> dict:
-    """Wait for prediction to complete."""
-    token = os.environ.get("REPLICATE_API_TOKEN")
-    url = f"https://api.replicate.com/v1/predictions/{prediction_id}"
+def api_call(method: str, url: str, data: dict = None) -> dict:
+    """Make API request through the shared client (raises PredictionError on failure)."""
+    try:
+        if method == "POST":
+            return get_client().post_json(url, data)
+        return get_client().get_json(url)
+    except HTTPError as e:
+        raise PredictionError(f"API request failed: {e.code}. Details: {e.body}")
+    except ClientError as e:
+        raise PredictionError(f"API request failed: {e}")
 
-    start = time.time()
-    last_status = None
 
-    while time.time() - start < timeout:
-        result = api_call("GET", url)
-        status = result.get("status")
+def create_prediction(input_data: dict) -> dict:
+    """Create a Veo prediction (raises PredictionError on API errors)."""
+    with span("create", model=VEO_MODEL):
+        return api_call("POST", PREDICTIONS_URL, {"input": input_data, **webhook_fields()})
 
-        if status != last_status:
-            elapsed = time.time() - start
-            print(f"  Status: {status} ({elapsed:.0f}s)")
-            last_status = status
 
-        if status == "succeeded":
-            return result
-        elif status in ["failed", "canceled"]:
-            error = result.get("error", "Unknown error")
-            print(f"ERROR: Prediction {status}: {error}")
-            return result
+def build_input(
+    image_uri: str,
+    prompt: str,
+    duration: int,
+    resolution: str,
+    aspect_ratio: str,
+    generate_audio: bool,
+    reference_uris: list = None,
+    end_image_uri: str = None,
+    seed: int = None,
+) -> dict:
+    """Build the Veo 3.1 input payload."""
+    input_data = {
+        "prompt": prompt,
+        "start_image": image_uri,
+        "duration": duration,
+        "resolution": resolution,
+        "aspect_ratio": aspect_ratio,
+        "generate_audio": generate_audio,
+    }
+    if reference_uris:
+        input_data["reference_images"] = reference_uris
+    if end_image_uri:
+        input_data["end_image"] = end_image_uri
+    if seed is not None:
+        input_data["seed"] = seed
+    return input_data
 
-        time.sleep(5)
 
-    return {"status": "timeout", "error": f"Prediction timed out after {timeout}s"}
+def output_url_of(result: dict) -> str:
+    """Return the video URL from a finished prediction."""
+    url = result.get("output")
+    if isinstance(url, list):
+        url = url[0] if url else None
+    return url
 
 
-def animate_veo(
+async def generate_veo(
     input_image: str,
     output_path: str,
     prompt: str,
@@ -129,93 +148,449 @@ def animate_veo(
     generate_audio: bool = True,
     reference_images: list = None,
     end_image: str = None,
-) -> str:
-    """Generate video with Veo 3.1."""
+    seed: int = None,
+    on_progress: Callable[[str], None] = quiet,
+) -> Generation:
+    """Generate video with Veo 3.1 (async).
+
+    A video already generated for the same images, prompt, seed and settings
+    is copied from the result store instead of creating a prediction.
+    `on_progress` receives progress lines.
+
+    Raises:
+        ConfigError, InputError, PredictionError or OutputError
+    """
 
     check_token()
+    start_time = time.time()
+
+    # Ensure output path has .mp4 extension
+    if not output_path.lower().endswith(".mp4"):
+        output_path += ".mp4"
+
+    key = await asyncio.to_thread(lambda: result_key(VEO_MODEL, build_input(
+        input_digest(input_image), prompt, duration, resolution, aspect_ratio, generate_audio,
+        [input_digest(img) for img in reference_images] if reference_images else None,
+        input_digest(end_image), seed,
+    )))
+    if await asyncio.to_thread(get_result_store().fetch, key, output_path):
+        on_progress(f"Reusing stored result for identical request: {output_path}")
+        return Generation(output_path, VEO_MODEL, elapsed=time.time() - start_time, reused=True)
 
     # Load start image
-    print(f"Loading image: {input_image}")
-    image_uri = load_image_as_uri(input_image)
+    on_progress(f"Loading image: {input_image}")
+    image_uri = await asyncio.to_thread(load_image_as_uri, input_image)
 
     # Calculate cost
     cost_per_sec = 0.40 if generate_audio else 0.20
     est_cost = duration * cost_per_sec
-    print(f"\nDuration: {duration}s")
-    print(f"Resolution: {resolution}")
-    print(f"Aspect ratio: {aspect_ratio}")
-    print(f"Audio: {'yes' if generate_audio else 'no'}")
-    print(f"Estimated cost: ~${est_cost:.2f}")
-    print(f"\nPrompt: {prompt}")
-
-    # Build input
-    input_data = {
-        "prompt": prompt,
-        "start_image": image_uri,
-        "duration": duration,
-        "resolution": resolution,
-        "aspect_ratio": aspect_ratio,
-        "generate_audio": generate_audio,
-    }
+    on_progress(f"\nDuration: {duration}s")
+    on_progress(f"Resolution: {resolution}")
+    on_progress(f"Aspect ratio: {aspect_ratio}")
+    on_progress(f"Audio: {'yes' if generate_audio else 'no'}")
+    on_progress(f"Estimated cost: ~${est_cost:.2f}")
+    if seed is not None:
+        on_progress(f"Seed: {seed}")
+    on_progress(f"\nPrompt: {prompt}")
 
     # Optional: reference images for style consistency
+    ref_uris = None
     if reference_images:
-        ref_uris = [load_image_as_uri(img) for img in reference_images]
-        input_data["reference_images"] = ref_uris
-        print(f"Reference images: {len(ref_uris)}")
+        ref_uris = [await asyncio.to_thread(load_image_as_uri, img) for img in reference_images]
+        on_progress(f"Reference images: {len(ref_uris)}")
 
     # Optional: end image for transitions
+    end_uri = None
     if end_image:
-        input_data["end_image"] = load_image_as_uri(end_image)
-        print(f"End image: {end_image}")
+        end_uri = await asyncio.to_thread(load_image_as_uri, end_image)
+        on_progress(f"End image: {end_image}")
+
+    input_data = build_input(
+        image_uri, prompt, duration, resolution, aspect_ratio, generate_audio, ref_uris, end_uri, seed,
+    )
 
     # Create prediction
-    print(f"\nStarting Veo 3.1 generation...")
-    url = f"https://api.replicate.com/v1/models/{VEO_MODEL}/predictions"
-    prediction = api_call("POST", url, {"input": input_data})
+    on_progress(f"\nStarting Veo 3.1 generation...")
+    prediction = await asyncio.to_thread(create_prediction, input_data)
 
     prediction_id = prediction.get("id")
     if not prediction_id:
-        print(f"ERROR: Failed to create prediction: {prediction}")
-        sys.exit(1)
+        raise PredictionError(f"Failed to create prediction: {prediction}")
 
-    print(f"Prediction ID: {prediction_id}")
+    on_progress(f"Prediction ID: {prediction_id}")
 
     # Wait for completion
-    result = wait_for_prediction(prediction_id)
+    result = await watch_prediction(
+        prediction, VEO_MODEL, PREDICTION_TIMEOUT,
+        on_status=lambda status, elapsed: on_progress(f"  Status: {status} ({elapsed:.0f}s)"),
+    )
+    output_url = succeeded_output(result, output_url_of)
 
-    if result.get("status") != "succeeded":
-        error = result.get("error", "Unknown error")
-        print(f"ERROR: Generation failed: {error}")
-        sys.exit(1)
+    # Download video
+    on_progress(f"Downloading video...")
+    try:
+        await asyncio.to_thread(get_client().download, output_url, output_path, progress=False)
+    except ClientError as e:
+        raise OutputError(f"Failed to download video: {e}", output_url)
+    await asyncio.to_thread(get_result_store().save, key, output_path)
 
-    # Get output URL
-    output_url = result.get("output")
-    if isinstance(output_url, list):
-        output_url = output_url[0]
+    return Generation(output_path, VEO_MODEL, [prediction_id], time.time() - start_time)
 
-    if not output_url:
-        print("ERROR: No output URL in response")
-        sys.exit(1)
 
-    # Ensure output path has .mp4 extension
+def animate_veo(
+    input_image: str,
+    output_path: str,
+    prompt: str,
+    duration: int = 8,
+    resolution: str = "1080p",
+    aspect_ratio: str = "9:16",
+    generate_audio: bool = True,
+    reference_images: list = None,
+    end_image: str = None,
+    seed: int = None,
+) -> str:
+    """Generate video with Veo 3.1.
+
+    Blocking wrapper over generate_veo() that prints progress.
+    """
+    generation = asyncio.run(generate_veo(
+        input_image, output_path, prompt, duration, resolution, aspect_ratio, generate_audio,
+        reference_images, end_image, seed, on_progress=print,
+    ))
+    file_size = Path(generation.output_path).stat().st_size / (1024 * 1024)
+    print(f"\nSUCCESS: Video saved to {generation.output_path}")
+    print(f"File size: {file_size:.1f} MB")
+    return generation.output_path
+
+
+def resolve_input(image: str) -> str:
+    """Absolute path for a local input (URLs unchanged), so manifests work from any directory."""
+    if not image or image.startswith(("http://", "https://")):
+        return image
+    return str(Path(image).resolve())
+
+
+def render_drafts(
+    input_image: str,
+    output_dir: str,
+    prompts: list,
+    aspect_ratio: str = "9:16",
+    reference_images: list = None,
+    end_image: str = None,
+    seed: int = None,
+) -> str:
+    """Render a cheap draft of each prompt variant at once and record them.
+
+    Drafts use DRAFT_RESOLUTION, DRAFT_DURATION and no audio. Each variant
+    gets a fixed seed (`seed`, or a random one), and the prompt, seed and
+    inputs are written to a manifest in `output_dir` so promote_draft() can
+    re-render the chosen variant at full settings. A variant whose
+    prediction can't be created is recorded as failed; the manifest is
+    written for the rest. Returns the manifest path.
+    """
+    check_token()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, DRAFT_MANIFEST)
+
+    print(f"Loading image: {input_image}")
+    image_uri = load_image_as_uri(input_image)
+    ref_uris = [load_image_as_uri(img) for img in reference_images] if reference_images else None
+    end_uri = load_image_as_uri(end_image) if end_image else None
+
+    print(f"\nDrafts: {len(prompts)} variants at {DRAFT_RESOLUTION}, {DRAFT_DURATION}s, no audio")
+    print(f"Estimated cost: ~${len(prompts) * DRAFT_DURATION * 0.20:.2f}")
+
+    drafts = []
+    futures = {}
+    for number, prompt in enumerate(prompts, 1):
+        draft_seed = seed if seed is not None else random.randint(0, 2**31 - 1)
+        input_data = build_input(
+            image_uri, prompt, DRAFT_DURATION, DRAFT_RESOLUTION, aspect_ratio, False,
+            ref_uris, end_uri, draft_seed,
+        )
+        draft = {
+            "id": number,
+            "prompt": prompt,
+            "seed": draft_seed,
+            "prediction_id": None,
+            "output": os.path.join(output_dir, f"draft_{number}.mp4"),
+            "status": "pending",
+        }
+        drafts.append(draft)
+        try:
+            prediction = create_prediction(input_data)
+        except PredictionError as e:
+            draft.update(status="failed", error=str(e))
+            print(f"  [{number}] seed {draft_seed}: {prompt[:60]} -> Failed: {e}")
+            continue
+        draft["prediction_id"] = prediction.get("id")
+        print(f"  [{number}] seed {draft_seed}: {prompt[:60]} -> {prediction.get('id')}")
+        futures[number] = get_poller().watch(prediction, VEO_MODEL, PREDICTION_TIMEOUT)
+
+    print(f"\nWaiting for drafts...")
+    with ThreadPoolExecutor(max_workers=min(8, len(drafts))) as pool:
+        downloads = {}
+        for draft in drafts:
+            if draft["id"] not in futures:
+                continue
+            result = futures[draft["id"]].result()
+            url = output_url_of(result)
+            if result.get("status") == "succeeded" and url:
+                downloads[draft["id"]] = pool.submit(get_client().download, url, draft["output"], progress=False)
+            else:
+                draft.update(status="failed", error=result.get("error") or "No output URL in response")
+                print(f"  [{draft['id']}] Failed: {draft['error']}")
+        for draft in drafts:
+            if draft["id"] in downloads:
+                error = downloads[draft["id"]].exception()
+                draft["status"] = "failed" if error else "succeeded"
+                if error:
+                    draft["error"] = f"Download failed: {error}"
+                print(f"  [{draft['id']}] {'Failed: ' + draft['error'] if error else 'Saved ' + draft['output']}")
+
+    manifest = {
+        "image": resolve_input(input_image),
+        "image_uri": image_uri,
+        "aspect_ratio": aspect_ratio,
+        "reference_images": [resolve_input(img) for img in reference_images] if reference_images else None,
+        "end_image": resolve_input(end_image),
+        "drafts": drafts,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    succeeded = sum(1 for draft in drafts if draft["status"] == "succeeded")
+    print(f"\n{succeeded}/{len(drafts)} drafts rendered. Manifest: {manifest_path}")
+    print(f"Promote one with: python {Path(sys.argv[0]).name} OUTPUT.mp4 --promote {manifest_path} N")
+    return manifest_path
+
+
+def promote_draft(
+    manifest_path: str,
+    draft_id: int,
+    output_path: str,
+    duration: int = 8,
+    resolution: str = "1080p",
+    generate_audio: bool = True,
+) -> str:
+    """Re-render a draft at full settings with its prompt, seed and inputs."""
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise InputError(f"Could not read draft manifest {manifest_path}: {e}")
+
+    draft = next((d for d in manifest["drafts"] if d["id"] == draft_id), None)
+    if draft is None:
+        raise InputError(
+            f"No draft {draft_id} in {manifest_path}\n"
+            f"Available: {', '.join(str(d['id']) for d in manifest['drafts'])}"
+        )
+
+    # The upload index returns the existing URL for an unchanged local image
+    image = manifest["image"]
+    if not image.startswith(("http://", "https://")) and not Path(image).exists():
+        image = manifest["image_uri"]
+
+    print(f"Promoting draft {draft_id} (seed {draft['seed']})")
+    return animate_veo(
+        input_image=image,
+        output_path=output_path,
+        prompt=draft["prompt"],
+        duration=duration,
+        resolution=resolution,
+        aspect_ratio=manifest["aspect_ratio"],
+        generate_audio=generate_audio,
+        reference_images=manifest.get("reference_images"),
+        end_image=manifest.get("end_image"),
+        seed=draft["seed"],
+    )
+
+
+def load_storyboard(
+    storyboard_path: str,
+    default_prompt: str = None,
+    default_duration: int = 8,
+    end_image: str = None,
+    default_seed: int = None,
+) -> list:
+    """Load shots from a JSONL, JSON (list) or CSV storyboard.
+
+    Each shot has an `image` (its first frame) and optionally `prompt`,
+    `duration` and `seed`. The last shot may set `end_image` (default:
+    `end_image`); every other shot ends on the next shot's image.
+    """
+    path = Path(storyboard_path)
+    if not path.exists():
+        raise InputError(f"Storyboard not found: {storyboard_path}")
+
+    # (label, row) pairs; labels name the file line, or the shot for JSON lists
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            rows = [(f"line {reader.line_num}", row) for row in reader]
+        elif path.suffix.lower() == ".json":
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                raise InputError(f"Storyboard {storyboard_path}: invalid JSON ({e})")
+            if not isinstance(data, list):
+                raise InputError(f"Storyboard {storyboard_path}: expected a JSON list of shots")
+            rows = [(f"shot {shot_num}", row) for shot_num, row in enumerate(data, 1)]
+        else:
+            rows = []
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    rows.append((f"line {line_num}", json.loads(line)))
+                except ValueError as e:
+                    raise InputError(f"Storyboard line {line_num}: invalid JSON ({e})")
+
+    shots = []
+    for label, row in rows:
+        if not isinstance(row, dict):
+            raise InputError(f"Storyboard {label}: expected a JSON object")
+        shot = {key: value for key, value in row.items() if key in STORYBOARD_FIELDS and value not in (None, "")}
+        shot.setdefault("prompt", default_prompt)
+        try:
+            shot["duration"] = int(shot.get("duration", default_duration))
+            if "seed" in shot or default_seed is not None:
+                shot["seed"] = int(shot.get("seed", default_seed))
+        except (TypeError, ValueError) as e:
+            raise InputError(f"Storyboard {label}: {e}")
+        if "image" not in shot or not shot["prompt"]:
+            raise InputError(f"Storyboard {label} needs 'image' and 'prompt' (or pass --prompt)")
+        if shot["duration"] not in DURATIONS:
+            raise InputError(f"Storyboard {label}: duration must be one of {DURATIONS}")
+        shots.append(shot)
+    if not shots:
+        raise InputError("Storyboard has no shots")
+    if end_image:
+        shots[-1].setdefault("end_image", end_image)
+    return shots
+
+
+def sequence_failure(outcomes: list, output_path: str) -> str:
+    """Save the finished clips of an incomplete sequence and describe every shot."""
+    finished = [outcome for outcome in outcomes if outcome["status"] == "succeeded"]
+    stem = output_path[:-4] if output_path.lower().endswith(".mp4") else output_path
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(finished)))) as pool:
+        downloads = {
+            outcome["shot"]: (f"{stem}_shot_{outcome['shot']}.mp4", pool.submit(
+                get_client().download, outcome["url"], f"{stem}_shot_{outcome['shot']}.mp4", progress=False,
+            ))
+            for outcome in finished
+        }
+    lines = [f"{len(outcomes) - len(finished)} of {len(outcomes)} shots did not finish; sequence not joined:"]
+    for outcome in outcomes:
+        line = f"  Shot {outcome['shot']}: {outcome['status']}"
+        if outcome["prediction_id"]:
+            line += f" (prediction {outcome['prediction_id']})"
+        if outcome["shot"] in downloads:
+            clip, download = downloads[outcome["shot"]]
+            line += f", clip saved to {clip}" if not download.exception() else f", download manually: {outcome['url']}"
+        elif outcome.get("error"):
+            line += f": {outcome['error']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def animate_sequence(
+    shots: list,
+    output_path: str,
+    resolution: str = "1080p",
+    aspect_ratio: str = "9:16",
+    generate_audio: bool = True,
+    reference_images: list = None,
+) -> str:
+    """Generate a multi-shot video: every shot at once, then joined in order.
+
+    Each shot starts on its own image and ends on the next shot's image, so
+    consecutive clips meet on the same frame. A shot's `seed` is passed on.
+    If any shot fails, the finished clips are saved next to `output_path`
+    and PredictionError lists every shot's outcome and prediction ID. Clips
+    are joined with a stream copy (no re-encode).
+    """
+    check_token()
+    if len(shots) > 1 and not ffmpeg_available():
+        raise ConfigError("ffmpeg is required to join shots (install it, e.g. `brew install ffmpeg`)")
     if not output_path.lower().endswith(".mp4"):
         output_path += ".mp4"
 
-    # Download video
-    print(f"Downloading video...")
-    try:
-        with urllib.request.urlopen(output_url) as response:
-            with open(output_path, 'wb') as f:
-                f.write(response.read())
-        file_size = Path(output_path).stat().st_size / (1024 * 1024)
-        print(f"\nSUCCESS: Video saved to {output_path}")
-        print(f"File size: {file_size:.1f} MB")
-        return output_path
-    except Exception as e:
-        print(f"ERROR: Failed to download video: {e}")
-        print(f"Video URL (download manually): {output_url}")
-        sys.exit(1)
+    total_duration = sum(shot["duration"] for shot in shots)
+    cost_per_sec = 0.40 if generate_audio else 0.20
+    print(f"Storyboard: {len(shots)} shots, {total_duration}s total")
+    print(f"Resolution: {resolution}, aspect ratio: {aspect_ratio}, audio: {'yes' if generate_audio else 'no'}")
+    print(f"Estimated cost: ~${total_duration * cost_per_sec:.2f}")
+
+    # Upload each distinct image once (shot N's start is shot N-1's end)
+    images = list({shot["image"] for shot in shots} | {shot["end_image"] for shot in shots if shot.get("end_image")})
+    with ThreadPoolExecutor(max_workers=min(8, len(images))) as pool:
+        uris = dict(zip(images, pool.map(load_image_as_uri, images)))
+    ref_uris = [load_image_as_uri(img) for img in reference_images] if reference_images else None
+
+    print(f"\nStarting {len(shots)} Veo 3.1 generations in parallel...")
+    # One outcome per shot; creates stop at the first failure since the sequence can't be joined
+    outcomes = [{"shot": number, "prediction_id": None, "status": "not started"} for number in range(1, len(shots) + 1)]
+    futures = {}
+    for index, shot in enumerate(shots):
+        end_image = shots[index + 1]["image"] if index + 1 < len(shots) else shot.get("end_image")
+        input_data = build_input(
+            uris[shot["image"]], shot["prompt"], shot["duration"], resolution, aspect_ratio,
+            generate_audio, ref_uris, uris.get(end_image), shot.get("seed"),
+        )
+        label = f"[{index + 1}/{len(shots)}]"
+        try:
+            prediction = create_prediction(input_data)
+        except PredictionError as e:
+            outcomes[index].update(status="create failed", error=str(e))
+            print(f"  {label} Failed: {e}")
+            break
+        outcomes[index].update(prediction_id=prediction.get("id"), status="submitted")
+        print(f"  {label} {shot['duration']}s: {shot['prompt'][:60]} -> {prediction.get('id')}")
+        futures[index] = get_poller().watch(
+            prediction, VEO_MODEL, PREDICTION_TIMEOUT,
+            on_status=lambda status, elapsed, label=label: print(f"  {label} Status: {status} ({elapsed:.0f}s)"),
+        )
+
+    for index, future in futures.items():
+        try:
+            result = future.result()
+        except Exception as e:
+            outcomes[index].update(status="watch failed", error=str(e))
+            continue
+        url = output_url_of(result)
+        if result.get("status") == "succeeded" and url:
+            outcomes[index].update(status="succeeded", url=url)
+        else:
+            outcomes[index].update(status=result.get("status") or "failed", error=result.get("error") or "No output URL in response")
+
+    if any(outcome["status"] != "succeeded" for outcome in outcomes):
+        raise PredictionError(sequence_failure(outcomes, output_path))
+    urls = [outcome["url"] for outcome in outcomes]
+
+    print(f"\nDownloading {len(urls)} clips...")
+    with tempfile.TemporaryDirectory(prefix="pfp-veo-") as work_dir:
+        clips = [os.path.join(work_dir, f"shot_{i:03d}.mp4") for i in range(len(urls))]
+        with ThreadPoolExecutor(max_workers=min(8, len(urls))) as pool:
+            downloads = [pool.submit(get_client().download, url, clip, progress=False) for url, clip in zip(urls, clips)]
+        failed = [url for url, download in zip(urls, downloads) if download.exception()]
+        if failed:
+            raise OutputError("Failed to download clips (download manually):\n" + "\n".join(f"  {url}" for url in failed))
+
+        try:
+            if len(clips) == 1:
+                os.replace(clips[0], output_path)
+            else:
+                concat_videos(clips, output_path)
+        except (MediaError, OSError) as e:
+            raise OutputError(f"Could not join clips: {e}")
+
+    file_size = Path(output_path).stat().st_size / (1024 * 1024)
+    print(f"\nSUCCESS: {total_duration}s video saved to {output_path}")
+    print(f"File size: {file_size:.1f} MB")
+    return output_path
 
 
 def main():
@@ -234,16 +609,33 @@ Prompt tips:
   - Mention audio: "with wind sounds", "upbeat music"
   - Camera movements: "camera slowly zooms in"
 
+Storyboard mode:
+  %(prog)s --storyboard shots.jsonl story.mp4
+
+  One shot per line: {"image": "shot1.png", "prompt": "...", "duration": 8}.
+  Each shot ends on the next shot's image (the last may set "end_image");
+  all shots render in parallel and are joined without re-encoding (requires
+  ffmpeg). --prompt, --duration and --seed are defaults for shots that omit
+  them, and --end-image is the last shot's end frame unless it sets one.
+
+Draft / promote:
+  %(prog)s photo.png drafts/ --draft "waves hello" "nods and smiles" "laughs"
+  %(prog)s final.mp4 --promote drafts/drafts.json 2
+
+  --draft renders each prompt variant at once at 720p, 4s, no audio
+  (~$0.80 each) into the output directory and records prompt, seed and
+  inputs in drafts.json. --promote re-renders the chosen draft with the
+  same prompt, seed and image at --resolution/--duration with audio.
+
 Cost: ~$0.40/sec with audio, ~$0.20/sec without
       8 second video with audio = ~$3.20
 """
     )
 
-    parser.add_argument("image", help="Input image path or URL")
-    parser.add_argument("output", help="Output video path (.mp4)")
+    parser.add_argument("image", nargs="?", help="Input image path or URL")
+    parser.add_argument("output", nargs="?", help="Output video path (.mp4)")
     parser.add_argument(
         "--prompt", "-p",
-        required=True,
         help="Description of what happens in the video"
     )
     parser.add_argument(
@@ -279,8 +671,83 @@ Cost: ~$0.40/sec with audio, ~$0.20/sec without
         "--end-image",
         help="End frame image for transitions"
     )
+    parser.add_argument(
+        "--seed", "-s",
+        type=int,
+        help="Random seed for reproducible results"
+    )
+    parser.add_argument(
+        "--draft",
+        nargs="+",
+        metavar="PROMPT",
+        help="Render a cheap draft per prompt variant into the output directory"
+    )
+    parser.add_argument(
+        "--promote",
+        nargs=2,
+        metavar=("MANIFEST", "N"),
+        help="Re-render draft N from a drafts.json manifest at full settings"
+    )
+    parser.add_argument(
+        "--storyboard",
+        metavar="PATH",
+        help="Render a multi-shot sequence from a JSONL/JSON/CSV storyboard (see Storyboard mode)"
+    )
+    add_result_args(parser)
+    add_webhook_args(parser)
+    add_report_args(parser)
 
     args = parser.parse_args()
+    configure_webhooks(args)
+    configure_results(args)
+    configure_report(args)
+
+    if args.storyboard:
+        # In storyboard mode the only positional argument is the output
+        output = args.output or args.image
+        if not output:
+            parser.error("output is required with --storyboard")
+        animate_sequence(
+            shots=load_storyboard(args.storyboard, args.prompt, args.duration, args.end_image, args.seed),
+            output_path=output,
+            resolution=args.resolution,
+            aspect_ratio=args.aspect,
+            generate_audio=not args.no_audio,
+            reference_images=args.reference,
+        )
+        return
+
+    if args.promote:
+        output = args.output or args.image
+        if not output:
+            parser.error("output is required with --promote")
+        manifest_path, draft_id = args.promote
+        if not draft_id.isdigit():
+            parser.error("--promote N must be a draft number")
+        promote_draft(
+            manifest_path, int(draft_id), output,
+            duration=args.duration,
+            resolution=args.resolution,
+            generate_audio=not args.no_audio,
+        )
+        return
+
+    if args.draft:
+        if not args.image or not args.output:
+            parser.error("image and output directory are required with --draft")
+        render_drafts(
+            input_image=args.image,
+            output_dir=args.output,
+            prompts=args.draft,
+            aspect_ratio=args.aspect,
+            reference_images=args.reference,
+            end_image=args.end_image,
+            seed=args.seed,
+        )
+        return
+
+    if not args.image or not args.output or not args.prompt:
+        parser.error("image, output and --prompt are required")
 
     animate_veo(
         input_image=args.image,
@@ -292,8 +759,9 @@ Cost: ~$0.40/sec with audio, ~$0.20/sec without
         generate_audio=not args.no_audio,
         reference_images=args.reference,
         end_image=args.end_image,
+        seed=args.seed,
     )
 
 
 if __name__ == "__main__":
-    main()
+    run_cli(main)
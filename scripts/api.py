@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (API) - Async entry points for embedding the generators.
+
+Each coroutine runs one generation and returns a Generation (output path,
+model, prediction IDs, elapsed time, whether a stored result was reused and
+any warnings). Failures raise AnimateError subclasses instead of exiting:
+ConfigError, InputError, PredictionError or OutputError. Progress lines go
+to the optional `on_progress` callback; by default nothing is printed.
+Notices from the shared modules (rate-limit pauses, upload fallbacks) are
+logged to the "pfp_animate" logger.
+
+Many generations can run on one event loop: predictions are awaited on the
+shared poller, so concurrency is bounded by the request budgets (see
+governor.py), not by threads.
+
+generate_keyframe needs Pillow and is imported on first use.
+
+Usage:
+    import asyncio
+    from api import generate_kling, generate_veo, InputError
+
+    async def main():
+        return await asyncio.gather(
+            generate_kling("me.png", "nod.mp4", motion="nod"),
+            generate_veo("me.png", "hello.mp4", prompt="waves hello", duration=4),
+        )
+
+    for generation in asyncio.run(main()):
+        print(generation.output_path)
+"""
+
+from animate_audio import generate_audio
+from animate_pfp import generate_kling
+from animate_veo import generate_veo
+from core import AnimateError, ConfigError, Generation, InputError, OutputError, PredictionError
+
+__all__ = [
+    "generate_kling",
+    "generate_keyframe",
+    "generate_veo",
+    "generate_audio",
+    "Generation",
+    "AnimateError",
+    "ConfigError",
+    "InputError",
+    "PredictionError",
+    "OutputError",
+]
+
+
+def __getattr__(name):
+    if name == "generate_keyframe":
+        from animate_keyframe import generate_keyframe
+        return generate_keyframe
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
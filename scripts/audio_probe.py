@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Audio probe) - Read audio durations from container headers.
+
+Durations come from WAV/RF64 chunk sizes, FLAC STREAMINFO, MP3 Xing/Info or
+VBRI headers (or a walk over the MP3 frame headers), MP4/M4A `mvhd` atoms and
+the last Ogg page's granule position. No samples are decoded, so probing
+takes milliseconds even for long files.
+
+URLs are probed with small HTTP Range requests, fetching only the header
+blocks a parser asks for (and, for Ogg, the tail of the file).
+
+Usage:
+    from audio_probe import probe_duration
+
+    seconds = probe_duration("speech.mp3")                 # None if unknown
+    seconds = probe_duration("https://example.com/a.m4a")
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, Optional
+
+from replicate_client import ClientError, get_client
+
+
+# Range requests fetch aligned blocks of this size
+BLOCK_SIZE = 64 * 1024
+# Bytes at the end of an Ogg stream searched for the last page
+OGG_TAIL = 64 * 1024
+
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+
+class FileSource:
+    """Random access to a local file through a read-only memory map."""
+
+    def __init__(self, path: str):
+        self.size = os.path.getsize(path)
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self.data[offset:offset + length]
+
+    def close(self):
+        if self.size:
+            self.data.close()
+        self.file.close()
+
+
+class HTTPSource:
+    """Random access to a URL through cached, block-aligned Range requests."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.size = None
+        self.blocks: Dict[int, bytes] = {}
+        self.fetch(0)
+
+    def fetch(self, index: int) -> bytes:
+        if index not in self.blocks:
+            start = index * BLOCK_SIZE
+            response = get_client().request("GET", self.url, headers={
+                "Range": f"bytes={start}-{start + BLOCK_SIZE - 1}",
+                "Accept-Encoding": "identity",
+            })
+            if response.status == 206:
+                total = response.headers.get("content-range", "").rpartition("/")[2]
+                if total.isdigit():
+                    self.size = int(total)
+                self.blocks[index] = response.body
+            else:
+                # Server ignored the range and sent everything
+                self.size = len(response.body)
+                for i in range(0, max(1, len(response.body)), BLOCK_SIZE):
+                    self.blocks[i // BLOCK_SIZE] = response.body[i:i + BLOCK_SIZE]
+            if self.size is None:
+                self.size = start + len(self.blocks[index])
+        return self.blocks.get(index, b"")
+
+    def read(self, offset: int, length: int) -> bytes:
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b""
+        chunks = [self.fetch(i) for i in range(offset // BLOCK_SIZE, (end - 1) // BLOCK_SIZE + 1)]
+        skip = offset % BLOCK_SIZE
+        return b"".join(chunks)[skip:skip + end - offset]
+
+    def close(self):
+        self.blocks.clear()
+
+
+def skip_id3(source) -> int:
+    """Return the offset just past any leading ID3v2 tag."""
+    header = source.read(0, 10)
+    if len(header) == 10 and header[:3] == b"ID3":
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        footer = 10 if header[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def wav_duration(source) -> Optional[float]:
+    """Duration of a RIFF/RF64 WAVE file from its fmt and data chunks."""
+    offset = 12
+    byte_rate = None
+    data_size = None
+    ds64_data_size = None
+    while offset + 8 <= source.size:
+        chunk_id, size = struct.unpack("<4sI", source.read(offset, 8))
+        body = offset + 8
+        if chunk_id == b"ds64":
+            ds64_data_size = struct.unpack("<Q", source.read(body + 8, 8))[0]
+        elif chunk_id == b"fmt ":
+            channels, sample_rate, byte_rate, block_align, bits = struct.unpack("<HIIHH", source.read(body + 2, 14))
+            if not byte_rate:
+                byte_rate = sample_rate * (block_align or channels * bits // 8)
+        elif chunk_id == b"data":
+            if size == 0xFFFFFFFF and ds64_data_size is not None:
+                size = ds64_data_size
+            # Streamed WAVs may leave the size unset or too large
+            data_size = min(size, source.size - body) if size else source.size - body
+            break
+        offset = body + size + (size & 1)
+    if byte_rate and data_size is not None:
+        return data_size / byte_rate
+    return None
+
+
+def flac_duration(source, offset: int) -> Optional[float]:
+    """Duration of a FLAC stream from its STREAMINFO block."""
+    info = source.read(offset + 4 + 4 + 10, 8)
+    if len(info) < 8:
+        return None
+    packed = int.from_bytes(info, "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def mp3_frame(header: bytes) -> Optional[dict]:
+    """Decode a 4-byte MPEG audio frame header, or None if it is not one."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = {3: 1, 2: 2, 0: 2.5}.get((header[1] >> 3) & 3)
+    layer = {3: 1, 2: 2, 1: 3}.get((header[1] >> 1) & 3)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return {
+        "version": version,
+        "mono": header[3] >> 6 == 3,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "samples": samples,
+        "length": length,
+    }
+
+
+def mp3_duration(source, offset: int) -> Optional[float]:
+    """Duration of an MP3 from its Xing/Info or VBRI header, or its frame headers."""
+    # Find the first frame whose successor is also a valid frame
+    window = source.read(offset, BLOCK_SIZE)
+    first = None
+    for i in range(len(window) - 4):
+        frame = mp3_frame(window[i:i + 4])
+        if frame and mp3_frame(source.read(offset + i + frame["length"], 4)):
+            offset += i
+            first = frame
+            break
+    if first is None:
+        return None
+
+    side_info = (17 if first["mono"] else 32) if first["version"] == 1 else (9 if first["mono"] else 17)
+    xing = source.read(offset + 4 + side_info, 12)
+    if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 1:
+        frames = struct.unpack(">I", xing[8:12])[0]
+        return frames * first["samples"] / first["sample_rate"]
+    vbri = source.read(offset + 4 + 32, 18)
+    if vbri[:4] == b"VBRI":
+        frames = struct.unpack(">I", vbri[14:18])[0]
+        return frames * first["samples"] / first["sample_rate"]
+
+    if isinstance(source, HTTPSource):
+        # Walking every frame would download the file; assume constant bitrate
+        return (source.size - offset) * 8 / first["bitrate"]
+
+    duration = 0.0
+    while offset + 4 <= source.size:
+        frame = mp3_frame(source.read(offset, 4))
+        if frame is None:
+            break  # trailing ID3v1/APE tag or garbage
+        duration += frame["samples"] / frame["sample_rate"]
+        offset += frame["length"]
+    return duration
+
+
+def mp4_duration(source) -> Optional[float]:
+    """Duration of an MP4/M4A file from the movie header (moov/mvhd)."""
+
+    def atoms(start: int, end: int):
+        offset = start
+        while offset + 8 <= end:
+            size, kind = struct.unpack(">I4s", source.read(offset, 8))
+            header = 8
+            if size == 1:
+                size = struct.unpack(">Q", source.read(offset + 8, 8))[0]
+                header = 16
+            elif size == 0:
+                size = end - offset
+            if size < header:
+                return
+            yield kind, offset + header, offset + size
+            offset += size
+
+    for kind, body, end in atoms(0, source.size):
+        if kind != b"moov":
+            continue
+        for child, child_body, _ in atoms(body, end):
+            if child != b"mvhd":
+                continue
+            version = source.read(child_body, 1)
+            if version == b"\x01":
+                timescale, duration = struct.unpack(">IQ", source.read(child_body + 20, 12))
+            else:
+                timescale, duration = struct.unpack(">II", source.read(child_body + 12, 8))
+            return duration / timescale if timescale else None
+    return None
+
+
+def ogg_duration(source) -> Optional[float]:
+    """Duration of an Ogg Vorbis/Opus stream from its last granule position."""
+    segments = source.read(26, 1)
+    if not segments:
+        return None
+    packet = source.read(27 + segments[0], 20)
+    if packet[:7] == b"\x01vorbis":
+        sample_rate = struct.unpack("<I", packet[12:16])[0]
+        pre_skip = 0
+    elif packet[:8] == b"OpusHead":
+        sample_rate = 48000
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+    else:
+        return None
+
+    start = max(0, source.size - OGG_TAIL)
+    tail = source.read(start, source.size - start)
+    page = tail.rfind(b"OggS")
+    while page != -1:
+        granule = struct.unpack("<q", tail[page + 6:page + 14])[0] if page + 14 <= len(tail) else -1
+        if granule >= 0:
+            return max(0, granule - pre_skip) / sample_rate if sample_rate else None
+        page = tail.rfind(b"OggS", 0, page)
+    return None
+
+
+def probe(source) -> Optional[float]:
+    """Dispatch on the container's magic bytes."""
+    head = source.read(0, 12)
+    if head[:4] in (b"RIFF", b"RF64") and head[8:12] == b"WAVE":
+        return wav_duration(source)
+    if head[:4] == b"OggS":
+        return ogg_duration(source)
+    if head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide"):
+        return mp4_duration(source)
+    offset = skip_id3(source)
+    if source.read(offset, 4) == b"fLaC":
+        return flac_duration(source, offset)
+    return mp3_duration(source, offset)
+
+
+def probe_duration(path_or_url: str) -> Optional[float]:
+    """Return an audio file's duration in seconds, or None if it can't be determined."""
+    try:
+        if path_or_url.startswith(("http://", "https://")):
+            source = HTTPSource(path_or_url)
+        else:
+            source = FileSource(path_or_url)
+    except (OSError, ClientError):
+        return None
+    try:
+        return probe(source)
+    except (struct.error, ClientError, ValueError, KeyError):
+        return None
+    finally:
+        source.close()
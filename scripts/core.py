@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Core) - Errors, results and async plumbing shared by the generators.
+
+The generators raise the AnimateError subclasses below instead of exiting, and
+their async entry points return a Generation describing what was made. The
+CLIs are thin wrappers that print progress, and turn these errors into an
+`ERROR:` line and exit status 1 (see run_cli).
+
+Warnings and notices from the shared modules (rate limits, upload fallbacks)
+go to the "pfp_animate" logger; the CLIs print them like their own output.
+
+Async code never holds a thread while a prediction runs: waits are futures
+from the shared poller, and only short blocking steps (uploads, create
+requests, downloads, encoding) borrow a worker thread via asyncio.to_thread.
+
+Usage:
+    from core import InputError, Generation, require_token, watch_prediction
+
+    prediction = await asyncio.to_thread(create_prediction, input_data)
+    result = await watch_prediction(prediction, MODEL, timeout=600)
+"""
+
+import asyncio
+import logging
+import os
+import sys
+from typing import Callable, List, Optional
+
+from poller import get_poller
+
+
+class AnimateError(Exception):
+    """Base class for errors raised by the generators."""
+
+
+class ConfigError(AnimateError):
+    """The environment is not set up: missing API token or tool (e.g. ffmpeg)."""
+
+
+class InputError(AnimateError):
+    """An input file or option is missing, unreadable or unsupported."""
+
+
+class PredictionError(AnimateError):
+    """A prediction could not be created, or finished without succeeding."""
+
+    def __init__(self, message: str, prediction_id: str = None, status: str = None):
+        super().__init__(message)
+        self.prediction_id = prediction_id
+        self.status = status
+
+
+class OutputError(AnimateError):
+    """A prediction succeeded but its output could not be saved."""
+
+    def __init__(self, message: str, url: str = None):
+        super().__init__(message)
+        self.url = url
+
+
+class Generation:
+    """What a generator produced: the saved file and how it got there."""
+
+    def __init__(
+        self,
+        output_path: str,
+        model: str,
+        prediction_ids: List[str] = None,
+        elapsed: float = 0.0,
+        reused: bool = False,
+        warnings: List[str] = None,
+    ):
+        self.output_path = output_path
+        self.model = model
+        self.prediction_ids = prediction_ids or []
+        self.elapsed = elapsed
+        self.reused = reused  # copied from a stored result, no prediction made
+        self.warnings = warnings or []
+
+    def as_dict(self) -> dict:
+        return {
+            "output_path": self.output_path,
+            "model": self.model,
+            "prediction_ids": self.prediction_ids,
+            "elapsed": round(self.elapsed, 1),
+            "reused": self.reused,
+            "warnings": self.warnings,
+        }
+
+    def __repr__(self):
+        return f"Generation({self.output_path!r}, model={self.model!r}, reused={self.reused})"
+
+
+def require_token() -> str:
+    """Return REPLICATE_API_TOKEN, or raise ConfigError if it is not set."""
+    token = os.environ.get("REPLICATE_API_TOKEN")
+    if not token:
+        raise ConfigError(
+            "REPLICATE_API_TOKEN environment variable not set. "
+            "Get your token at: https://replicate.com/account/api-tokens"
+        )
+    return token
+
+
+def quiet(message: str):
+    """Default progress callback for library use: report nothing."""
+
+
+async def watch_prediction(prediction: dict, model: str, timeout: float, on_status: Callable = None) -> dict:
+    """Await a prediction's final state from the shared poller."""
+    return await asyncio.wrap_future(get_poller().watch(prediction, model, timeout, on_status=on_status))
+
+
+def succeeded_output(result: dict, output_of: Callable[[dict], Optional[str]]) -> str:
+    """Return the output URL of a finished prediction, or raise PredictionError/OutputError."""
+    status = result.get("status")
+    if status != "succeeded":
+        raise PredictionError(
+            f"Generation failed: {result.get('error') or status or 'Unknown error'}",
+            result.get("id"), status,
+        )
+    url = output_of(result)
+    if not url:
+        raise OutputError("No output URL in response")
+    return url
+
+
+class ConsoleHandler(logging.Handler):
+    """Print log records to the current sys.stdout, warnings prefixed "Warning:"."""
+
+    def emit(self, record: logging.LogRecord):
+        message = record.getMessage()
+        print(f"Warning: {message}" if record.levelno >= logging.WARNING else message)
+
+
+def log_to_console():
+    """Show the shared modules' log messages on stdout (for the CLIs)."""
+    logger = logging.getLogger("pfp_animate")
+    if not any(isinstance(handler, ConsoleHandler) for handler in logger.handlers):
+        logger.addHandler(ConsoleHandler())
+    logger.setLevel(logging.INFO)
+
+
+def run_cli(main: Callable[[], None]):
+    """Run a script's main(), printing AnimateErrors as ERROR lines and exiting 1."""
+    log_to_console()
+    try:
+        main()
+    except AnimateError as e:
+        print(f"ERROR: {e}")
+        if isinstance(e, OutputError) and e.url:
+            print(f"Video URL (download manually): {e.url}")
+        sys.exit(1)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Cache) - Size-capped, content-addressed on-disk cache.
+
+Entries are stored as one file per key under the cache directory. Reads bump
+the file's atime, so eviction drops the least recently used entries first
+once the directory grows past its size cap. The mtime keeps the time an entry
+was written; caches created with a `max_age` treat older entries as misses.
+
+Default location: ~/.cache/pfp-animate (override with PFP_ANIMATE_CACHE_DIR).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("PFP_ANIMATE_CACHE_DIR", Path.home() / ".cache" / "pfp-animate")
+)
+DEFAULT_MAX_MB = 500
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the sha256 hex digest of raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the sha256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(*parts: Any) -> str:
+    """Build a cache key from JSON-serializable parts (dict order ignored)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """On-disk LRU cache mapping string keys to files.
+
+    Thread-safe within a process; writes are atomic (temp file + rename) so
+    concurrent processes never observe partial entries.
+    """
+
+    def __init__(self, directory: Path, max_mb: float = DEFAULT_MAX_MB, suffix: str = "", max_age: float = None):
+        self.directory = Path(directory)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.suffix = suffix
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        """Return the file path an entry with `key` is stored at."""
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the path of a cached entry, or None on a miss."""
+        path = self.path_for(key)
+        with self.lock:
+            try:
+                written = path.stat().st_mtime
+                if self.expired(written):
+                    os.unlink(path)
+                    raise FileNotFoundError(path)
+                os.utime(path, (time.time(), written))  # mark as recently used
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return path
+
+    def expired(self, written: float) -> bool:
+        """Whether an entry written at `written` is past the cache's max_age."""
+        return self.max_age is not None and time.time() - written > self.max_age
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Return the contents of a cached entry, or None on a miss."""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:  # evicted by another process
+            return None
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Store `data` under `key`, evicting old entries if over the cap."""
+        path = self.path_for(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self.evict()
+        return path
+
+    def put_file(self, key: str, source: str) -> Path:
+        """Move an existing file into the cache under `key`."""
+        path = self.path_for(key)
+        os.replace(source, path)
+        self.evict()
+        return path
+
+    def copy_file(self, key: str, source: str) -> Path:
+        """Copy an existing file into the cache under `key`, leaving it in place."""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return self.put_file(key, tmp)
+
+    def evict(self):
+        """Delete expired entries, then least recently used ones until under the size cap."""
+        with self.lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.is_file() or entry.name.startswith(".tmp-"):
+                    continue
+                stat = entry.stat()
+                if self.expired(stat.st_mtime):
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+                    self.evictions += 1
+                    continue
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
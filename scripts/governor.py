@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Governor) - Request budgets shared by every process on the host.
+
+Every request the shared client sends to the Replicate API first takes a
+token from one or more buckets: `create` for prediction creates, `api` for
+everything else (polls, uploads), and `model:<owner/name>` for creates of a
+model that has its own budget. Bucket state lives in one small file per API
+token under the cache directory and is updated under an exclusive file lock,
+so parallel scripts, batch workers and the job server all draw from the same
+budgets instead of each assuming it has the account to itself.
+
+A 429 pauses the affected buckets for every process until its Retry-After
+(or the client's backoff) has passed, and `X-RateLimit-Remaining: 0` with
+`X-RateLimit-Reset` pauses them until the reset time.
+
+Budgets are requests per minute with a burst size. Override or add them with
+PFP_ANIMATE_RATE_LIMITS, e.g. "create=6/1,google/veo-3.1=20/5". A request
+can also carry its own `budget` for its model bucket, so callers with
+different limits (e.g. jobs in the server) don't overwrite each other's.
+
+Async callers can take the tokens with `acquire_async()` and hand the
+buckets to the client's request (`acquired=`), so waiting for a token
+doesn't hold an executor thread.
+
+Usage:
+    from governor import get_governor
+
+    buckets = get_governor().acquire("POST", url)   # blocks until allowed
+    get_governor().observe(buckets, headers)
+
+    buckets = await get_governor().acquire_async("POST", url, model, budget=(60, 10))
+"""
+
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from disk_cache import DEFAULT_CACHE_DIR, hash_bytes
+
+try:
+    import fcntl
+except ImportError:  # Windows: budgets are shared between threads only
+    fcntl = None
+
+
+# Replicate's documented limits: 600 creates/min and 3000 other requests/min per account
+DEFAULT_BUDGETS: Dict[str, Tuple[float, int]] = {
+    "create": (600.0, 60),
+    "api": (3000.0, 300),
+}
+# Longest single sleep while waiting, so new budgets and pauses are picked up
+MAX_SLEEP = 5.0
+
+PREDICTIONS_PATH = re.compile(r"/(?:models/([^/]+/[^/]+)/)?predictions$")
+
+
+def parse_budgets(spec: str) -> Dict[str, Tuple[float, int]]:
+    """Parse "name=RATE[/BURST],..." into {bucket: (rate_per_min, burst)}.
+
+    Names other than `create` and `api` are model names.
+    """
+    budgets = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, value = item.partition("=")
+        rate, _, burst = value.partition("/")
+        try:
+            rate_per_min = float(rate)
+            burst_size = int(burst) if burst else max(1, int(rate_per_min / 10))
+        except ValueError:
+            raise ValueError(f"Bad rate limit '{item}' (expected NAME=RATE[/BURST])")
+        if rate_per_min <= 0:
+            raise ValueError(f"Rate limit for {name} must be positive")
+        bucket = name if name in DEFAULT_BUDGETS else f"model:{name}"
+        budgets[bucket] = (rate_per_min, max(1, burst_size))
+    return budgets
+
+
+def reset_delay(headers: Dict[str, str], now: float) -> Optional[float]:
+    """Seconds until an exhausted X-RateLimit budget resets, if the headers say so."""
+    if headers.get("x-ratelimit-remaining") != "0":
+        return None
+    try:
+        reset = float(headers.get("x-ratelimit-reset", ""))
+    except ValueError:
+        return None
+    # Either seconds from now or a Unix timestamp
+    return max(0.0, reset - now) if reset > 1e9 else reset
+
+
+class Governor:
+    """Token buckets and pauses for one API token, shared through a locked file."""
+
+    def __init__(self, token: str = None, directory: Path = None, budgets: Dict[str, Tuple[float, int]] = None):
+        directory = Path(directory) if directory else DEFAULT_CACHE_DIR / "governor"
+        directory.mkdir(parents=True, exist_ok=True)
+        name = hash_bytes((token or "").encode("utf-8"))[:16]
+        self.path = directory / f"{name}.json"
+        self.lock_path = directory / f"{name}.lock"
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.budgets.update(budgets if budgets is not None else parse_budgets(os.environ.get("PFP_ANIMATE_RATE_LIMITS")))
+        self.local = threading.Lock()
+        self.memory = {}  # state when file locking is unavailable
+
+    def set_budget(self, name: str, rate_per_min: float, burst: int = 1):
+        """Set the budget for `create`, `api` or a model name."""
+        if rate_per_min <= 0:
+            raise ValueError("rate_per_min must be positive")
+        bucket = name if name in DEFAULT_BUDGETS else f"model:{name}"
+        self.budgets[bucket] = (float(rate_per_min), max(1, int(burst)))
+
+    def buckets_for(self, method: str, url: str, model: str = None, budget: Tuple[float, int] = None) -> List[str]:
+        """Buckets a request to `url` draws from."""
+        match = PREDICTIONS_PATH.search(url.split("?")[0])
+        if method != "POST" or not match:
+            return ["api"]
+        model = model or match.group(1)
+        buckets = ["create"]
+        if model and (budget or f"model:{model}" in self.budgets):
+            buckets.append(f"model:{model}")
+        return buckets
+
+    def budgets_for(self, buckets: List[str], budget: Tuple[float, int] = None) -> Dict[str, Tuple[float, int]]:
+        """The budgets that apply, with `budget` replacing the model bucket's."""
+        budgets = dict(self.budgets)
+        model_buckets = [bucket for bucket in buckets if bucket.startswith("model:")]
+        if budget and model_buckets:
+            rate_per_min, burst = budget
+            if rate_per_min <= 0:
+                raise ValueError("rate_per_min must be positive")
+            budgets[model_buckets[0]] = (float(rate_per_min), max(1, int(burst)))
+        return budgets
+
+    @contextmanager
+    def state(self):
+        """Yield the shared state dict, holding the lock and saving it afterwards."""
+        with self.local:
+            if fcntl is None:
+                yield self.memory
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    with open(self.path) as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {}
+                yield state
+                fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+                with os.fdopen(fd, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.path)
+
+    def acquire(self, method: str, url: str, model: str = None, budget: Tuple[float, int] = None) -> List[str]:
+        """Block until every bucket for the request has a token, then take them.
+
+        `budget` is (rate_per_min, burst) for the model's bucket on this call
+        only. Returns the buckets, for passing to observe().
+        """
+        buckets = self.buckets_for(method, url, model, budget)
+        budgets = self.budgets_for(buckets, budget)
+        while True:
+            with self.state() as state:
+                wait = self.try_take(state, buckets, time.time(), budgets)
+            if wait <= 0:
+                return buckets
+            time.sleep(min(wait, MAX_SLEEP))
+
+    async def acquire_async(self, method: str, url: str, model: str = None, budget: Tuple[float, int] = None) -> List[str]:
+        """acquire() for asyncio code: waits with asyncio.sleep instead of blocking a thread.
+
+        Only the brief locked state update runs in a worker thread.
+        """
+        buckets = self.buckets_for(method, url, model, budget)
+        budgets = self.budgets_for(buckets, budget)
+
+        def take() -> float:
+            with self.state() as state:
+                return self.try_take(state, buckets, time.time(), budgets)
+
+        while True:
+            wait = await asyncio.to_thread(take)
+            if wait <= 0:
+                return buckets
+            await asyncio.sleep(min(wait, MAX_SLEEP))
+
+    def try_take(self, state: dict, buckets: List[str], now: float, budgets: Dict[str, Tuple[float, int]] = None) -> float:
+        """Take a token from each bucket, or return how long to wait first."""
+        budgets = budgets or self.budgets
+        paused = state.setdefault("paused", {})
+        tokens = state.setdefault("tokens", {})
+        wait = max((paused.get(bucket, 0) - now for bucket in buckets), default=0)
+        if wait > 0:
+            return wait
+
+        levels = {}
+        for bucket in buckets:
+            if bucket not in budgets:
+                continue
+            rate_per_min, burst = budgets[bucket]
+            level, updated = tokens.get(bucket, (burst, now))
+            level = min(burst, level + max(0.0, now - updated) * rate_per_min / 60)
+            levels[bucket] = level
+            if level < 1:
+                wait = max(wait, (1 - level) * 60 / rate_per_min)
+        if wait > 0:
+            return wait
+        for bucket, level in levels.items():
+            tokens[bucket] = (level - 1, now)
+        return 0
+
+    def pause(self, buckets: List[str], seconds: float):
+        """Hold back every process's requests on `buckets` for `seconds`."""
+        with self.state() as state:
+            paused = state.setdefault("paused", {})
+            until = time.time() + seconds
+            for bucket in buckets:
+                paused[bucket] = max(paused.get(bucket, 0), until)
+
+    def observe(self, buckets: List[str], headers: Dict[str, str]):
+        """Pause `buckets` if the response says the budget is exhausted."""
+        delay = reset_delay(headers, time.time())
+        if delay:
+            self.pause(buckets, delay)
+
+
+_governors: Dict[str, Governor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(token: str = None) -> Governor:
+    """Return the process-wide governor for an API token."""
+    with _governors_lock:
+        if token not in _governors:
+            _governors[token] = Governor(token)
+        return _governors[token]
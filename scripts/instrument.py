@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Instrumentation) - Per-phase timing spans and run reports.
+
+The shared modules record a span for every phase of a run: input upload,
+prediction create, queue wait and model run (from the prediction's own
+timestamps and metrics), download (with bytes and throughput) and local
+encoding. Spans are only kept once a report is requested, and then only
+the most recent MAX_SPANS, so long-running processes (the job server) stay
+bounded. With --report, a summary is written when the script exits:
+
+    --report run.json    JSON: every span plus count/sum/p50/p95/max per phase
+    --report run.prom    OpenMetrics text: summaries labelled by phase and model
+
+Usage:
+    from instrument import record_span, span
+
+    with span("encode", format="gif"):
+        ...
+    record_span("queue_wait", 3.2, model="google/veo-3.1")
+"""
+
+import argparse
+import atexit
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# Spans kept for the report; older ones are dropped past this many
+MAX_SPANS = 10000
+
+_spans: deque = deque(maxlen=MAX_SPANS)
+_recording = False
+_lock = threading.Lock()
+_run_started = time.time()
+
+
+def record_span(phase: str, seconds: float, start: float = None, **attrs):
+    """Record a finished phase lasting `seconds` (attrs become report labels)."""
+    if not _recording:
+        return
+    entry = {
+        "phase": phase,
+        "start": round(start if start is not None else time.time() - seconds, 3),
+        "seconds": round(max(0.0, seconds), 4),
+        **{key: value for key, value in attrs.items() if value is not None},
+    }
+    with _lock:
+        _spans.append(entry)
+
+
+@contextmanager
+def span(phase: str, **attrs):
+    """Time the enclosed block as one span; yields a dict for extra attrs."""
+    extra: Dict = {}
+    start = time.time()
+    try:
+        yield extra
+    except BaseException:
+        extra["error"] = True
+        raise
+    finally:
+        record_span(phase, time.time() - start, start, **attrs, **extra)
+
+
+def parse_timestamp(value: str) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def record_prediction(prediction: dict, model: str):
+    """Record queue wait and model run time from a finished prediction."""
+    created = parse_timestamp(prediction.get("created_at"))
+    started = parse_timestamp(prediction.get("started_at"))
+    completed = parse_timestamp(prediction.get("completed_at"))
+    status = prediction.get("status")
+    if created and started:
+        record_span("queue_wait", started - created, created, model=model)
+    predict_time = (prediction.get("metrics") or {}).get("predict_time")
+    if predict_time is None and started and completed:
+        predict_time = completed - started
+    if predict_time is not None:
+        record_span("model_run", predict_time, started, model=model, status=status)
+
+
+def spans() -> List[dict]:
+    with _lock:
+        return list(_spans)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(fraction * 100) - 1]
+
+
+def summarize(entries: List[dict]) -> Dict[str, dict]:
+    """Per-phase count, total and latency percentiles."""
+    by_phase: Dict[str, List[dict]] = {}
+    for entry in entries:
+        by_phase.setdefault(entry["phase"], []).append(entry)
+
+    summary = {}
+    for phase, items in sorted(by_phase.items()):
+        seconds = sorted(item["seconds"] for item in items)
+        stats = {
+            "count": len(seconds),
+            "sum": round(sum(seconds), 3),
+            "p50": round(percentile(seconds, 0.50), 3),
+            "p95": round(percentile(seconds, 0.95), 3),
+            "max": round(seconds[-1], 3),
+        }
+        sizes = [item["bytes"] for item in items if "bytes" in item]
+        if sizes:
+            stats["bytes"] = sum(sizes)
+            stats["bytes_per_second"] = round(sum(sizes) / max(stats["sum"], 1e-6))
+        summary[phase] = stats
+    return summary
+
+
+def openmetrics(entries: List[dict]) -> str:
+    """Render spans as OpenMetrics summaries, one series per (phase, model)."""
+    series: Dict[tuple, List[float]] = {}
+    for entry in entries:
+        series.setdefault((entry["phase"], entry.get("model", "")), []).append(entry["seconds"])
+
+    lines = [
+        "# TYPE pfp_animate_phase_seconds summary",
+        "# UNIT pfp_animate_phase_seconds seconds",
+        "# HELP pfp_animate_phase_seconds Time spent per phase of a run.",
+    ]
+    for (phase, model), values in sorted(series.items()):
+        values.sort()
+        labels = f'phase="{phase}"' + (f',model="{model}"' if model else "")
+        for quantile in (0.5, 0.95):
+            lines.append(f'pfp_animate_phase_seconds{{{labels},quantile="{quantile}"}} {percentile(values, quantile):.4f}')
+        lines.append(f"pfp_animate_phase_seconds_sum{{{labels}}} {sum(values):.4f}")
+        lines.append(f"pfp_animate_phase_seconds_count{{{labels}}} {len(values)}")
+
+    downloaded = sum(entry.get("bytes", 0) for entry in entries if entry["phase"] == "download")
+    lines += [
+        "# TYPE pfp_animate_download_bytes counter",
+        "# HELP pfp_animate_download_bytes Bytes downloaded during the run.",
+        f"pfp_animate_download_bytes_total {downloaded}",
+        "# EOF",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path: str):
+    """Write the run report; OpenMetrics for .prom/.txt paths, JSON otherwise."""
+    entries = spans()
+    if path.endswith((".prom", ".txt")):
+        text = openmetrics(entries)
+    else:
+        text = json.dumps({
+            "script": os.path.basename(sys.argv[0]),
+            "argv": sys.argv[1:],
+            "started": datetime.fromtimestamp(_run_started).astimezone().isoformat(),
+            "wall_seconds": round(time.time() - _run_started, 3),
+            "summary": summarize(entries),
+            "spans": entries,
+        }, indent=2)
+    with open(path, "w") as f:
+        f.write(text)
+    print(f"Report written to {path}")
+
+
+def add_report_args(parser: argparse.ArgumentParser):
+    """Add the shared --report option to a script's argument parser."""
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="Write per-phase timings on exit (JSON, or OpenMetrics for .prom/.txt)"
+    )
+
+
+def start_recording():
+    """Keep spans from now on (configure_report does this for --report)."""
+    global _recording
+    _recording = True
+
+
+def configure_report(args: argparse.Namespace):
+    """Record spans and write the report when the script exits, if --report was given."""
+    if args.report:
+        start_recording()
+        atexit.register(write_report, args.report)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Journal) - Crash-safe record of predictions made during a run.
+
+Multi-frame and batch runs append one JSON line per event to a journal file
+as it happens: the prediction ID when a job is submitted, its final status
+and output URL when it finishes, and the local path once the output is
+saved. Each line is flushed and fsynced before the run moves on, so after
+a crash or Ctrl-C the journal holds everything that was paid for.
+
+With --resume, a run replays its journal first: jobs whose output was
+already saved are skipped, and jobs with a recorded prediction are
+reattached to it (polled, or re-downloaded) instead of being resubmitted.
+Failed predictions are submitted again. The journal is deleted once every
+job in the run has succeeded.
+
+Usage:
+    from journal import Journal
+
+    journal = Journal("out.gif.journal.jsonl", resume=True)
+    prediction = journal.reattach(key) or create_prediction(...)
+    journal.record(key, prediction_id=prediction["id"], status=prediction["status"])
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+# Recorded when a resumed prediction's output can no longer be downloaded
+EXPIRED = "expired"
+# Statuses after which a prediction is resubmitted rather than reattached
+RETRY_STATUSES = {"failed", "canceled", EXPIRED}
+
+
+class Journal:
+    """Append-only JSONL journal of per-job prediction state, keyed by job."""
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        if resume and os.path.exists(path):
+            self.load()
+        elif os.path.exists(path):
+            os.unlink(path)
+        self.file = open(path, "a")
+        if self.file.tell() and not self.ends_with_newline():
+            # The last write was cut off by a crash; start on a fresh line
+            self.file.write("\n")
+
+    def load(self):
+        """Replay the journal; later lines update earlier ones for the same key."""
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # partial line from an interrupted write
+                key = event.pop("key", None)
+                if key:
+                    self.apply(key, event)
+
+    def apply(self, key: str, fields: dict):
+        entry = self.entries.setdefault(key, {})
+        if fields.get("prediction_id") not in (None, entry.get("prediction_id")):
+            entry.clear()  # a new prediction replaces everything known about the old one
+        entry.update(fields)
+
+    def ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def record(self, key: str, **fields):
+        """Durably append an event for `key` (None values are dropped)."""
+        fields = {name: value for name, value in fields.items() if value is not None}
+        line = json.dumps({"key": key, **fields, "time": round(time.time(), 3)})
+        with self.lock:
+            self.apply(key, fields)
+            self.file.write(line + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.lock:
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    def saved(self, key: str) -> Optional[str]:
+        """Local path of a job's saved output, if it is still on disk."""
+        entry = self.get(key)
+        path = entry and entry.get("saved")
+        return path if path and os.path.exists(path) else None
+
+    def reattach(self, key: str) -> Optional[dict]:
+        """The recorded prediction for `key` to resume, or None to submit a new one.
+
+        The returned dict carries the prediction's ID and last known status
+        (plus output when it had succeeded), which is enough for the poller
+        to pick it up again.
+        """
+        entry = self.get(key)
+        if not entry or not entry.get("prediction_id") or entry.get("status") in RETRY_STATUSES:
+            return None
+        if entry.get("status") == "succeeded" and not entry.get("output"):
+            return None
+        prediction = {"id": entry["prediction_id"], "status": entry.get("status") or "starting"}
+        if entry.get("output"):
+            prediction["output"] = entry["output"]
+        return prediction
+
+    def close(self, remove: bool = False):
+        """Close the journal, deleting it when the run needs no resuming."""
+        with self.lock:
+            self.file.close()
+        if remove:
+            os.unlink(self.path)
+
+
+def add_journal_args(parser: argparse.ArgumentParser):
+    """Add the shared --resume/--journal options to a script's argument parser."""
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse saved outputs and reattach to predictions recorded by an interrupted run"
+    )
+    parser.add_argument(
+        "--journal",
+        metavar="PATH",
+        help=f"Journal file (default: the output or manifest path + {JOURNAL_SUFFIX})"
+    )
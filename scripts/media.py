@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Media) - ffmpeg helpers for splitting audio and joining clips.
+
+Long audio is cut at pauses found with ffmpeg's silencedetect filter, so
+each piece fits a model's length limit without splitting a word. Rendered
+clips are joined with the concat demuxer and stream copy (no re-encode),
+which requires every clip to share codec parameters - true for clips made
+by the same model.
+
+Usage:
+    from media import concat_videos, detect_silences, plan_segments, split_audio
+
+    segments = plan_segments(duration, detect_silences("talk.mp3"), max_length=34)
+    pieces = split_audio("talk.mp3", segments, "/tmp/pieces")
+    concat_videos(["a.mp4", "b.mp4"], "joined.mp4")
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from typing import List, Tuple
+
+from instrument import span
+
+
+# silencedetect thresholds: level counted as silence, and shortest pause used
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.3
+# Never cut closer than this to the previous cut when a pause is available
+MIN_SEGMENT_SECONDS = 5.0
+
+
+class MediaError(Exception):
+    """Raised when ffmpeg is missing or fails."""
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def run_ffmpeg(args: List[str]) -> str:
+    """Run ffmpeg with `args` and return its stderr output."""
+    if not ffmpeg_available():
+        raise MediaError("ffmpeg not found (install it, e.g. `brew install ffmpeg`)")
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostdin", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        details = result.stderr.strip().splitlines()[-1:] or ["no output"]
+        raise MediaError(f"ffmpeg exited with code {result.returncode}: {details[0]}")
+    return result.stderr
+
+
+def detect_silences(
+    source: str,
+    noise_db: float = SILENCE_NOISE_DB,
+    min_seconds: float = SILENCE_MIN_SECONDS,
+) -> List[Tuple[float, float]]:
+    """Return (start, end) times of the pauses in an audio file or URL."""
+    with span("silence_detect"):
+        log = run_ffmpeg([
+            "-i", source,
+            "-af", f"silencedetect=noise={noise_db}dB:d={min_seconds}",
+            "-vn", "-f", "null", "-",
+        ])
+    starts = [float(v) for v in re.findall(r"silence_start: (-?[\d.]+)", log)]
+    ends = [float(v) for v in re.findall(r"silence_end: (-?[\d.]+)", log)]
+    return [(max(0.0, start), end) for start, end in zip(starts, ends)]
+
+
+def plan_segments(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    max_length: float,
+    min_length: float = MIN_SEGMENT_SECONDS,
+) -> List[Tuple[float, float]]:
+    """Split [0, duration] into pieces of at most `max_length` seconds.
+
+    Each cut is placed in the middle of the last pause that keeps the piece
+    under the limit; with no usable pause the piece is cut at the limit.
+    """
+    pauses = [(start + end) / 2 for start, end in silences]
+    segments = []
+    start = 0.0
+    while duration - start > max_length:
+        candidates = [p for p in pauses if start + min_length < p <= start + max_length]
+        cut = max(candidates) if candidates else start + max_length
+        segments.append((start, cut))
+        start = cut
+    segments.append((start, duration))
+    return segments
+
+
+def split_audio(source: str, segments: List[Tuple[float, float]], output_dir: str) -> List[str]:
+    """Cut `source` into one WAV file per (start, end) segment."""
+    paths = []
+    for index, (start, end) in enumerate(segments):
+        path = os.path.join(output_dir, f"segment_{index:03d}.wav")
+        with span("split_audio"):
+            run_ffmpeg([
+                "-y", "-loglevel", "error",
+                "-ss", f"{start:.3f}", "-i", source, "-t", f"{end - start:.3f}",
+                "-vn", "-c:a", "pcm_s16le",
+                path,
+            ])
+        paths.append(path)
+    return paths
+
+
+def concat_videos(paths: List[str], output_path: str):
+    """Join clips end to end with stream copy (no re-encode)."""
+    fd, list_path = tempfile.mkstemp(suffix=".txt", prefix="concat-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        with span("concat", clips=len(paths)):
+            run_ffmpeg([
+                "-y", "-loglevel", "error",
+                "-f", "concat", "-safe", "0", "-i", list_path,
+                "-c", "copy", "-movflags", "+faststart",
+                output_path,
+            ])
+    finally:
+        os.unlink(list_path)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Pipeline) - Run batch jobs through overlapping stages.
+
+Each stage has its own worker threads, and stages are connected by bounded
+queues. A stage only picks up a new job while the next stage has room for
+its output, so a slow stage holds back the ones before it (backpressure)
+instead of letting work pile up. Throughput is bounded by the slowest stage
+rather than by the sum of all stages.
+
+Usage:
+    from pipeline import Stage, run_pipeline
+
+    run_pipeline(jobs, [
+        Stage("tts", make_audio, workers=4),
+        Stage("render", render, workers=8),
+        Stage("download", download, workers=4),
+    ], on_error=lambda job, stage, error: ...)
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, List
+
+
+class Stage:
+    """One pipeline step: `func(job)` returns the job passed to the next stage."""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+
+
+_DONE = object()
+
+
+def run_pipeline(jobs: Iterable[Any], stages: List[Stage], on_error: Callable[[Any, str, Exception], None] = None):
+    """Push `jobs` through `stages` and block until every job has left the pipeline.
+
+    A job whose stage function raises is dropped from later stages and
+    reported through `on_error(job, stage_name, error)`.
+    """
+    # Queue i feeds stage i; later queues hold at most one waiting job per worker
+    queues = [queue.Queue()] + [queue.Queue(maxsize=stage.workers) for stage in stages[1:]]
+
+    def worker(index: int):
+        stage = stages[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                return
+            try:
+                result = stage.func(job)
+            except Exception as e:
+                if on_error:
+                    on_error(job, stage.name, e)
+                continue
+            if outbox is not None:
+                outbox.put(result)  # blocks while the next stage is saturated
+
+    threads = []
+    for index, stage in enumerate(stages):
+        threads.append([
+            threading.Thread(target=worker, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+            for n in range(stage.workers)
+        ])
+        for thread in threads[-1]:
+            thread.start()
+
+    for job in jobs:
+        queues[0].put(job)
+    # Shut stages down in order once everything upstream has drained
+    for index, stage in enumerate(stages):
+        for _ in range(stage.workers):
+            queues[index].put(_DONE)
+        for thread in threads[index]:
+            thread.join()
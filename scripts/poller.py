@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Poller) - One background loop that polls many predictions.
+
+Each watched prediction gets a Future that resolves with its final state.
+Poll intervals adapt per model: while a prediction is younger than the
+model's usual fastest completion time it is left alone, around the typical
+completion window it is polled often, and beyond that the interval grows
+with its age. Completion times are remembered across runs in the cache
+directory.
+
+When webhooks are enabled (see webhooks.py), completion events resolve
+futures directly and polling only starts after `push_fallback` seconds.
+
+Usage:
+    from poller import get_poller
+
+    result = get_poller().wait(prediction, "google/veo-3.1", timeout=600)
+
+    future = get_poller().watch(prediction, "fofr/expression-editor")
+    result = future.result()               # blocking
+    result = await asyncio.wrap_future(future)  # from asyncio code
+"""
+
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from disk_cache import DEFAULT_CACHE_DIR
+from instrument import record_prediction, record_span
+from replicate_client import API_BASE, ClientError, get_client
+
+log = logging.getLogger("pfp_animate.poller")
+
+
+TERMINAL_STATUSES = {"succeeded", "failed", "canceled"}
+
+# Interval bounds (seconds) and growth once past the expected completion window
+MIN_INTERVAL = 0.5
+MAX_INTERVAL = 30.0
+BACKOFF_FRACTION = 0.25
+# Completion times remembered per model, and how many are needed to trust them
+HISTORY_SIZE = 50
+MIN_SAMPLES = 5
+
+STATS_FILE = DEFAULT_CACHE_DIR / "poll_stats.json"
+
+
+class Watch:
+    """Bookkeeping for one watched prediction."""
+
+    def __init__(self, prediction: dict, model: str, timeout: float, on_status: Callable = None):
+        self.prediction = prediction
+        self.model = model
+        self.deadline = time.time() + timeout
+        self.timeout = timeout
+        self.on_status = on_status
+        # on_status runs on the poller thread in the caller's context, so
+        # context-scoped state (e.g. the server's per-job output) follows it
+        self.context = contextvars.copy_context()
+        self.started = time.time()
+        self.last_status = None
+        self.finished = False
+        self.future: Future = Future()
+
+    @property
+    def url(self) -> str:
+        urls = self.prediction.get("urls") or {}
+        return urls.get("get") or f"{API_BASE}/predictions/{self.prediction['id']}"
+
+    def report(self, status: str, elapsed: float):
+        if self.on_status:
+            self.context.copy().run(self.on_status, status, elapsed)
+
+
+class Poller:
+    """Polls all watched predictions from a single background thread."""
+
+    def __init__(self, stats_file=STATS_FILE):
+        self.stats_file = stats_file
+        self.history: Dict[str, List[float]] = self.load_history()
+        self.history_lock = threading.Lock()
+        self.queue: list = []  # heap of (due time, sequence, Watch)
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+        self.watches: Dict[str, Watch] = {}
+        self.early: Dict[str, dict] = {}  # pushed results that arrived before watch()
+        # Seconds to wait for a pushed result before polling; None disables push
+        self.push_fallback: Optional[float] = None
+
+    def load_history(self) -> Dict[str, List[float]]:
+        try:
+            with open(self.stats_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_history(self):
+        try:
+            os.makedirs(os.path.dirname(self.stats_file), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.stats_file), prefix=".tmp-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.history, f)
+            os.replace(tmp, self.stats_file)
+        except OSError:
+            pass  # statistics are only an optimization
+
+    def record(self, model: str, duration: float):
+        """Remember how long a prediction for `model` took to finish."""
+        with self.history_lock:
+            samples = self.history.setdefault(model, [])
+            samples.append(round(duration, 2))
+            del samples[:-HISTORY_SIZE]
+            self.save_history()
+
+    def next_interval(self, model: str, age: float) -> float:
+        """Seconds until the next poll of a prediction that is `age` seconds old."""
+        with self.history_lock:
+            samples = list(self.history.get(model, []))
+        if len(samples) >= MIN_SAMPLES:
+            deciles = statistics.quantiles(samples, n=10)
+            fastest, slowest = deciles[0], deciles[-1]
+            if age < fastest:
+                return max(MIN_INTERVAL, fastest - age)
+            if age < slowest:
+                return min(MAX_INTERVAL, max(MIN_INTERVAL, (slowest - fastest) / 10))
+        return min(MAX_INTERVAL, max(MIN_INTERVAL, age * BACKOFF_FRACTION))
+
+    def watch(self, prediction: dict, model: str, timeout: float = 600, on_status: Callable = None) -> Future:
+        """Start tracking a prediction. Returns a Future for its final state.
+
+        The Future resolves with the prediction dict once it succeeds, fails
+        or is canceled, or with {"status": "timeout", ...} after `timeout`
+        seconds. `on_status(status, elapsed)` is called on every status change,
+        on the poller thread but in the calling thread's context.
+        """
+        item = Watch(prediction, model, timeout, on_status)
+        with self.condition:
+            pushed = self.early.pop(prediction.get("id"), None)
+            if pushed is None and prediction.get("status") not in TERMINAL_STATUSES:
+                self.watches[prediction["id"]] = item
+        if pushed is not None:
+            self.finish(item, pushed)
+            return item.future
+        if prediction.get("status") in TERMINAL_STATUSES:
+            record_prediction(prediction, model)
+            item.future.set_result(prediction)
+            return item.future
+
+        if self.push_fallback is not None:
+            self.schedule(item, self.push_fallback)
+        else:
+            self.schedule(item, self.next_interval(model, 0))
+        return item.future
+
+    def resolve(self, prediction: dict):
+        """Accept a pushed prediction state (e.g. from a webhook)."""
+        if prediction.get("status") not in TERMINAL_STATUSES:
+            return
+        with self.condition:
+            item = self.watches.get(prediction.get("id"))
+            if item is None:
+                self.early[prediction.get("id")] = prediction
+                while len(self.early) > HISTORY_SIZE * 20:
+                    self.early.pop(next(iter(self.early)))
+                return
+        self.finish(item, prediction)
+
+    def finish(self, item: Watch, result: dict):
+        """Resolve a watch once, recording its duration on success."""
+        with self.condition:
+            if item.finished:
+                return
+            item.finished = True
+            self.watches.pop(item.prediction.get("id"), None)
+        status = result.get("status")
+        if status != item.last_status:
+            item.last_status = status
+            item.report(status, time.time() - item.started)
+        if status == "succeeded":
+            self.record(item.model, time.time() - item.started)
+        record_span("wait", time.time() - item.started, item.started, model=item.model, status=status)
+        record_prediction(result, item.model)
+        item.future.set_result(result)
+
+    def wait(self, prediction: dict, model: str, timeout: float = 600, on_status: Callable = None) -> dict:
+        """Block until a prediction finishes (see watch())."""
+        return self.watch(prediction, model, timeout, on_status).result()
+
+    def schedule(self, item: Watch, delay: float):
+        delay = min(delay, max(0.0, item.deadline - time.time()))
+        with self.condition:
+            heapq.heappush(self.queue, (time.time() + delay, next(self.sequence), item))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="prediction-poller", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.queue or self.queue[0][0] > time.time():
+                    timeout = self.queue[0][0] - time.time() if self.queue else None
+                    self.condition.wait(timeout)
+                _, _, item = heapq.heappop(self.queue)
+            try:
+                self.poll(item)
+            except Exception as e:  # never let one prediction stop the loop
+                with self.condition:
+                    failed = not item.finished
+                    item.finished = True
+                    self.watches.pop(item.prediction.get("id"), None)
+                if failed:
+                    item.future.set_exception(e)
+
+    def poll(self, item: Watch):
+        if item.finished:
+            return  # already resolved by a pushed result
+        now = time.time()
+        if now >= item.deadline:
+            self.finish(item, {
+                **item.prediction,
+                "status": "timeout",
+                "error": f"Prediction timed out after {item.timeout:.0f}s",
+            })
+            return
+
+        try:
+            result = get_client().get_json(item.url)
+        except ClientError as e:
+            log.warning("Status check failed: %s", e)
+            self.schedule(item, self.next_interval(item.model, now - item.started))
+            return
+
+        status = result.get("status")
+        if status in TERMINAL_STATUSES:
+            self.finish(item, result)
+            return
+        if status != item.last_status:
+            item.last_status = status
+            item.report(status, now - item.started)
+
+        item.prediction = result
+        self.schedule(item, self.next_interval(item.model, time.time() - item.started))
+
+
+_poller: Optional[Poller] = None
+_poller_lock = threading.Lock()
+
+
+def get_poller() -> Poller:
+    """Return the process-wide shared poller."""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = Poller()
+        return _poller
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (HTTP client) - Shared Replicate HTTP client for all scripts.
+
+Keeps keep-alive connections pooled per host so repeated create/poll/download
+calls reuse one TCP+TLS session, and applies a single timeout, gzip and
+retry/backoff policy to every request. Requests to the API draw from the
+request budgets shared by all processes (see governor.py).
+
+Usage:
+    from replicate_client import API_BASE, get_client
+
+    client = get_client()
+    prediction = client.post_json(f"{API_BASE}/predictions", {"version": ..., "input": ...})
+    result = client.get_json(f"{API_BASE}/predictions/{prediction['id']}")
+"""
+
+import gzip
+import http.client
+import json
+import logging
+import os
+import random
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from governor import Governor, get_governor
+from instrument import record_span
+
+# The shared modules log under "pfp_animate" and stay silent unless the
+# application adds a handler (the scripts print them, see core.log_to_console)
+logging.getLogger("pfp_animate").addHandler(logging.NullHandler())
+log = logging.getLogger("pfp_animate.replicate_client")
+
+
+# REPLICATE_API_BASE points every script at another server, e.g. benchmarks/fake_replicate.py
+API_BASE = os.environ.get("REPLICATE_API_BASE", "https://api.replicate.com/v1").rstrip("/")
+
+# Timeout policy (seconds): API calls, and requests held open with "Prefer: wait"
+DEFAULT_TIMEOUT = 60
+WAIT_TIMEOUT = 300
+
+# Retry policy: rate limits back off from RATE_LIMIT_BACKOFF (or Retry-After),
+# server/network errors from ERROR_BACKOFF, doubling up to MAX_BACKOFF.
+MAX_RETRIES = 3
+RATE_LIMIT_BACKOFF = 10.0
+ERROR_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses where a non-GET request is known not to have been processed
+RETRY_STATUSES_UNSAFE = {429, 503}
+
+MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+CHUNK_SIZE = 1 << 16
+
+# Downloads: resume attempts after a dropped connection, progress line interval (s)
+DOWNLOAD_RESUMES = 5
+PROGRESS_INTERVAL = 2.0
+
+
+class ClientError(Exception):
+    """Base class for errors raised by the shared client."""
+
+
+class HTTPError(ClientError):
+    """Non-2xx response after retries were exhausted."""
+
+    def __init__(self, code: int, body: str, headers: Dict[str, str], url: str):
+        super().__init__(f"HTTP {code} for {url}: {body[:200]}")
+        self.code = code
+        self.body = body
+        self.headers = headers
+        self.url = url
+
+
+class NetworkError(ClientError):
+    """Connection failure or timeout after retries were exhausted."""
+
+
+class Response:
+    """A fully read HTTP response."""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, url: str):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+def content_length(status: int, headers: Dict[str, str], offset: int = 0) -> Optional[int]:
+    """Total size of a download from Content-Range or Content-Length, if known."""
+    content_range = headers.get("content-range", "")
+    if status == 206 and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        if total.isdigit():
+            return int(total)
+    length = headers.get("content-length")
+    if length and length.isdigit():
+        return int(length) + (offset if status == 206 else 0)
+    return None
+
+
+class MultipartFile:
+    """File-like multipart/form-data body that streams one file from disk.
+
+    Supports read() and seek(0), so the body can be re-sent on retry without
+    ever holding the whole file in memory.
+    """
+
+    def __init__(self, path: str, field: str, content_type: str, filename: str = None):
+        self.boundary = uuid.uuid4().hex
+        filename = filename or os.path.basename(path)
+        self.prefix = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self.suffix = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self.path = path
+        self.length = len(self.prefix) + os.path.getsize(path) + len(self.suffix)
+        self.file = None
+        self.seek(0)
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def seek(self, offset: int):
+        if offset != 0:
+            raise ValueError("MultipartFile only supports seeking to the start")
+        if self.file:
+            self.file.close()
+        self.file = open(self.path, "rb")
+        self.parts = [self.prefix, self.file, self.suffix]
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while self.parts and size != 0:
+            part = self.parts[0]
+            if isinstance(part, bytes):
+                chunk = part if size < 0 else part[:size]
+                rest = part[len(chunk):]
+                if rest:
+                    self.parts[0] = rest
+                else:
+                    self.parts.pop(0)
+            else:
+                chunk = part.read(size)
+                if not chunk or size < 0:
+                    self.parts.pop(0)
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+class ConnectionPool:
+    """Thread-safe pool of idle keep-alive connections keyed by origin."""
+
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST):
+        self.max_idle = max_idle_per_host
+        self.idle: Dict[tuple, list] = {}
+        self.lock = threading.Lock()
+        self.ssl_context = ssl.create_default_context()
+
+    def acquire(self, scheme: str, host: str, port: int, timeout: float):
+        """Return (connection, reused) for an origin, reusing an idle one if possible."""
+        key = (scheme, host, port)
+        with self.lock:
+            idle = self.idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self.connect(scheme, host, port, timeout), False
+
+    def connect(self, scheme: str, host: str, port: int, timeout: float):
+        """Open a new connection, tunnelling through an environment proxy if one applies."""
+        proxy = None
+        if not urllib.request.proxy_bypass(host):
+            proxy = urllib.request.getproxies().get(scheme)
+
+        if proxy:
+            proxy_url = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+            proxy_host, proxy_port = proxy_url.hostname, proxy_url.port or 80
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=timeout, context=self.ssl_context)
+                conn.set_tunnel(host, port)
+            else:
+                conn = http.client.HTTPConnection(proxy_host, proxy_port, timeout=timeout)
+                conn.absolute_urls = True
+            return conn
+
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def release(self, scheme: str, host: str, port: int, conn):
+        """Return a connection whose response has been fully read."""
+        key = (scheme, host, port)
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close every idle connection."""
+        with self.lock:
+            for idle in self.idle.values():
+                for conn in idle:
+                    conn.close()
+            self.idle.clear()
+
+
+class ReplicateClient:
+    """HTTP client with pooled connections, gzip and a shared retry policy.
+
+    The API token is only sent to API_BASE; output files on other hosts are
+    fetched without credentials.
+    """
+
+    def __init__(self, token: str = None, timeout: float = DEFAULT_TIMEOUT, retries: int = MAX_RETRIES):
+        self.token = token
+        self.timeout = timeout
+        self.retries = retries
+        self.pool = ConnectionPool()
+
+    def api_token(self) -> Optional[str]:
+        return self.token or os.environ.get("REPLICATE_API_TOKEN")
+
+    def governor(self) -> Governor:
+        return get_governor(self.api_token())
+
+    def auth_headers(self, url: str) -> Dict[str, str]:
+        if not url.startswith(API_BASE):
+            return {}
+        token = self.api_token()
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    def backoff(self, attempt: int, status: int = None, headers: Dict[str, str] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        retry_after = (headers or {}).get("retry-after")
+        if retry_after:
+            try:
+                return min(MAX_BACKOFF, float(retry_after))
+            except ValueError:
+                pass
+        base = RATE_LIMIT_BACKOFF if status == 429 else ERROR_BACKOFF
+        delay = min(MAX_BACKOFF, base * (2 ** attempt))
+        return delay * random.uniform(0.8, 1.2)
+
+    def open(
+        self,
+        method: str,
+        url: str,
+        body: bytes = None,
+        headers: Dict[str, str] = None,
+        timeout: float = None,
+        model: str = None,
+        budget: Tuple[float, int] = None,
+        acquired: List[str] = None,
+    ):
+        """Send one request and return (response, headers, release) without reading the body.
+
+        Retries rate limits, server errors and connection failures with
+        backoff. Connection failures on non-GET requests are only retried
+        when they hit a reused keep-alive connection the server had closed.
+        `release(reusable)` must be called once the body has been consumed.
+
+        API requests wait for the shared governor first; `model` names the
+        model a version-based prediction create is for, so its budget applies,
+        and `budget` (rate_per_min, burst) overrides that budget for this
+        request only. `acquired` are buckets already taken with
+        Governor.acquire_async(), used for the first attempt. A 429 pauses the request's budgets for every process, not just this one.
+        """
+        timeout = timeout or self.timeout
+        request_headers = {"Accept-Encoding": "gzip", **self.auth_headers(url), **(headers or {})}
+
+        attempt = 0
+        redirects = 0
+        while True:
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme
+            host = parts.hostname
+            port = parts.port or (443 if scheme == "https" else 80)
+            path = parts.path or "/"
+            if parts.query:
+                path += f"?{parts.query}"
+
+            buckets = None
+            if url.startswith(API_BASE):
+                buckets, acquired = acquired or self.governor().acquire(method, url, model, budget), None
+            conn, reused = self.pool.acquire(scheme, host, port, timeout)
+            target = url if getattr(conn, "absolute_urls", False) else path
+            try:
+                if hasattr(body, "seek"):
+                    body.seek(0)
+                conn.request(method, target, body=body, headers=request_headers)
+                response = conn.getresponse()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                stale = reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))
+                if stale:
+                    continue  # server closed an idle connection; retry on a fresh one
+                if method == "GET" and attempt < self.retries:
+                    time.sleep(self.backoff(attempt))
+                    attempt += 1
+                    continue
+                raise NetworkError(f"{method} {url} failed: {e}") from e
+
+            response_headers = {k.lower(): v for k, v in response.getheaders()}
+            if buckets:
+                self.governor().observe(buckets, response_headers)
+
+            def release(reusable: bool = True, conn=conn, response=response, origin=(scheme, host, port)):
+                if reusable and not response.will_close:
+                    self.pool.release(*origin, conn)
+                else:
+                    conn.close()
+
+            if response.status in (301, 302, 303, 307, 308) and redirects < MAX_REDIRECTS:
+                response.read()
+                release()
+                url = urllib.parse.urljoin(url, response_headers.get("location", ""))
+                if response.status == 303:
+                    method, body = "GET", None
+                request_headers = {k: v for k, v in request_headers.items() if k != "Authorization"}
+                request_headers.update(self.auth_headers(url))
+                redirects += 1
+                continue
+
+            if response.status >= 400:
+                data = self.decode(response.read(), response_headers)
+                release()
+                retryable = RETRY_STATUSES if method == "GET" else RETRY_STATUSES_UNSAFE
+                if response.status in retryable and attempt < self.retries:
+                    delay = self.backoff(attempt, response.status, response_headers)
+                    if response.status == 429 and buckets:
+                        log.info("  Rate limited, pausing %s requests for %.0fs...", "/".join(buckets), delay)
+                        self.governor().pause(buckets, delay)  # the next acquire() waits it out
+                    else:
+                        if response.status == 429:
+                            log.info("  Rate limited, waiting %.0fs...", delay)
+                        time.sleep(delay)
+                    attempt += 1
+                    continue
+                raise HTTPError(response.status, data.decode("utf-8", "replace"), response_headers, url)
+
+            return response, response_headers, release
+
+    def decode(self, data: bytes, headers: Dict[str, str]) -> bytes:
+        if headers.get("content-encoding") == "gzip":
+            return gzip.decompress(data)
+        return data
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: bytes = None,
+        headers: Dict[str, str] = None,
+        timeout: float = None,
+        model: str = None,
+        budget: Tuple[float, int] = None,
+        acquired: List[str] = None,
+    ) -> Response:
+        """Send a request and return the fully read, decompressed response."""
+        response, response_headers, release = self.open(method, url, body, headers, timeout, model, budget, acquired)
+        try:
+            data = self.decode(response.read(), response_headers)
+        except (http.client.HTTPException, OSError) as e:
+            release(False)
+            raise NetworkError(f"{method} {url} failed while reading: {e}") from e
+        release()
+        return Response(response.status, response_headers, data, url)
+
+    def get_json(self, url: str, timeout: float = None) -> Any:
+        return self.request("GET", url, timeout=timeout).json()
+
+    def post_json(
+        self,
+        url: str,
+        data: Any,
+        headers: Dict[str, str] = None,
+        timeout: float = None,
+        model: str = None,
+        budget: Tuple[float, int] = None,
+        acquired: List[str] = None,
+    ) -> Any:
+        payload = json.dumps(data).encode("utf-8")
+        request_headers = {"Content-Type": "application/json", **(headers or {})}
+        return self.request("POST", url, payload, request_headers, timeout, model, budget, acquired).json()
+
+    def get_bytes(self, url: str, timeout: float = None) -> bytes:
+        return self.request("GET", url, timeout=timeout).body
+
+    def download(self, url: str, output_path: str, timeout: float = None, progress: bool = True) -> int:
+        """Stream a URL to a file in fixed-size chunks. Returns the number of bytes written.
+
+        Data goes to `<output_path>.part` and is renamed into place only once
+        complete, so readers never see a partial file. A dropped connection
+        resumes with an HTTP Range request (up to DOWNLOAD_RESUMES times),
+        and the final size is checked against Content-Length. On any other
+        failure (an HTTP error, a resume request that fails, a local write
+        error) the partial file is removed before the error is raised.
+        """
+        part_path = f"{output_path}.part"
+        written = 0
+        expected = None
+        resumes = 0
+        start = time.time()
+        last_report = start
+
+        try:
+            with open(part_path, "wb") as f:
+                while True:
+                    headers = {"Accept-Encoding": "identity"}
+                    if written:
+                        headers["Range"] = f"bytes={written}-"
+                    response, response_headers, release = self.open("GET", url, headers=headers, timeout=timeout)
+
+                    if written and response.status != 206:
+                        # Server ignored the range; start over
+                        f.seek(0)
+                        f.truncate()
+                        written = 0
+                    if expected is None:
+                        expected = content_length(response.status, response_headers, written)
+
+                    dropped = None
+                    try:
+                        while True:
+                            try:
+                                chunk = response.read(CHUNK_SIZE)
+                            except (http.client.HTTPException, OSError) as e:
+                                dropped = e
+                                break
+                            if not chunk:
+                                break
+                            f.write(chunk)  # local write errors are not resumable
+                            written += len(chunk)
+                            now = time.time()
+                            if progress and now - last_report >= PROGRESS_INTERVAL:
+                                last_report = now
+                                total = f"/{expected / 1e6:.1f}" if expected else ""
+                                log.info("  Downloaded %.1f%s MB (%.1f MB/s)", written / 1e6, total, written / 1e6 / (now - start))
+                    except BaseException:
+                        release(False)
+                        raise
+                    if dropped:
+                        release(False)
+                        if resumes >= DOWNLOAD_RESUMES:
+                            raise NetworkError(f"GET {url} failed while downloading: {dropped}")
+                        resumes += 1
+                        log.info("  Connection dropped at %.1f MB, resuming...", written / 1e6)
+                        continue
+                    release()
+
+                    if expected is not None and written < expected and resumes < DOWNLOAD_RESUMES:
+                        resumes += 1  # server closed early; fetch the rest
+                        continue
+                    break
+
+            if expected is not None and written != expected:
+                raise NetworkError(f"GET {url}: expected {expected} bytes, received {written}")
+            os.replace(part_path, output_path)
+        except BaseException:
+            # Only a dropped connection is resumed (above); anything else ends the download
+            try:
+                os.unlink(part_path)
+            except OSError:
+                pass
+            raise
+
+        elapsed = max(time.time() - start, 1e-6)
+        record_span("download", elapsed, start, bytes=written, bytes_per_second=round(written / elapsed))
+        if progress:
+            log.info("  Downloaded %.1f MB in %.1fs (%.1f MB/s)", written / 1e6, elapsed, written / 1e6 / elapsed)
+        return written
+
+    def upload(self, path: str, content_type: str) -> dict:
+        """Upload a local file to the Replicate files API, streaming it from disk.
+
+        Returns the file object; pass `file["urls"]["get"]` as a model input.
+        """
+        body = MultipartFile(path, "content", content_type)
+        headers = {"Content-Type": body.content_type, "Content-Length": str(body.length)}
+        try:
+            return self.request("POST", f"{API_BASE}/files", body, headers, WAIT_TIMEOUT).json()
+        finally:
+            body.close()
+
+    def close(self):
+        self.pool.close()
+
+
+_client: Optional[ReplicateClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ReplicateClient:
+    """Return the process-wide shared client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ReplicateClient()
+        return _client
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Results) - Reuse videos already generated for identical requests.
+
+Every finished Kling, Veo or OmniHuman video is copied into a result store
+keyed by the model plus a canonical hash of its inputs, with local files
+replaced by their content hash (so re-uploads and expiring file URLs don't
+change the key). A later run with the same model, inputs, prompt, seed and
+parameters copies the stored MP4 to its output path without creating a
+prediction.
+
+Entries expire a fixed time after they were stored (--result-ttl, in days)
+and the least recently used are evicted past the size cap
+(--result-cache-size). --no-cache always runs the model.
+
+Default location: ~/.cache/pfp-animate/results (follows PFP_ANIMATE_CACHE_DIR).
+
+Usage:
+    from result_store import get_result_store, input_digest, result_key
+
+    key = result_key(MODEL, {"start_image": input_digest(path), "prompt": prompt})
+    if not get_result_store().fetch(key, output_path):
+        ...  # generate and download, then
+        get_result_store().save(key, output_path)
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+from disk_cache import DEFAULT_CACHE_DIR, DiskCache, hash_file, make_key
+
+log = logging.getLogger("pfp_animate.result_store")
+
+
+DEFAULT_RESULTS_MB = 2000
+DEFAULT_TTL_DAYS = 30
+
+_store: Optional["ResultStore"] = None
+_lock = threading.Lock()
+
+
+def input_digest(value: Optional[str]) -> Optional[str]:
+    """Stable key value for an input: a local file's content hash, else the value."""
+    if not value or value.startswith(("http://", "https://", "data:")) or not os.path.isfile(value):
+        return value
+    return "sha256:" + hash_file(value)
+
+
+def result_key(model: str, inputs: dict) -> str:
+    """Result store key for a model and its (digested) inputs."""
+    return make_key("result", model, inputs)
+
+
+class ResultStore:
+    """Finished output videos on disk, keyed by result_key()."""
+
+    def __init__(self, directory: Path = None, max_mb: float = DEFAULT_RESULTS_MB, ttl_days: float = DEFAULT_TTL_DAYS):
+        self.cache = DiskCache(
+            Path(directory) if directory else DEFAULT_CACHE_DIR / "results", max_mb, ".mp4",
+            max_age=ttl_days * 86400 if ttl_days else None,
+        )
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Copy a stored result to `output_path`; False if there is none."""
+        path = self.cache.get(key)
+        if path is None:
+            return False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            shutil.copyfile(path, output_path)
+        except FileNotFoundError:  # evicted by another process
+            return False
+        return True
+
+    def save(self, key: str, output_path: str):
+        """Store a finished output; failures only log a warning."""
+        try:
+            self.cache.copy_file(key, output_path)
+        except OSError as e:
+            log.warning("Could not store result: %s", e)
+
+
+class DisabledStore:
+    """Stand-in used with --no-cache: never hits, never stores."""
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        return False
+
+    def save(self, key: str, output_path: str):
+        pass
+
+
+def get_result_store():
+    """Return the process-wide result store (default settings unless configured)."""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = ResultStore()
+        return _store
+
+
+def add_result_args(parser: argparse.ArgumentParser, no_cache: bool = True):
+    """Add the shared result store options to a script's argument parser.
+
+    Scripts that already define --no-cache pass `no_cache=False`; the store
+    honours the existing flag.
+    """
+    if no_cache:
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Always run the model instead of reusing a stored result"
+        )
+    parser.add_argument(
+        "--result-ttl",
+        type=float,
+        default=DEFAULT_TTL_DAYS,
+        metavar="DAYS",
+        help=f"Reuse stored results for this many days (default: {DEFAULT_TTL_DAYS})"
+    )
+    parser.add_argument(
+        "--result-cache-size",
+        type=float,
+        default=DEFAULT_RESULTS_MB,
+        metavar="MB",
+        help=f"Result store size cap in MB (default: {DEFAULT_RESULTS_MB})"
+    )
+
+
+def configure_results(args: argparse.Namespace):
+    """Set up the process-wide result store from parsed arguments."""
+    global _store
+    with _lock:
+        if args.no_cache:
+            _store = DisabledStore()
+        else:
+            _store = ResultStore(max_mb=args.result_cache_size, ttl_days=args.result_ttl)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Uploads) - Send each local input to Replicate only once.
+
+Local images and audio are uploaded through the Replicate files API and the
+returned URL is used in prediction payloads instead of an inline base64 data
+URI. Uploads are memoized by content hash (per API token), in memory and in
+an index under the cache directory, until shortly before the file expires.
+If the upload fails, the input falls back to a data URI.
+"""
+
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from disk_cache import DEFAULT_CACHE_DIR, DiskCache, hash_bytes, hash_file, make_key
+from instrument import span
+from replicate_client import ClientError, get_client
+
+log = logging.getLogger("pfp_animate.uploads")
+
+
+# Re-upload files that expire within this many seconds
+EXPIRY_MARGIN = 3600
+# Assume this lifetime if the API does not report an expiry
+DEFAULT_LIFETIME = 23 * 3600
+
+_memo = {}
+_locks = {}
+_locks_guard = threading.Lock()
+_index = None
+
+
+def data_uri(path: str, mime_type: str) -> str:
+    """Read a file and return it as a base64 data URI."""
+    with span("encode_input", mime_type=mime_type), open(path, "rb") as f:
+        data = base64.b64encode(f.read()).decode("utf-8")
+    return f"data:{mime_type};base64,{data}"
+
+
+def parse_expiry(file_object: dict) -> float:
+    """Return the expiry of an uploaded file as a Unix timestamp."""
+    expires_at = file_object.get("expires_at")
+    if expires_at:
+        try:
+            return datetime.fromisoformat(expires_at.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return time.time() + DEFAULT_LIFETIME
+
+
+def upload_index() -> DiskCache:
+    """Return the persistent content-hash -> uploaded URL index."""
+    global _index
+    with _locks_guard:
+        if _index is None:
+            _index = DiskCache(DEFAULT_CACHE_DIR / "uploads", max_mb=10, suffix=".json")
+        return _index
+
+
+def upload_file(path: str, mime_type: str) -> str:
+    """Upload a local file once and return its URL for use in payloads."""
+    client = get_client()
+    token = client.api_token() or ""
+    key = make_key(hash_file(path), hash_bytes(token.encode("utf-8")))
+
+    with _locks_guard:
+        lock = _locks.setdefault(key, threading.Lock())
+
+    with lock:
+        entry = _memo.get(key)
+        if entry is None:
+            data = upload_index().get_bytes(key)
+            entry = json.loads(data) if data else None
+        if entry and entry["expires"] - EXPIRY_MARGIN > time.time():
+            _memo[key] = entry
+            return entry["url"]
+
+        with span("upload", mime_type=mime_type) as extra:
+            file_object = client.upload(path, mime_type)
+            extra["bytes"] = os.path.getsize(path)
+        entry = {"url": file_object["urls"]["get"], "expires": parse_expiry(file_object)}
+        _memo[key] = entry
+        upload_index().put(key, json.dumps(entry).encode("utf-8"))
+        return entry["url"]
+
+
+def file_input(path: str, mime_type: str) -> str:
+    """Return a payload value for a local file: an uploaded URL, or a data URI fallback."""
+    try:
+        return upload_file(path, mime_type)
+    except (ClientError, KeyError) as e:
+        log.warning("Upload failed (%s), sending %s inline", e, path)
+        return data_uri(path, mime_type)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+PFP Animate (Webhooks) - Learn about finished predictions from webhooks.
+
+In webhook mode every prediction is created with a `webhook` URL pointing at
+a small built-in HTTP receiver. Completion events resolve the shared poller's
+futures directly, so a prediction is only polled if its event has not arrived
+within the fallback timeout.
+
+The receiver listens locally; Replicate must be able to reach it, e.g. through
+a tunnel or reverse proxy whose public URL is passed as --webhook-url. For
+local testing, a stand-in server can POST prediction JSON straight to the
+listen address.
+
+Usage:
+    python animate_veo.py photo.png out.mp4 --prompt "..." \\
+        --webhook-url https://example.ngrok.app/webhook --webhook-listen 0.0.0.0:8787
+
+Environment defaults: PFP_ANIMATE_WEBHOOK_URL, PFP_ANIMATE_WEBHOOK_LISTEN,
+PFP_ANIMATE_WEBHOOK_SECRET (verifies signatures when set).
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from poller import get_poller
+
+log = logging.getLogger("pfp_animate.webhooks")
+
+
+DEFAULT_LISTEN = "127.0.0.1:8787"
+DEFAULT_FALLBACK = 30.0
+WEBHOOK_PATH = "/webhook"
+# Reject signed events older than this many seconds
+SIGNATURE_TOLERANCE = 300
+
+_receiver: Optional["WebhookReceiver"] = None
+
+
+def verify_signature(secret: str, headers, body: bytes) -> bool:
+    """Check a Replicate (Standard Webhooks) signature.
+
+    The signed content is "{webhook-id}.{webhook-timestamp}.{body}", signed
+    with HMAC-SHA256 using the base64 key after the "whsec_" prefix.
+    """
+    webhook_id = headers.get("webhook-id", "")
+    timestamp = headers.get("webhook-timestamp", "")
+    signatures = headers.get("webhook-signature", "")
+    if not (webhook_id and timestamp.isdigit() and signatures):
+        return False
+    if abs(time.time() - int(timestamp)) > SIGNATURE_TOLERANCE:
+        return False
+
+    key = base64.b64decode(secret.split("_", 1)[1] if secret.startswith("whsec_") else secret)
+    signed = f"{webhook_id}.{timestamp}.".encode("utf-8") + body
+    expected = base64.b64encode(hmac.new(key, signed, hashlib.sha256).digest()).decode("utf-8")
+    for signature in signatures.split():
+        version, _, value = signature.partition(",")
+        if version == "v1" and hmac.compare_digest(value, expected):
+            return True
+    return False
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Accepts prediction webhooks and hands them to the poller."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        secret = self.server.secret
+        if secret and not verify_signature(secret, self.headers, body):
+            self.send_response(401)
+            self.end_headers()
+            return
+        try:
+            prediction = json.loads(body.decode("utf-8"))
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        self.send_response(204)
+        self.end_headers()
+        if isinstance(prediction, dict) and prediction.get("id"):
+            get_poller().resolve(prediction)
+
+
+class WebhookReceiver:
+    """Background HTTP server receiving prediction webhooks."""
+
+    def __init__(self, listen: str = DEFAULT_LISTEN, public_url: str = None, secret: str = None):
+        host, _, port = listen.rpartition(":")
+        self.server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), WebhookHandler)
+        self.server.daemon_threads = True
+        self.server.secret = secret
+        bound_host, bound_port = self.server.server_address[:2]
+        self.public_url = public_url or f"http://{bound_host}:{bound_port}{WEBHOOK_PATH}"
+        self.thread = threading.Thread(target=self.server.serve_forever, name="webhook-receiver", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def enable_webhooks(
+    listen: str = DEFAULT_LISTEN,
+    public_url: str = None,
+    secret: str = None,
+    fallback: float = DEFAULT_FALLBACK,
+) -> WebhookReceiver:
+    """Start the receiver and switch the shared poller to webhook-first mode."""
+    global _receiver
+    if _receiver is None:
+        _receiver = WebhookReceiver(listen, public_url, secret)
+        _receiver.start()
+        get_poller().push_fallback = fallback
+        host, port = _receiver.server.server_address[:2]
+        log.info("Webhook mode: receiving on %s:%s, events sent to %s", host, port, _receiver.public_url)
+    return _receiver
+
+
+def webhook_fields() -> dict:
+    """Extra prediction-create fields for webhook mode (empty when disabled)."""
+    if _receiver is None:
+        return {}
+    return {"webhook": _receiver.public_url, "webhook_events_filter": ["completed"]}
+
+
+def add_webhook_args(parser: argparse.ArgumentParser):
+    """Add the shared webhook options to a script's argument parser."""
+    parser.add_argument(
+        "--webhook-url",
+        default=os.environ.get("PFP_ANIMATE_WEBHOOK_URL"),
+        help="Public URL Replicate should send completion webhooks to (enables webhook mode)"
+    )
+    parser.add_argument(
+        "--webhook-listen",
+        default=os.environ.get("PFP_ANIMATE_WEBHOOK_LISTEN"),
+        metavar="HOST:PORT",
+        help=f"Local address for the webhook receiver (enables webhook mode, default: {DEFAULT_LISTEN})"
+    )
+    parser.add_argument(
+        "--webhook-fallback",
+        type=float,
+        default=DEFAULT_FALLBACK,
+        metavar="SECONDS",
+        help=f"Start polling if no webhook arrives within this time (default: {DEFAULT_FALLBACK:g})"
+    )
+
+
+def configure_webhooks(args: argparse.Namespace):
+    """Enable webhook mode if the parsed arguments ask for it."""
+    if args.webhook_url or args.webhook_listen:
+        enable_webhooks(
+            listen=args.webhook_listen or DEFAULT_LISTEN,
+            public_url=args.webhook_url,
+            secret=os.environ.get("PFP_ANIMATE_WEBHOOK_SECRET"),
+            fallback=args.webhook_fallback,
+        )
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Span recording in the resident job server stays bounded, and each job's
+progress lines (including poller status callbacks) land in its own log.
+
+Runs Kling jobs through the server's Scheduler against the in-process fake
+Replicate API (benchmarks/fake_replicate.py).
+
+Usage:
+    python -m unittest discover tests
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import unittest
+from collections import deque
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "scripts"), str(ROOT / "benchmarks")]
+
+from fake_replicate import Config, FakeReplicate, png_bytes
+
+JOBS = 6
+
+
+def setUpModule():
+    global fake, work_dir, instrument, animate_pfp, animate_server
+    fake = FakeReplicate(Config(queue=0.1, latency=0.2, jitter=0)).start()
+    work_dir = tempfile.TemporaryDirectory(prefix="pfp-test-")
+    os.environ.update({
+        "REPLICATE_API_BASE": fake.api_base,
+        "REPLICATE_API_TOKEN": "r8_test",
+        "PFP_ANIMATE_CACHE_DIR": os.path.join(work_dir.name, "cache"),
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+    })
+    # The scripts read the API base and cache directory on import
+    import animate_pfp
+    import animate_server
+    import instrument
+    from result_store import configure_results
+    configure_results(argparse.Namespace(no_cache=True, result_cache_size=0, result_ttl=0))
+
+
+def tearDownModule():
+    fake.stop()
+    work_dir.cleanup()
+
+
+class ServerSpansTest(unittest.TestCase):
+    def setUp(self):
+        instrument._recording = False
+        instrument._spans = deque(maxlen=20)
+        self.image = os.path.join(work_dir.name, "face.png")
+        with open(self.image, "wb") as f:
+            f.write(png_bytes(8, 8, (200, 150, 120)))
+
+    def run_jobs(self, count: int):
+        output = animate_server.JobOutput(sys.stdout)
+        scheduler = animate_server.Scheduler({"kling": 3}, output)
+        scheduler.functions = {"kling": animate_pfp.animate}
+        scheduler.start()
+        sys.stdout = output  # as in the server: each job's prints go to its log
+        self.addCleanup(setattr, sys, "stdout", output.stream)
+        jobs = [
+            scheduler.submit("kling", {
+                "input_image": self.image,
+                "output_path": os.path.join(work_dir.name, f"out_{n}.mp4"),
+                "prompt": f"job {n}",
+            })
+            for n in range(count)
+        ]
+        deadline = time.time() + 60
+        while any(job.status in ("queued", "running") for job in jobs) and time.time() < deadline:
+            time.sleep(0.1)
+        self.assertEqual([job.status for job in jobs], ["succeeded"] * count, [job.error for job in jobs])
+        return jobs
+
+    def test_spans_not_kept_without_report(self):
+        self.run_jobs(JOBS)
+        self.assertEqual(instrument.spans(), [])
+
+    def test_spans_bounded_with_report(self):
+        instrument.start_recording()
+        self.run_jobs(JOBS)
+        self.assertEqual(len(instrument.spans()), 20)
+        self.run_jobs(JOBS)
+        self.assertEqual(len(instrument.spans()), 20)
+
+    def test_status_lines_in_job_log(self):
+        for job in self.run_jobs(JOBS):
+            self.assertIn("Status: succeeded...", " ".join(job.log))
+            self.assertIn(job.params["prompt"], " ".join(job.log))
+
+
+if __name__ == "__main__":
+    unittest.main()